@@ -1,11 +1,26 @@
-from .simulator import Simulator, SimulationConfig, OutcomeConfig, BettingStrategy
+from .simulator import Simulator, SimulationConfig, OutcomeConfig, BettingStrategy, StatefulStrategy
 from .strategies import (
     FixedFractionStrategy, KellyCriterionStrategy, 
-    MartingaleStrategy, CustomStrategy
+    MartingaleStrategy, CustomStrategy, kelly_fraction
 )
+from .samplers import OutcomeSampler, CDFSampler, AliasSampler, create_sampler
+from .random_streams import PathStreams, resolve_seed
+from .sketches import TrajectorySketch
+from .adaptive import PrecisionTarget
+from .comparison import compare_strategies
+from .grid import GridAxis, run_grid_sweep
+from .optimizer import BetFractionOptimizer, optimize_bet_fraction
+from .markov import BankrollMarkovChain
+from .metrics import PathMetrics, trajectory_metrics
 
 __all__ = [
     'Simulator', 'SimulationConfig', 'OutcomeConfig', 'BettingStrategy',
+    'StatefulStrategy',
     'FixedFractionStrategy', 'KellyCriterionStrategy', 
-    'MartingaleStrategy', 'CustomStrategy'
+    'MartingaleStrategy', 'CustomStrategy', 'kelly_fraction',
+    'OutcomeSampler', 'CDFSampler', 'AliasSampler', 'create_sampler',
+    'PathStreams', 'resolve_seed', 'TrajectorySketch', 'PrecisionTarget',
+    'compare_strategies', 'GridAxis', 'run_grid_sweep',
+    'BetFractionOptimizer', 'optimize_bet_fraction', 'BankrollMarkovChain',
+    'PathMetrics', 'trajectory_metrics'
 ] 
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+Adaptive-precision Monte Carlo with early stopping.
+
+Instead of a fixed number of paths, a PrecisionTarget asks for confidence
+intervals of a given half-width on the ruin probability and the mean final
+bankroll. Paths run in batches of whole stream blocks; after every batch the
+intervals are recomputed and the next batch is sized from the current
+variance estimates, until the targets are met or the budget is spent.
+
+Because batches are aligned to stream blocks, a run that stops after n paths
+returns the same paths as a fixed run of n paths with the same seed.
+"""
+import copy
+import dataclasses
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Tuple
+
+from .aggregation import RunningStats
+from .random_streams import STREAM_BLOCK_PATHS
+
+
+# Paths in the first batch
+INITIAL_BATCH_PATHS = 1024
+
+# Upper bound on the growth of the path count from one batch to the next
+MAX_BATCH_GROWTH = 2.0
+
+
+@dataclass
+class PrecisionTarget:
+    """Requested precision of an adaptive run."""
+    ruin_half_width: Optional[float] = 0.01
+    mean_half_width: Optional[float] = None
+    confidence: float = 0.95
+    max_simulations: Optional[int] = None
+
+    def __post_init__(self):
+        if self.ruin_half_width is None and self.mean_half_width is None:
+            raise ValueError("A precision target needs ruin_half_width or mean_half_width")
+        for name in ('ruin_half_width', 'mean_half_width'):
+            value = getattr(self, name)
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive (got {value})")
+        if not 0 < self.confidence < 1:
+            raise ValueError(f"confidence must be between 0 and 1 (got {self.confidence})")
+
+    @property
+    def z(self) -> float:
+        """Two-sided normal quantile of the confidence level."""
+        return NormalDist().inv_cdf(0.5 + self.confidence / 2)
+
+
+def wilson_interval(successes: int, trials: int, z: float) -> Tuple[float, float]:
+    """
+    Wilson score interval of a binomial proportion.
+
+    Unlike the normal approximation it stays informative when no or all
+    trials succeed, which is common for ruin probabilities.
+
+    Returns:
+        tuple: (lower bound, upper bound)
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z ** 2 / trials
+    center = (p + z ** 2 / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def mean_interval(stats: RunningStats, z: float) -> Tuple[float, float]:
+    """
+    Normal-approximation confidence interval of a mean.
+
+    Returns:
+        tuple: (lower bound, upper bound)
+    """
+    if stats.count < 2:
+        return -math.inf, math.inf
+    half_width = z * math.sqrt(stats.m2 / (stats.count - 1) / stats.count)
+    return stats.mean - half_width, stats.mean + half_width
+
+
+def _required_paths(target: PrecisionTarget, stats: RunningStats, num_bankrupt: int) -> float:
+    """Estimate the number of paths needed to meet the target."""
+    z = target.z
+    required = 0.0
+    if target.ruin_half_width is not None:
+        # Smoothed proportion, so a run without any ruin still asks for enough paths
+        p = (num_bankrupt + z ** 2 / 2) / (stats.count + z ** 2)
+        required = max(required, (z / target.ruin_half_width) ** 2 * p * (1 - p))
+    if target.mean_half_width is not None and stats.count > 1:
+        variance = stats.m2 / (stats.count - 1)
+        required = max(required, (z / target.mean_half_width) ** 2 * variance)
+    return required
+
+
+def precision_summary(target: PrecisionTarget, stats: RunningStats, num_bankrupt: int,
+                      max_simulations: int) -> Dict[str, Any]:
+    """
+    Describe the precision an adaptive run achieved.
+
+    Args:
+        target: Requested precision
+        stats: Running statistics of the final bankrolls
+        num_bankrupt: Number of ruined paths
+        max_simulations: Path budget of the run
+
+    Returns:
+        dict: Achieved intervals and half-widths, targets and paths used
+    """
+    z = target.z
+    ruin_low, ruin_high = wilson_interval(num_bankrupt, stats.count, z)
+    mean_low, mean_high = mean_interval(stats, z)
+    ruin_half_width = (ruin_high - ruin_low) / 2
+    mean_half_width = (mean_high - mean_low) / 2
+
+    converged = (
+        (target.ruin_half_width is None or ruin_half_width <= target.ruin_half_width)
+        and (target.mean_half_width is None or mean_half_width <= target.mean_half_width)
+    )
+    return {
+        'confidence': target.confidence,
+        'ruin_ci': [ruin_low, ruin_high],
+        'ruin_half_width': ruin_half_width,
+        'mean_ci': [mean_low, mean_high],
+        'mean_half_width': mean_half_width,
+        'target_ruin_half_width': target.ruin_half_width,
+        'target_mean_half_width': target.mean_half_width,
+        'simulations_used': stats.count,
+        'max_simulations': max_simulations,
+        'converged': converged,
+    }
+
+
+def _round_up_to_block(num_paths: float) -> int:
+    """Round a path count up to a whole number of stream blocks."""
+    return int(math.ceil(num_paths / STREAM_BLOCK_PATHS)) * STREAM_BLOCK_PATHS
+
+
+def run_adaptive_simulations(simulator, seed: int, start_time: float,
+                             progress_callback=None) -> Dict[str, Any]:
+    """
+    Run batches of paths until the simulator's precision target is met.
+
+    Args:
+        simulator: Simulator with a precision target
+        seed: Run seed the path streams are derived from
+        start_time: Time the run started (from time.time())
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+    Returns:
+        dict: Aggregated simulation results with a 'precision' entry
+    """
+    target = simulator.precision
+    max_simulations = target.max_simulations or simulator.config.num_simulations
+
+    # Streams are laid out for the whole budget, so every batch but the last is
+    # made of full stream blocks whatever the budget
+    budget_simulator = copy.copy(simulator)
+    budget_simulator.config = dataclasses.replace(simulator.config, num_simulations=max_simulations)
+
+    stats = RunningStats()
+    num_bankrupt = 0
+    partials = []
+    path_stop = min(_round_up_to_block(INITIAL_BATCH_PATHS), max_simulations)
+
+    # Progress is measured against the projected total and never moves back
+    projected = max_simulations
+    reported = 0.0
+
+    def report(fraction: float):
+        nonlocal reported
+        reported = max(reported, min(1.0, fraction))
+        progress_callback(reported)
+
+    while True:
+        path_start = stats.count
+        batch_callback = None
+        if progress_callback:
+            batch_callback = lambda fraction: report(
+                (path_start + fraction * (path_stop - path_start)) / projected
+            )
+
+        for partial in budget_simulator.run_path_batch(seed, path_start, path_stop, batch_callback):
+            partials.append(partial)
+            if 'aggregator' in partial:
+                stats.merge(partial['aggregator'].final_bankroll_stats)
+                num_bankrupt += partial['aggregator'].num_bankrupt
+            else:
+                stats.update(partial['final_bankrolls'])
+                num_bankrupt += partial['num_bankrupt']
+
+        summary = precision_summary(target, stats, num_bankrupt, max_simulations)
+        if summary['converged'] or stats.count >= max_simulations:
+            break
+
+        # Size the next batch from the current variance, growing at most geometrically
+        required = _required_paths(target, stats, num_bankrupt)
+        next_stop = min(max(required, stats.count + STREAM_BLOCK_PATHS), stats.count * MAX_BATCH_GROWTH)
+        path_stop = min(_round_up_to_block(next_stop), max_simulations)
+        projected = min(max(required, path_stop), max_simulations)
+
+    if progress_callback:
+        report(1.0)
+
+    # The randomized-QMC replicates are laid out over the budget too
+    results = budget_simulator.combine_partials(partials, start_time, seed)
+    results['precision'] = summary
+    return results
@@ -0,0 +1,316 @@
+"""
+Bounded-memory streaming aggregation of simulation paths.
+
+In streaming mode paths run in chunks. Each chunk is folded into running
+statistics and then discarded, so memory stays proportional to the number of
+rounds plus the sample sizes below, however many paths a run has:
+
+- Welford mean/variance and running min/max of final bankroll and the path
+  metrics (drawdown, time under water, losing streak)
+- per-round running sums for the mean trajectory
+- per-round quantile sketches for the percentile bands
+- reservoir samples for medians and example paths
+
+Reservoirs keep the paths with the smallest pseudo-random keys (see
+random_streams.path_keys), which makes them mergeable across shards and
+independent of how the paths were partitioned.
+"""
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .random_streams import STREAM_BLOCK_PATHS, path_keys
+from .sketches import TrajectorySketch
+from .risk import RiskStatistics
+from .bootstrap import bootstrap_confidence_intervals, BOOTSTRAP_STATISTICS
+
+
+# Paths sampled for the medians of final bankroll and max drawdown
+RESERVOIR_SIZE = 10_000
+
+# Paths whose full results are returned in 'individual_results'
+NUM_EXAMPLE_PATHS = 10
+
+# Upper bound on the number of trajectory cells held per chunk
+CHUNK_CELLS = 8_000_000
+
+
+class RunningStats:
+    """
+    Running count, mean, variance, min and max (Welford / Chan et al.).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray):
+        """Add a batch of values."""
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        batch = RunningStats()
+        batch.count = values.size
+        batch.mean = float(values.mean())
+        batch.m2 = float(np.sum((values - batch.mean) ** 2))
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other: 'RunningStats'):
+        """Combine with the statistics of another set of values."""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Population variance, as computed by np.var."""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation, as computed by np.std."""
+        return float(np.sqrt(self.variance))
+
+
+class KeyedReservoir:
+    """
+    Keep the rows of the paths with the smallest keys.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.columns: Dict[str, np.ndarray] = {}
+
+    def add(self, keys: np.ndarray, **columns: np.ndarray):
+        """
+        Offer rows to the reservoir.
+
+        Args:
+            keys: Key of each row
+            **columns: Arrays whose first dimension matches keys
+        """
+        if not self.columns:
+            self.keys = keys
+            self.columns = dict(columns)
+        else:
+            self.keys = np.concatenate([self.keys, keys])
+            for name, values in columns.items():
+                self.columns[name] = np.concatenate([self.columns[name], values])
+        self._trim()
+
+    def merge(self, other: 'KeyedReservoir'):
+        """Combine with another reservoir of the same capacity."""
+        if other.columns:
+            self.add(other.keys, **other.columns)
+
+    def _trim(self):
+        if len(self.keys) <= self.capacity:
+            return
+        keep = np.argpartition(self.keys, self.capacity)[:self.capacity]
+        self.keys = self.keys[keep]
+        for name in self.columns:
+            self.columns[name] = self.columns[name][keep]
+
+
+class StreamingAggregator:
+    """
+    Fold chunks of paths into bounded-size running statistics.
+    """
+
+    def __init__(self, num_rounds: int, initial_bankroll: float, seed: int,
+                 reservoir_size: int = RESERVOIR_SIZE, num_examples: int = NUM_EXAMPLE_PATHS):
+        """
+        Initialize empty statistics.
+
+        Args:
+            num_rounds: Number of rounds per path
+            initial_bankroll: Initial bankroll, which fixes the sketch bins
+            seed: Run seed the reservoir keys are derived from
+            reservoir_size: Paths sampled for medians
+            num_examples: Example paths kept with their full results
+        """
+        self.seed = seed
+        self.final_bankroll_stats = RunningStats()
+        self.max_drawdown_stats = RunningStats()
+        self.time_under_water_stats = RunningStats()
+        self.losing_streak_stats = RunningStats()
+        self.risk_statistics = RiskStatistics(initial_bankroll, num_rounds)
+        self.num_bankrupt = 0
+        self.trajectory_sum = np.zeros(num_rounds + 1)
+        self.samples = KeyedReservoir(reservoir_size)
+        self.trajectory_sketch = TrajectorySketch.for_bankroll(num_rounds, initial_bankroll)
+        self.examples = KeyedReservoir(num_examples)
+
+    def add_partial(self, partial: Dict[str, Any]):
+        """
+        Fold in the per-path results of a path range.
+
+        Args:
+            partial: Result of Simulator.run_path_range
+        """
+        path_start = partial['path_start']
+        final_bankrolls = partial['final_bankrolls']
+        max_drawdowns = partial['max_drawdowns']
+        trajectories = partial['bankroll_trajectories']
+        keys = path_keys(self.seed, np.arange(path_start, path_start + len(final_bankrolls)))
+
+        self.final_bankroll_stats.update(final_bankrolls)
+        self.max_drawdown_stats.update(max_drawdowns)
+        self.time_under_water_stats.update(partial['time_under_water'])
+        self.losing_streak_stats.update(partial['longest_losing_streaks'])
+        self.risk_statistics.add_partial(partial)
+        self.num_bankrupt += partial['num_bankrupt']
+        self.trajectory_sum += trajectories.sum(axis=0)
+
+        self.samples.add(keys, final_bankrolls=final_bankrolls, max_drawdowns=max_drawdowns)
+        self.trajectory_sketch.add(trajectories)
+
+        if partial['individual_results']:
+            example_paths = np.array(partial['individual_paths'], dtype=np.int64)
+            examples = np.empty(len(example_paths), dtype=object)
+            examples[:] = partial['individual_results']
+            self.examples.add(path_keys(self.seed, example_paths), paths=example_paths, results=examples)
+
+    def merge(self, other: 'StreamingAggregator'):
+        """Combine with the statistics of another set of paths."""
+        self.final_bankroll_stats.merge(other.final_bankroll_stats)
+        self.max_drawdown_stats.merge(other.max_drawdown_stats)
+        self.time_under_water_stats.merge(other.time_under_water_stats)
+        self.losing_streak_stats.merge(other.losing_streak_stats)
+        self.risk_statistics.merge(other.risk_statistics)
+        self.num_bankrupt += other.num_bankrupt
+        self.trajectory_sum += other.trajectory_sum
+        self.samples.merge(other.samples)
+        self.trajectory_sketch.merge(other.trajectory_sketch)
+        self.examples.merge(other.examples)
+
+    def summarize(self, start_time: float, seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Compute the aggregate statistics, in the format of summarize_results.
+
+        Medians, VaR and CVaR are exact while the run fits in the reservoir
+        and estimated from the sampled paths beyond that, as are the bootstrap
+        intervals; percentile bands come from the trajectory sketch.
+
+        Args:
+            start_time: Time the run started (from time.time())
+            seed: Seed the run's random streams were derived from
+
+        Returns:
+            dict: Aggregated simulation results
+        """
+        num_simulations = self.final_bankroll_stats.count
+
+        individual_results = []
+        if self.examples.columns:
+            order = np.argsort(self.examples.columns['paths'])
+            individual_results = list(self.examples.columns['results'][order])
+
+        results = {
+            'num_simulations': num_simulations,
+            'mean_final_bankroll': self.final_bankroll_stats.mean,
+            'median_final_bankroll': float(np.median(self.samples.columns['final_bankrolls'])),
+            'std_final_bankroll': self.final_bankroll_stats.std,
+            'min_final_bankroll': self.final_bankroll_stats.min,
+            'max_final_bankroll': self.final_bankroll_stats.max,
+            'probability_of_ruin': self.num_bankrupt / num_simulations,
+            'mean_max_drawdown': self.max_drawdown_stats.mean,
+            'median_max_drawdown': float(np.median(self.samples.columns['max_drawdowns'])),
+            'max_max_drawdown': self.max_drawdown_stats.max,
+            'mean_time_under_water': self.time_under_water_stats.mean,
+            'mean_longest_losing_streak': self.losing_streak_stats.mean,
+            'max_longest_losing_streak': int(self.losing_streak_stats.max),
+            'risk_metrics': self.risk_statistics.summarize(self.samples.columns['final_bankrolls']),
+            'mean_trajectory': (self.trajectory_sum / num_simulations).tolist(),
+            'percentile_10': self.trajectory_sketch.percentile(10).tolist(),
+            'percentile_90': self.trajectory_sketch.percentile(90).tolist(),
+            'individual_results': individual_results,
+            'elapsed_time': time.time() - start_time,
+            'seed': seed,
+            'trajectory_sketch': self.trajectory_sketch.to_dict(),
+            'aggregation': 'streaming',
+        }
+        results['bootstrap'] = bootstrap_confidence_intervals(
+            {name: results[name] for name in BOOTSTRAP_STATISTICS}, seed,
+            self.samples.columns['final_bankrolls'], self.samples.columns['max_drawdowns'], num_simulations
+        )
+        return results
+
+
+def chunk_paths_for(num_rounds: int) -> int:
+    """
+    Number of paths per streaming chunk, a whole number of stream blocks.
+    """
+    blocks = max(1, CHUNK_CELLS // ((num_rounds + 1) * STREAM_BLOCK_PATHS))
+    return blocks * STREAM_BLOCK_PATHS
+
+
+def run_streaming_paths(simulator, seed: int, path_start: int, path_stop: int,
+                        progress_callback=None) -> Dict[str, Any]:
+    """
+    Run a range of paths chunk by chunk and fold them into running statistics.
+
+    Args:
+        simulator: Simulator to run
+        seed: Run seed the path streams are derived from
+        path_start: First path to run (must start a stream block)
+        path_stop: One past the last path to run
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+    Returns:
+        dict: Partial results holding a StreamingAggregator
+    """
+    aggregator = StreamingAggregator(simulator.config.num_rounds, simulator.config.initial_bankroll, seed)
+    variance_reduction = None
+    if simulator.uses_variance_reduction:
+        variance_reduction = simulator.create_variance_reduction_stats()
+    qmc_stats = simulator.create_qmc_stats() if simulator.config.qmc else None
+    sensitivity_stats = None
+    if simulator.sensitivity_fraction is not None:
+        sensitivity_stats = simulator.create_sensitivity_stats()
+    num_paths = path_stop - path_start
+    chunk_paths = chunk_paths_for(simulator.config.num_rounds)
+
+    for chunk_start in range(path_start, path_stop, chunk_paths):
+        chunk_stop = min(chunk_start + chunk_paths, path_stop)
+
+        # Only the chunk's example candidates need their full results recorded
+        keys = path_keys(seed, np.arange(chunk_start, chunk_stop))
+        record_paths = (chunk_start + np.argsort(keys)[:NUM_EXAMPLE_PATHS]).tolist()
+
+        chunk_callback = None
+        if progress_callback:
+            done = chunk_start - path_start
+            size = chunk_stop - chunk_start
+            chunk_callback = lambda fraction: progress_callback((done + fraction * size) / num_paths)
+
+        partial = simulator.run_path_range(seed, chunk_start, chunk_stop, chunk_callback, record_paths)
+        aggregator.add_partial(partial)
+        if variance_reduction is not None:
+            variance_reduction.add_partial(partial)
+        if qmc_stats is not None:
+            qmc_stats.add_partial(partial)
+        if sensitivity_stats is not None:
+            sensitivity_stats.add_partial(partial)
+
+    partial = {'path_start': path_start, 'aggregator': aggregator}
+    if variance_reduction is not None:
+        partial['variance_reduction'] = variance_reduction
+    if qmc_stats is not None:
+        partial['qmc'] = qmc_stats
+    if sensitivity_stats is not None:
+        partial['sensitivities'] = sensitivity_stats
+    return partial
@@ -0,0 +1,265 @@
+"""
+Exact analytic engine for stationary strategies.
+
+When the bet fraction never changes, every round multiplies the bankroll by
+an i.i.d. factor 1 - f + f * multiplier, so the bankroll after t rounds only
+depends on how often each outcome occurred. The engine propagates the exact
+probability of every outcome count vector round by round, moving mass out
+where the bankroll falls to the ruin threshold (paths stop playing there,
+exactly as in the Monte Carlo engines). This yields the exact distribution of
+the final bankroll and exact per-round mean and percentiles without drawing
+any paths.
+
+Max drawdown depends on the order of outcomes, not just their counts, so the
+drawdown statistics and the example paths come from a small sample of the
+run's paths, the same paths the Monte Carlo engines would draw for the seed.
+"""
+import time
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from .history import ColumnarHistory
+from .metrics import summarize_path_metrics, RUIN_THRESHOLD
+from .risk import risk_metrics
+from .bootstrap import bootstrap_confidence_intervals
+
+
+# Upper bound on grid cells times rounds for the analytic engine to be used
+ANALYTIC_MAX_WORK = 50_000_000
+
+# Paths simulated for the drawdown statistics and the example paths
+DRAWDOWN_SAMPLE_PATHS = 4096
+
+# Percentiles of the final bankroll reported in 'final_bankroll_quantiles'
+FINAL_BANKROLL_PERCENTILES = (1, 5, 10, 25, 50, 75, 90, 95, 99)
+
+
+def stationary_fraction(strategy, initial_bankroll: float) -> float:
+    """
+    Get the constant bet fraction of a stationary strategy.
+    """
+    fraction = strategy.get_bet_fraction(initial_bankroll, 0, ColumnarHistory())
+    return max(0.0, min(1.0, fraction))
+
+
+def round_factors(outcomes, fraction: float) -> Tuple[float, np.ndarray, np.ndarray]:
+    """
+    Group outcomes by the factor they multiply the bankroll by.
+
+    Args:
+        outcomes: Outcome configurations
+        fraction: Constant bet fraction
+
+    Returns:
+        tuple: (probability of a zero factor, distinct positive factors,
+                their probabilities)
+    """
+    total = sum(o.probability for o in outcomes)
+    zero_probability = 0.0
+    grouped: Dict[float, float] = {}
+    for outcome in outcomes:
+        factor = max(0.0, 1.0 - fraction + fraction * outcome.multiplier)
+        if factor == 0.0:
+            zero_probability += outcome.probability / total
+        else:
+            grouped[factor] = grouped.get(factor, 0.0) + outcome.probability / total
+
+    factors = np.array(sorted(grouped), dtype=float)
+    probabilities = np.array([grouped[factor] for factor in factors], dtype=float)
+    if len(factors) == 0:
+        # Every round ruins the path; keep one placeholder factor that never occurs
+        factors = np.ones(1)
+        probabilities = np.zeros(1)
+    return zero_probability, factors, probabilities
+
+
+def analytic_work(config, fraction: float) -> int:
+    """
+    Estimate the work of the analytic engine as grid cells times rounds.
+
+    The grid has one axis of num_rounds + 1 counts per distinct positive
+    factor except the last.
+    """
+    _, factors, _ = round_factors(config.outcomes, fraction)
+    return (config.num_rounds + 1) ** (len(factors) - 1) * config.num_rounds
+
+
+def supports_analytic(config, strategy) -> bool:
+    """
+    Whether the analytic engine can run a strategy on a configuration.
+    """
+    if not strategy.is_stationary():
+        return False
+    fraction = stationary_fraction(strategy, config.initial_bankroll)
+    return analytic_work(config, fraction) <= ANALYTIC_MAX_WORK
+
+
+def weighted_quantiles(values: np.ndarray, weights: np.ndarray, quantiles) -> np.ndarray:
+    """
+    Quantiles of a discrete distribution (smallest value whose CDF reaches q).
+
+    Args:
+        values: Support of the distribution
+        weights: Probability of each value
+        quantiles: Quantiles between 0 and 1
+
+    Returns:
+        np.ndarray: Value for each quantile
+    """
+    order = np.argsort(values, kind='stable')
+    cumulative = np.cumsum(weights[order])
+    targets = np.asarray(quantiles, dtype=float) * cumulative[-1]
+    idx = np.searchsorted(cumulative, targets, side='left')
+    return values[order][np.clip(idx, 0, len(values) - 1)]
+
+
+def run_analytic_simulation(simulator, seed: int, start_time: float,
+                            progress_callback=None) -> Dict[str, Any]:
+    """
+    Compute the results of a stationary strategy exactly.
+
+    Produces the same result dictionary as Simulator.run_multiple_simulations,
+    with the final-bankroll statistics, ruin probability and trajectory bands
+    computed from the exact distribution.
+
+    Args:
+        simulator: Simulator with a stationary strategy
+        seed: Run seed for the sampled drawdowns and example paths
+        start_time: Time the run started (from time.time())
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+    Returns:
+        dict: Aggregated simulation results
+    """
+    config = simulator.config
+    num_rounds = config.num_rounds
+    initial_bankroll = float(config.initial_bankroll)
+    fraction = stationary_fraction(simulator.strategy, initial_bankroll)
+    zero_probability, factors, probabilities = round_factors(config.outcomes, fraction)
+
+    # Count grid: one axis per positive factor except the last, whose count
+    # is the round number minus the others
+    num_axes = len(factors) - 1
+    size = num_rounds + 1
+    grid_shape = (size,) * num_axes or (1,)
+    log_factors = np.log(factors)
+    log_offsets = np.zeros(grid_shape)
+    for axis in range(num_axes):
+        shape = [1] * num_axes
+        shape[axis] = size
+        log_offsets = log_offsets + (np.arange(size) * (log_factors[axis] - log_factors[-1])).reshape(shape)
+
+    mass = np.zeros(grid_shape)
+    mass[(0,) * len(grid_shape)] = 1.0 if initial_bankroll > RUIN_THRESHOLD else 0.0
+
+    # Final bankrolls of paths that stopped before the last round
+    stopped_values = [np.zeros(1)]
+    stopped_weights = [np.array([1.0 - mass.sum()])]
+    if mass.sum() == 0.0:
+        stopped_values[0][0] = initial_bankroll
+
+    mean_trajectory = np.zeros(num_rounds + 1)
+    percentile_10 = np.zeros(num_rounds + 1)
+    percentile_90 = np.zeros(num_rounds + 1)
+    mean_trajectory[0] = percentile_10[0] = percentile_90[0] = initial_bankroll
+
+    values = np.full(mass.shape, initial_bankroll)
+    for round_idx in range(num_rounds):
+        # Only counts up to round_idx + 1 can be reached after this round
+        box = tuple(slice(0, round_idx + 2) for _ in range(num_axes)) or (slice(None),)
+        alive = mass[box]
+        alive_total = alive.sum()
+
+        new_mass = probabilities[-1] * alive
+        for axis in range(num_axes):
+            source = [slice(None)] * num_axes
+            target = [slice(None)] * num_axes
+            source[axis] = slice(0, round_idx + 1)
+            target[axis] = slice(1, round_idx + 2)
+            new_mass[tuple(target)] += probabilities[axis] * alive[tuple(source)]
+
+        # A zero factor ruins the path outright
+        stopped_values.append(np.zeros(1))
+        stopped_weights.append(np.array([zero_probability * alive_total]))
+
+        log_bankroll = np.log(initial_bankroll) + (round_idx + 1) * log_factors[-1] + log_offsets[box]
+        values = np.exp(log_bankroll)
+
+        # Every path that is not playing records 0 in its trajectory
+        flat_values = np.concatenate([[0.0], values.ravel()])
+        flat_weights = np.concatenate([[max(0.0, 1.0 - new_mass.sum())], new_mass.ravel()])
+        mean_trajectory[round_idx + 1] = float(np.dot(new_mass.ravel(), values.ravel()))
+        percentile_10[round_idx + 1], percentile_90[round_idx + 1] = weighted_quantiles(
+            flat_values, flat_weights, [0.1, 0.9]
+        )
+
+        # Paths at or below the threshold stop playing with their current bankroll
+        ruined = (values <= RUIN_THRESHOLD) & (new_mass > 0)
+        if ruined.any():
+            stopped_values.append(values[ruined])
+            stopped_weights.append(new_mass[ruined])
+            new_mass[ruined] = 0.0
+
+        mass[box] = new_mass
+
+        if progress_callback and round_idx % max(1, num_rounds // 100) == 0:
+            progress_callback(round_idx / num_rounds)
+
+    # Paths still playing at the end keep the bankroll of their cell
+    final_values = np.concatenate(stopped_values + [values.ravel()])
+    final_weights = np.concatenate(stopped_weights + [mass.ravel()])
+    if num_rounds == 0:
+        final_values = np.array([initial_bankroll])
+        final_weights = np.array([1.0])
+    final_weights = final_weights / final_weights.sum()
+    support = final_weights > 0
+
+    mean_bankroll = float(np.dot(final_weights, final_values))
+    variance = float(np.dot(final_weights, (final_values - mean_bankroll) ** 2))
+    percentiles = weighted_quantiles(final_values, final_weights, np.array(FINAL_BANKROLL_PERCENTILES) / 100)
+
+    # Path-dependent metrics (drawdowns, streaks, time to ruin) come from sampled paths
+    sample = simulator.run_path_range(seed, 0, min(config.num_simulations, DRAWDOWN_SAMPLE_PATHS))
+    max_drawdowns = sample['max_drawdowns']
+    path_statistics = summarize_path_metrics(
+        max_drawdowns, sample['time_under_water'], sample['longest_losing_streaks']
+    )
+    path_statistics['risk_metrics'] = risk_metrics(
+        config.initial_bankroll, config.num_rounds, sample['final_bankrolls'],
+        sample['rounds_played'], sample['log_return_squares']
+    )
+    # The final-bankroll statistics are exact; only the sampled drawdowns carry sampling noise
+    path_statistics['bootstrap'] = bootstrap_confidence_intervals(
+        {'mean_max_drawdown': path_statistics['mean_max_drawdown']}, seed, max_drawdowns=max_drawdowns
+    )
+    if simulator.sensitivity_fraction is not None:
+        # The derivatives are pathwise, so they come from the sampled paths too
+        sensitivities = simulator.create_sensitivity_stats()
+        sensitivities.add_partial(sample)
+        path_statistics['sensitivities'] = sensitivities.summarize()
+
+    if progress_callback:
+        progress_callback(1.0)
+
+    return {
+        'num_simulations': config.num_simulations,
+        'mean_final_bankroll': mean_bankroll,
+        'median_final_bankroll': float(weighted_quantiles(final_values, final_weights, [0.5])[0]),
+        'std_final_bankroll': float(np.sqrt(variance)),
+        'min_final_bankroll': float(final_values[support].min()),
+        'max_final_bankroll': float(final_values[support].max()),
+        'probability_of_ruin': float(final_weights[final_values <= RUIN_THRESHOLD].sum()),
+        **path_statistics,
+        'mean_trajectory': mean_trajectory.tolist(),
+        'percentile_10': percentile_10.tolist(),
+        'percentile_90': percentile_90.tolist(),
+        'individual_results': sample['individual_results'],
+        'elapsed_time': time.time() - start_time,
+        'seed': seed,
+        'engine': 'analytic',
+        'final_bankroll_quantiles': {
+            str(p): float(v) for p, v in zip(FINAL_BANKROLL_PERCENTILES, percentiles)
+        },
+        'drawdown_sample_paths': len(max_drawdowns),
+    }
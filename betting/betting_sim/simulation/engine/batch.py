@@ -0,0 +1,316 @@
+"""
+Vectorized batch engine that advances every simulation path in lockstep.
+
+Instead of looping over paths and rounds in Python, the batch engine keeps the
+bankroll of every path in a NumPy vector and applies one round to all of them
+at once. Outcomes are drawn in bulk as a matrix of outcome indices, and
+strategies return the bet fractions of all paths from one call to
+BettingStrategy.get_bet_fractions per round. Paths that go bankrupt are
+compacted out of the working arrays (and the strategy states), so runs where
+most paths die early get proportionally faster.
+"""
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from .simulator import SimulationConfig, BettingStrategy, combine_partial_results
+from .random_streams import PathStreams, resolve_seed
+from .history import ColumnarHistory, HISTORY_FIELDS
+from .metrics import PathMetrics, individual_path_metrics, RUIN_THRESHOLD
+from .sensitivity import advance_derivatives
+
+
+# Upper bound on the number of outcome draws held in memory at once
+OUTCOME_BLOCK_SIZE = 1_000_000
+
+# Number of paths whose full history is returned in 'individual_results'
+NUM_INDIVIDUAL_RESULTS = 10
+
+# Finished paths are compacted away once the paths still playing are at most
+# this share of the active set
+COMPACTION_THRESHOLD = 0.9
+
+
+def run_batch_simulations(config: SimulationConfig, strategy: BettingStrategy,
+                          progress_callback=None, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run all simulation paths in lockstep and compute aggregate statistics.
+
+    Produces the same result dictionary as Simulator.run_multiple_simulations.
+
+    Args:
+        config: Simulation configuration
+        strategy: Betting strategy implementing get_bet_fractions
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+        seed: Seed for the random streams (defaults to config.seed, or a fresh seed)
+
+    Returns:
+        dict: Aggregated simulation results
+    """
+    start_time = time.time()
+    seed = resolve_seed(config.seed if seed is None else seed)
+    partial = run_batch_paths(config, strategy, seed, 0, config.num_simulations, progress_callback)
+    return combine_partial_results([partial], start_time, seed)
+
+
+def run_batch_paths(config: SimulationConfig, strategy: BettingStrategy, seed: int,
+                    path_start: int, path_stop: int, progress_callback=None,
+                    record_paths: Optional[Sequence[int]] = None,
+                    control_log_factors: Optional[np.ndarray] = None,
+                    count_outcomes: bool = False,
+                    outcome_indices: Optional[np.ndarray] = None,
+                    record_trajectories: bool = True,
+                    sensitivities: bool = False) -> Dict[str, Any]:
+    """
+    Run one contiguous range of a run's paths in lockstep.
+
+    Args:
+        config: Simulation configuration
+        strategy: Betting strategy implementing get_bet_fractions
+        seed: Run seed the path streams are derived from
+        path_start: First path to run (must start a stream block)
+        path_stop: One past the last path to run
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+        record_paths: Paths whose full results are returned in 'individual_results'
+                      (defaults to the first 10 paths of the range)
+        control_log_factors: Per-outcome log factors whose sum over the rounds
+                             is returned as each path's 'control_values'
+        count_outcomes: Return how often each outcome occurred in the rounds
+                        each path played, as 'outcome_counts'
+        outcome_indices: Pre-drawn outcome indices of shape (num_rounds, num_paths)
+                         to use instead of drawing from the path streams
+        record_trajectories: Keep every path's bankroll after each round in
+                             'bankroll_trajectories' (None otherwise)
+        sensitivities: Return the derivative of each path's final bankroll with
+                       respect to the bet fraction, as 'bankroll_derivatives'
+                       (stationary strategies only, see sensitivity)
+
+    Returns:
+        dict: Partial results in the format of Simulator.run_paths
+    """
+    if not strategy.supports_batch():
+        raise ValueError(f"{type(strategy).__name__} cannot run on the batch engine")
+
+    num_paths = path_stop - path_start
+    num_rounds = config.num_rounds
+    sampler = config.get_sampler()
+    multipliers = sampler.multipliers
+
+    streams = None
+    if outcome_indices is None:
+        streams = PathStreams(
+            seed, path_start, path_stop, config.num_simulations, antithetic=config.antithetic,
+            qmc_dimensions=config.qmc_dimensions()
+        )
+    states = strategy.init_states(num_paths)
+
+    bankrolls = np.full(num_paths, float(config.initial_bankroll))
+    trajectories = None
+    if record_trajectories:
+        trajectories = np.zeros((num_paths, num_rounds + 1))
+        trajectories[:, 0] = bankrolls
+
+    # Peak, drawdown, time under water, losing streaks and log returns of every path
+    metrics = PathMetrics(bankrolls, risk_metrics=True)
+
+    # Per-round columns for the paths reported in 'individual_results'
+    if record_paths is None:
+        record_paths = range(path_start, min(path_start + NUM_INDIVIDUAL_RESULTS, path_stop))
+    record_paths = sorted(record_paths)
+    record_offsets = np.array(record_paths, dtype=np.int64) - path_start
+    num_recorded = len(record_offsets)
+    recorded = {field: np.zeros((num_rounds, num_recorded)) for field in HISTORY_FIELDS}
+    recorded['outcome_idx'] = np.zeros((num_rounds, num_recorded), dtype=np.int64)
+    recorded_active = np.zeros((num_rounds, num_recorded), dtype=bool)
+
+    control_values = np.zeros(num_paths)
+    outcome_counts = np.zeros((num_paths, len(multipliers)), dtype=np.int64) if count_outcomes else None
+
+    rounds_per_block = max(1, OUTCOME_BLOCK_SIZE // max(1, num_paths))
+    uniform_block = None
+
+    # Stationary strategies (Fixed Fraction, Kelly) bet one constant fraction:
+    # compute it once instead of calling the strategy every round
+    fixed_fractions = None
+    if strategy.is_stationary():
+        fixed_fractions = np.clip(strategy.get_bet_fractions(bankrolls, 0, states), 0.0, 1.0)
+    elif sensitivities:
+        raise ValueError(f"Pathwise sensitivities need a stationary strategy ({type(strategy).__name__} is not)")
+
+    # Derivative of each path's bankroll with respect to the bet fraction
+    derivatives = np.zeros(num_paths) if sensitivities else None
+
+    # Active set: the arrays above (except trajectories, control values and
+    # outcome counts) only hold the paths in 'alive', the offsets of the paths
+    # still playing. Finished paths are written to the final arrays once and
+    # compacted away, so they cost nothing in later rounds.
+    alive = np.arange(num_paths)
+    rows = slice(None)
+    final_bankrolls = bankrolls.copy()
+    final_derivatives = np.zeros(num_paths) if sensitivities else None
+    final_metrics = {name: values.copy() for name, values in metrics.arrays().items()}
+    compactable = True
+    record_positions = record_offsets
+    record_alive = np.ones(num_recorded, dtype=bool)
+
+    for round_idx in range(num_rounds):
+        if len(alive) == 0 and control_log_factors is None:
+            break
+
+        # Draw the next block of uniforms for all paths at once (every path's
+        # stream advances, finished or not)
+        all_outcome_idx = None
+        if outcome_indices is not None:
+            all_outcome_idx = outcome_indices[round_idx]
+        else:
+            block_offset = round_idx % rounds_per_block
+            if block_offset == 0:
+                block_rounds = min(rounds_per_block, num_rounds - round_idx)
+                uniform_block = streams.uniforms(block_rounds)
+            round_uniforms = uniform_block[block_offset]
+            if control_log_factors is not None:
+                all_outcome_idx = sampler.indices_from_uniforms(round_uniforms)
+        if control_log_factors is not None:
+            # The control variate sums over every round of every path
+            control_values += control_log_factors[all_outcome_idx]
+
+        # Only the active set needs its outcomes
+        if all_outcome_idx is not None:
+            outcome_idx = all_outcome_idx[rows]
+        else:
+            outcome_idx = sampler.indices_from_uniforms(round_uniforms[rows])
+
+        # Paths at or near zero are finished
+        active = bankrolls > RUIN_THRESHOLD
+        if outcome_counts is not None:
+            outcome_counts[alive[active], outcome_idx[active]] += 1
+
+        if fixed_fractions is None:
+            bet_fractions = np.clip(strategy.get_bet_fractions(bankrolls, round_idx, states), 0.0, 1.0)
+        else:
+            bet_fractions = fixed_fractions
+        bet_amounts = bankrolls * bet_fractions
+        round_multipliers = multipliers[outcome_idx]
+        new_bankrolls = np.maximum(0.0, bankrolls - bet_amounts + bet_amounts * round_multipliers)
+        new_bankrolls = np.where(active, new_bankrolls, bankrolls)
+
+        metrics.update(bankrolls, new_bankrolls, active)
+        if derivatives is not None:
+            derivatives = advance_derivatives(derivatives, bankrolls, round_multipliers, bet_fractions, active)
+
+        if num_recorded and record_alive.any():
+            # Recorded paths that were compacted away keep zeros and count as inactive
+            positions = record_positions[record_alive]
+            recorded['bankroll_before'][round_idx, record_alive] = bankrolls[positions]
+            recorded['bet_amount'][round_idx, record_alive] = bet_amounts[positions]
+            recorded['bet_fraction'][round_idx, record_alive] = bet_fractions[positions]
+            recorded['outcome_idx'][round_idx, record_alive] = outcome_idx[positions]
+            recorded['multiplier'][round_idx, record_alive] = round_multipliers[positions]
+            recorded['bankroll'][round_idx, record_alive] = new_bankrolls[positions]
+            recorded_active[round_idx, record_alive] = active[positions]
+
+        # Finished paths are padded with zeros
+        if trajectories is not None:
+            trajectories[rows, round_idx + 1] = np.where(active, new_bankrolls, 0.0)
+        bankrolls = new_bankrolls
+        if fixed_fractions is None:
+            states = strategy.on_round_results(states, outcome_idx, round_multipliers, bankrolls)
+
+        # Compact once enough of the active set has finished
+        playing = bankrolls > RUIN_THRESHOLD
+        num_playing = int(np.count_nonzero(playing))
+        if compactable and num_playing <= COMPACTION_THRESHOLD * len(alive):
+            if fixed_fractions is None:
+                try:
+                    states = strategy.compact_states(states, playing)
+                except NotImplementedError:
+                    # States the strategy cannot subset: keep running every path
+                    compactable = False
+            if compactable:
+                finished = alive[~playing]
+                final_bankrolls[finished] = bankrolls[~playing]
+                for name, values in metrics.arrays().items():
+                    final_metrics[name][finished] = values[~playing]
+                if derivatives is not None:
+                    final_derivatives[finished] = derivatives[~playing]
+                    derivatives = derivatives[playing]
+
+                alive = alive[playing]
+                rows = alive
+                bankrolls = bankrolls[playing]
+                metrics.compact(playing)
+                if fixed_fractions is not None:
+                    fixed_fractions = fixed_fractions[playing]
+
+                # Position of each recorded path in the active set
+                record_positions = np.minimum(np.searchsorted(alive, record_offsets), max(len(alive) - 1, 0))
+                record_alive = np.zeros(num_recorded, dtype=bool)
+                if len(alive):
+                    record_alive = alive[record_positions] == record_offsets
+
+        if progress_callback and round_idx % max(1, num_rounds // 100) == 0:
+            progress_callback(round_idx / num_rounds)
+
+    # Paths still in the active set finish with the run
+    final_bankrolls[alive] = bankrolls
+    for name, values in metrics.arrays().items():
+        final_metrics[name][alive] = values
+    if derivatives is not None:
+        final_derivatives[alive] = derivatives
+    bankrolls = final_bankrolls
+
+    individual_results = [
+        _build_individual_result(
+            config, column, bankrolls[offset], individual_path_metrics(final_metrics, offset),
+            recorded, recorded_active
+        )
+        for column, offset in enumerate(record_offsets)
+    ]
+
+    partial = {
+        'path_start': path_start,
+        'final_bankrolls': bankrolls,
+        'bankroll_trajectories': trajectories,
+        'num_bankrupt': int(np.count_nonzero(bankrolls <= RUIN_THRESHOLD)),
+        'max_drawdowns': final_metrics['max_drawdowns'],
+        'time_under_water': final_metrics['time_under_water'],
+        'longest_losing_streaks': final_metrics['longest_losing_streaks'],
+        'rounds_played': final_metrics['rounds_played'],
+        'log_return_squares': final_metrics['log_return_squares'],
+        'individual_results': individual_results,
+        'individual_paths': record_paths,
+    }
+    if control_log_factors is not None:
+        partial['control_values'] = control_values
+    if outcome_counts is not None:
+        partial['outcome_counts'] = outcome_counts
+    if final_derivatives is not None:
+        partial['bankroll_derivatives'] = final_derivatives
+    return partial
+
+
+def _build_individual_result(config: SimulationConfig, column: int, final_bankroll: float,
+                             path_metrics: Dict[str, Any], recorded: Dict[str, np.ndarray],
+                             recorded_active: np.ndarray) -> Dict[str, Any]:
+    """
+    Convert one recorded column into a run_single_simulation result.
+    """
+    num_played = int(np.count_nonzero(recorded_active[:, column]))
+    # Finished paths are padded with zeros, as in the trajectories
+    trajectory = np.concatenate([
+        [float(config.initial_bankroll)],
+        np.where(recorded_active[:, column], recorded['bankroll'][:, column], 0.0)
+    ])
+    history = ColumnarHistory.from_arrays(
+        length=num_played, **{field: recorded[field][:num_played, column] for field in HISTORY_FIELDS}
+    )
+
+    return {
+        'initial_bankroll': config.initial_bankroll,
+        'final_bankroll': float(final_bankroll),
+        'bankrupt': bool(final_bankroll <= RUIN_THRESHOLD),
+        'history': history.to_list(),
+        'bankroll_over_time': trajectory.tolist(),
+        **path_metrics,
+    }
@@ -0,0 +1,138 @@
+"""
+Bootstrap confidence intervals of the summary statistics of a run.
+
+The per-path results are resampled with replacement as a matrix of indices,
+one row per resample, so every statistic of every resample comes out of a few
+vectorized reductions over the rows. Rows are drawn a chunk at a time to
+bound memory.
+
+The cost grows with the number of resamples times the number of paths, so
+both are bounded. Runs with more than BOOTSTRAP_MAX_PATHS paths are
+bootstrapped on a uniform sample of that many paths, and the spread of the
+resampled statistics is scaled down by sqrt(sample / paths), as the standard
+error of these statistics falls with the square root of the number of paths.
+The same applies to streaming runs, whose reservoir sample stands in for the
+paths. Intervals are percentile intervals, centred on the reported estimate.
+"""
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .metrics import RUIN_THRESHOLD, METRICS_CHUNK_CELLS
+
+
+# Number of bootstrap resamples
+BOOTSTRAP_RESAMPLES = 1000
+
+# Largest number of paths resampled; larger runs are bootstrapped on a sample
+BOOTSTRAP_MAX_PATHS = 5000
+
+# Confidence level of the intervals
+BOOTSTRAP_CONFIDENCE = 0.95
+
+# Statistics with a bootstrap interval, in display order
+BOOTSTRAP_STATISTICS = (
+    'mean_final_bankroll', 'median_final_bankroll', 'probability_of_ruin', 'mean_max_drawdown'
+)
+
+# Mixed into the run seed so the resamples do not reuse the path streams
+BOOTSTRAP_STREAM = 0xB007
+
+
+def resample_statistics(final_bankrolls: Optional[np.ndarray], max_drawdowns: Optional[np.ndarray],
+                        names) -> Dict[str, np.ndarray]:
+    """
+    Compute statistics over the last axis of the per-path arrays.
+
+    Works on a single sample (one value per statistic) and on a matrix of
+    resamples (one value per row) alike.
+
+    Args:
+        final_bankrolls: Final bankroll of each path (needed by the final-bankroll statistics)
+        max_drawdowns: Max drawdown of each path (needed by 'mean_max_drawdown')
+        names: Statistics of BOOTSTRAP_STATISTICS to compute
+
+    Returns:
+        dict: Value(s) of each statistic
+    """
+    values = {}
+    if 'mean_final_bankroll' in names:
+        values['mean_final_bankroll'] = final_bankrolls.mean(axis=-1)
+    if 'median_final_bankroll' in names:
+        values['median_final_bankroll'] = np.median(final_bankrolls, axis=-1)
+    if 'probability_of_ruin' in names:
+        values['probability_of_ruin'] = np.count_nonzero(final_bankrolls <= RUIN_THRESHOLD, axis=-1) \
+            / final_bankrolls.shape[-1]
+    if 'mean_max_drawdown' in names:
+        values['mean_max_drawdown'] = max_drawdowns.mean(axis=-1)
+    return values
+
+
+def bootstrap_confidence_intervals(estimates: Dict[str, float], seed: Optional[int],
+                                   final_bankrolls: Optional[np.ndarray] = None,
+                                   max_drawdowns: Optional[np.ndarray] = None,
+                                   num_paths: Optional[int] = None,
+                                   num_resamples: int = BOOTSTRAP_RESAMPLES,
+                                   confidence: float = BOOTSTRAP_CONFIDENCE,
+                                   max_paths: int = BOOTSTRAP_MAX_PATHS,
+                                   chunk_cells: int = METRICS_CHUNK_CELLS) -> Dict[str, Any]:
+    """
+    Bootstrap confidence intervals of summary statistics.
+
+    Args:
+        estimates: Reported value of each statistic to bound, keyed by a name
+                   of BOOTSTRAP_STATISTICS
+        seed: Run seed the resamples are derived from
+        final_bankrolls: Final bankroll of every path, or of a uniform sample of them
+        max_drawdowns: Max drawdown of the same paths
+        num_paths: Number of paths the estimates come from (the length of
+                   the arrays if None)
+        num_resamples: Number of bootstrap resamples
+        confidence: Confidence level of the intervals
+        max_paths: Largest number of paths resampled
+        chunk_cells: Upper bound on the number of resampled values drawn at once
+
+    Returns:
+        dict: The confidence level, the number of resamples and of resampled
+              paths, and the estimate, lower and upper bound of each statistic
+    """
+    names = [name for name in BOOTSTRAP_STATISTICS if name in estimates]
+    arrays = [final_bankrolls, max_drawdowns]
+    sample_size = len(next(values for values in arrays if values is not None))
+    num_paths = num_paths or sample_size
+
+    generator = np.random.Generator(np.random.PCG64(np.random.SeedSequence([seed or 0, BOOTSTRAP_STREAM])))
+    if sample_size > max_paths:
+        sample = np.sort(generator.choice(sample_size, max_paths, replace=False))
+        arrays = [None if values is None else values[sample] for values in arrays]
+        sample_size = max_paths
+    sample_values = resample_statistics(*arrays, names)
+
+    replicates = {name: np.empty(num_resamples) for name in names}
+    chunk_rows = max(1, chunk_cells // sample_size)
+    for start in range(0, num_resamples, chunk_rows):
+        rows = slice(start, min(start + chunk_rows, num_resamples))
+        indices = generator.integers(0, sample_size, size=(rows.stop - rows.start, sample_size), dtype=np.int32)
+        resampled = resample_statistics(*[None if values is None else values[indices] for values in arrays], names)
+        for name in names:
+            replicates[name][rows] = resampled[name]
+
+    # Percentile interval of the sample, moved onto the estimate and scaled to the run size
+    scale = math.sqrt(sample_size / num_paths) if num_paths > sample_size else 1.0
+    tail = (1 - confidence) / 2
+    intervals = {}
+    for name in names:
+        lower, upper = np.quantile(replicates[name], [tail, 1 - tail]) - sample_values[name]
+        estimate = float(estimates[name])
+        lower, upper = estimate + scale * lower, estimate + scale * upper
+        if name == 'probability_of_ruin':
+            lower, upper = max(lower, 0.0), min(upper, 1.0)
+        intervals[name] = {'estimate': estimate, 'lower': float(lower), 'upper': float(upper)}
+
+    return {
+        'confidence': confidence,
+        'num_resamples': num_resamples,
+        'sample_paths': sample_size,
+        'intervals': intervals,
+    }
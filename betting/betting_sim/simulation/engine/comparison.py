@@ -0,0 +1,174 @@
+"""
+Common-random-numbers comparison of several strategies.
+
+Running strategies as separate simulations gives each one independent random
+outcomes, so the difference between their results carries the noise of both
+runs. Here every strategy plays the same paths: the outcome matrix of each
+chunk of paths is drawn once from the run's path streams and every strategy
+is driven off it. The per-path differences between two strategies then only
+vary with how the strategies react to the same luck, and their paired
+standard errors are typically far smaller than those of two independent runs.
+
+Each strategy's own results are the ones a standalone run with the same seed
+would produce.
+"""
+import time
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .simulator import Simulator, SimulationConfig, BettingStrategy, combine_partial_results
+from .random_streams import PathStreams, resolve_seed
+from .aggregation import chunk_paths_for
+from .sketches import TrajectorySketch
+from .metrics import RUIN_THRESHOLD
+
+
+# Per-path quantities compared between strategies
+COMPARED_METRICS = ('final_bankroll', 'ruined', 'max_drawdown')
+
+
+def paired_difference(values_a: np.ndarray, values_b: np.ndarray, z: float) -> Dict[str, Any]:
+    """
+    Statistics of the per-path differences between two strategies.
+
+    Args:
+        values_a: Per-path values of the first strategy
+        values_b: Per-path values of the second strategy, on the same paths
+        z: Two-sided normal quantile of the confidence level
+
+    Returns:
+        dict: Mean difference with its paired standard error and confidence
+              interval, the standard error two independent runs would have,
+              the variance-reduction factor between the two and the share of
+              paths where the first strategy is ahead
+    """
+    count = len(values_a)
+    differences = values_a - values_b
+    mean_difference = float(differences.mean()) if count else 0.0
+    standard_error = 0.0
+    independent_standard_error = 0.0
+    if count > 1:
+        standard_error = float(np.std(differences, ddof=1) / np.sqrt(count))
+        independent_standard_error = float(
+            np.sqrt((np.var(values_a, ddof=1) + np.var(values_b, ddof=1)) / count)
+        )
+
+    if standard_error > 0:
+        factor = (independent_standard_error / standard_error) ** 2
+    else:
+        factor = 1.0 if independent_standard_error == 0 else float('inf')
+
+    return {
+        'mean_difference': mean_difference,
+        'standard_error': standard_error,
+        'ci': [mean_difference - z * standard_error, mean_difference + z * standard_error],
+        'independent_standard_error': independent_standard_error,
+        'variance_reduction_factor': float(factor),
+        'fraction_ahead': float(np.mean(differences > 0)) if count else 0.0,
+    }
+
+
+def compare_strategies(config: SimulationConfig, strategies: Sequence[BettingStrategy],
+                       names: Optional[Sequence[str]] = None, confidence: float = 0.95,
+                       engine: str = 'auto', progress_callback=None) -> Dict[str, Any]:
+    """
+    Run several strategies on the same outcome paths and compare them pairwise.
+
+    Args:
+        config: Simulation configuration shared by every strategy
+        strategies: Strategies to compare
+        names: Display name of each strategy (defaults to the class names,
+               numbered if they repeat)
+        confidence: Confidence level of the paired-difference intervals
+        engine: 'batch', 'scalar' or 'auto', as for Simulator ('analytic'
+                is not available since every strategy plays the same paths)
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+    Returns:
+        dict: 'results' with every strategy's aggregated results by name and
+              'paired_differences' with one entry per pair of strategies and
+              compared metric
+    """
+    if len(strategies) < 2:
+        raise ValueError("A comparison needs at least two strategies")
+    if engine == 'analytic':
+        raise ValueError("The analytic engine cannot drive strategies off shared outcome paths")
+    if not 0 < confidence < 1:
+        raise ValueError(f"confidence must be between 0 and 1 (got {confidence})")
+    names = list(names) if names is not None else _default_names(strategies)
+    if len(names) != len(strategies) or len(set(names)) != len(names):
+        raise ValueError("Every strategy needs a distinct name")
+
+    start_time = time.time()
+    seed = resolve_seed(config.seed)
+    simulators = [Simulator(config, strategy, engine=engine) for strategy in strategies]
+    sampler = config.get_sampler()
+
+    num_paths = config.num_simulations
+    chunk_paths = chunk_paths_for(config.num_rounds)
+    partials: List[List[Dict[str, Any]]] = [[] for _ in strategies]
+
+    for chunk_start in range(0, num_paths, chunk_paths):
+        chunk_stop = min(chunk_start + chunk_paths, num_paths)
+
+        # One outcome matrix for the chunk, shared by every strategy
+        streams = PathStreams(
+            seed, chunk_start, chunk_stop, num_paths, antithetic=config.antithetic,
+            qmc_dimensions=config.qmc_dimensions()
+        )
+        outcome_indices = sampler.indices_from_uniforms(streams.uniforms(config.num_rounds))
+
+        for i, simulator in enumerate(simulators):
+            partial = simulator.run_path_range(seed, chunk_start, chunk_stop, outcome_indices=outcome_indices)
+            partial['trajectory_sketch'] = TrajectorySketch.for_bankroll(
+                config.num_rounds, config.initial_bankroll
+            )
+            partial['trajectory_sketch'].add(partial['bankroll_trajectories'])
+            partials[i].append(partial)
+            if progress_callback:
+                done = chunk_start + (i + 1) / len(simulators) * (chunk_stop - chunk_start)
+                progress_callback(done / num_paths)
+
+    results = {}
+    per_path = {}
+    for name, strategy_partials in zip(names, partials):
+        final_bankrolls = np.concatenate([p['final_bankrolls'] for p in strategy_partials])
+        per_path[name] = {
+            'final_bankroll': final_bankrolls,
+            'ruined': (final_bankrolls <= RUIN_THRESHOLD).astype(float),
+            'max_drawdown': np.concatenate([p['max_drawdowns'] for p in strategy_partials]),
+        }
+        results[name] = combine_partial_results(strategy_partials, start_time, seed)
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    paired_differences = []
+    for i, name_a in enumerate(names):
+        for name_b in names[i + 1:]:
+            for metric in COMPARED_METRICS:
+                difference = paired_difference(per_path[name_a][metric], per_path[name_b][metric], z)
+                paired_differences.append({'strategy_a': name_a, 'strategy_b': name_b, 'metric': metric,
+                                           **difference})
+
+    if progress_callback:
+        progress_callback(1.0)
+
+    return {
+        'strategies': names,
+        'num_simulations': num_paths,
+        'seed': seed,
+        'confidence': confidence,
+        'results': results,
+        'paired_differences': paired_differences,
+        'elapsed_time': time.time() - start_time,
+    }
+
+
+def _default_names(strategies: Sequence[BettingStrategy]) -> List[str]:
+    """Name strategies by class, numbering repeated classes."""
+    class_names = [type(strategy).__name__ for strategy in strategies]
+    return [
+        f"{name} {class_names[:i + 1].count(name)}" if class_names.count(name) > 1 else name
+        for i, name in enumerate(class_names)
+    ]
@@ -0,0 +1,471 @@
+"""
+Multi-dimensional common-random-numbers grid sweeps.
+
+A grid sweep runs every combination of the values of up to three axes, each
+varying one configuration or strategy parameter: the bet fraction, the
+initial bankroll, the number of rounds, the probability or multiplier of one
+outcome, or the base and maximum fraction of Martingale.
+
+Every point plays the same uniforms: each chunk of paths draws its uniforms
+once from the run's path streams, and every point maps them to outcome
+indices through the CDF of its own outcome probabilities, so neighbouring
+points along a probability axis differ only where the changed CDF moves an
+outcome boundary. Points with fewer rounds play a prefix of the same rounds.
+With fewer than eight outcomes this is the sampler a standalone run uses, so
+each point reproduces the standalone run with the same seed.
+
+Points whose strategy supports the batch engine are stacked into one batch of
+points x paths: every round looks up each path's outcome and multiplier in
+the table of its point and advances all of them with one vectorized update.
+Paths stop playing once ruined or once their point's number of rounds is
+reached. Groups of points run concurrently on a thread or process pool.
+
+Results are heatmap-ready arrays with one axis per grid axis, stored as
+compressed float32 buffers instead of one dictionary per point.
+"""
+import base64
+import dataclasses
+import itertools
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .simulator import Simulator, SimulationConfig, BettingStrategy
+from .random_streams import PathStreams, resolve_seed, path_keys, STREAM_BLOCK_PATHS
+from .aggregation import KeyedReservoir
+from .sweep import StackedStrategy, _point_groups
+from .metrics import PARTIAL_METRICS, PathMetrics, RUIN_THRESHOLD
+
+
+# Parameters a grid axis can vary
+GRID_PARAMETERS = (
+    'bet_fraction', 'initial_bankroll', 'num_rounds', 'outcome_probability', 'outcome_multiplier',
+    'martingale_base_fraction', 'martingale_max_fraction',
+)
+
+# Parameters of one outcome, selected by the axis' outcome_index
+OUTCOME_PARAMETERS = ('outcome_probability', 'outcome_multiplier')
+
+# Maximum number of grid axes
+MAX_GRID_DIMENSIONS = 3
+
+# Statistics reported for every point, as in sweep.PointStatistics
+GRID_METRICS = (
+    'mean_final_bankroll', 'median_final_bankroll', 'std_final_bankroll',
+    'probability_of_ruin', 'mean_max_drawdown', 'mean_time_under_water', 'mean_longest_losing_streak',
+)
+
+# Number of point x path cells advanced together, small enough that the
+# per-round arrays stay in cache
+GRID_CHUNK_CELLS = 1 << 16
+
+# Upper bound on the final bankrolls kept for the medians of a group of points
+# (16 MB of float32); larger grids take their medians from a sample of paths
+GRID_MEDIAN_CELLS = 4_000_000
+
+
+@dataclass
+class GridAxis:
+    """One axis of a grid sweep."""
+    parameter: str
+    values: Sequence[float]
+    outcome_index: Optional[int] = None
+
+    def __post_init__(self):
+        if self.parameter not in GRID_PARAMETERS:
+            raise ValueError(
+                f"Unknown grid parameter '{self.parameter}' (expected one of {', '.join(GRID_PARAMETERS)})"
+            )
+        if self.parameter in OUTCOME_PARAMETERS and self.outcome_index is None:
+            raise ValueError(f"A '{self.parameter}' axis needs an outcome_index")
+        self.values = [float(value) for value in self.values]
+        if not self.values:
+            raise ValueError(f"The '{self.parameter}' axis has no values")
+        if self.parameter == 'num_rounds':
+            self.values = [float(max(1, round(value))) for value in self.values]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to a JSON-compatible dictionary."""
+        return {'parameter': self.parameter, 'values': list(self.values), 'outcome_index': self.outcome_index}
+
+
+def encode_grid_array(values: np.ndarray) -> Dict[str, Any]:
+    """
+    Serialize an array to a JSON-compatible dictionary with compressed float32 values.
+    """
+    data = np.ascontiguousarray(values, dtype='<f4')
+    return {
+        'shape': list(data.shape),
+        'data': base64.b64encode(zlib.compress(data.tobytes())).decode('ascii'),
+    }
+
+
+def decode_grid_array(data: Dict[str, Any]) -> np.ndarray:
+    """
+    Rebuild an array serialized with encode_grid_array.
+    """
+    raw = zlib.decompress(base64.b64decode(data['data']))
+    return np.frombuffer(raw, dtype='<f4').astype(float).reshape(data['shape'])
+
+
+def point_config(config: SimulationConfig, axes: Sequence[GridAxis], values: Sequence[float]) -> SimulationConfig:
+    """
+    Configuration of one grid point.
+
+    Setting an outcome's probability rescales the other outcomes so the
+    probabilities still sum to 1, keeping their ratios.
+
+    Args:
+        config: Base configuration
+        axes: Grid axes
+        values: Value of each axis at the point
+
+    Returns:
+        SimulationConfig: The base configuration with the point's configuration
+                          parameters (the base object when there are none)
+    """
+    changes: Dict[str, Any] = {}
+    outcomes = list(config.outcomes)
+    for axis, value in zip(axes, values):
+        if axis.parameter == 'initial_bankroll':
+            changes['initial_bankroll'] = value
+        elif axis.parameter == 'num_rounds':
+            changes['num_rounds'] = int(value)
+        elif axis.parameter == 'outcome_multiplier':
+            outcomes[axis.outcome_index] = dataclasses.replace(outcomes[axis.outcome_index], multiplier=value)
+        elif axis.parameter == 'outcome_probability':
+            if not 0 <= value <= 1:
+                raise ValueError(f"Outcome probabilities must be between 0 and 1 (got {value})")
+            rest = sum(o.probability for i, o in enumerate(outcomes) if i != axis.outcome_index)
+            if rest <= 0 and value < 1:
+                raise ValueError("The other outcomes have no probability to rescale")
+            scale = (1.0 - value) / rest if rest > 0 else 0.0
+            outcomes = [
+                dataclasses.replace(o, probability=value if i == axis.outcome_index else o.probability * scale)
+                for i, o in enumerate(outcomes)
+            ]
+    if outcomes != list(config.outcomes):
+        changes['outcomes'] = outcomes
+    return dataclasses.replace(config, **changes) if changes else config
+
+
+class GridStatistics:
+    """
+    Per-point statistics of a group of grid points, merged chunk by chunk.
+
+    Means and variances are merged exactly (Chan et al.). Medians come from a
+    reservoir of the paths with the smallest keys, the same paths for every
+    point, holding at most GRID_MEDIAN_CELLS float32 final bankrolls: they are
+    exact while every path fits and sampled beyond that, as in streaming runs.
+    """
+
+    def __init__(self, num_points: int, seed: int, median_cells: int = GRID_MEDIAN_CELLS):
+        """
+        Initialize empty statistics.
+
+        Args:
+            num_points: Number of grid points
+            seed: Run seed the path keys of the median sample are derived from
+            median_cells: Upper bound on the final bankrolls kept for the medians
+        """
+        self.seed = seed
+        self.count = 0
+        self.mean = np.zeros(num_points)
+        self.m2 = np.zeros(num_points)
+        self.num_ruined = np.zeros(num_points, dtype=np.int64)
+        self.drawdown_sum = np.zeros(num_points)
+        self.time_under_water_sum = np.zeros(num_points)
+        self.losing_streak_sum = np.zeros(num_points)
+        self.samples = KeyedReservoir(max(STREAM_BLOCK_PATHS, median_cells // max(1, num_points)))
+
+    def add(self, path_start: int, final_bankrolls: np.ndarray, path_metrics: Dict[str, np.ndarray]):
+        """
+        Add a chunk of paths.
+
+        Args:
+            path_start: Index of the chunk's first path
+            final_bankrolls: Final bankrolls of shape (num_points, chunk_paths)
+            path_metrics: Max drawdowns, time under water and longest losing
+                          streaks of the same shape, keyed as in metrics.PARTIAL_METRICS
+        """
+        width = final_bankrolls.shape[1]
+        if width == 0:
+            return
+        chunk_mean = final_bankrolls.mean(axis=1)
+        chunk_m2 = ((final_bankrolls - chunk_mean[:, None]) ** 2).sum(axis=1)
+        count = self.count + width
+        delta = chunk_mean - self.mean
+        self.mean = self.mean + delta * width / count
+        self.m2 = self.m2 + chunk_m2 + delta ** 2 * self.count * width / count
+        keys = path_keys(self.seed, np.arange(path_start, path_start + width))
+        self.samples.add(keys, final_bankrolls=final_bankrolls.T.astype(np.float32))
+        self.count = count
+        self.num_ruined += np.count_nonzero(final_bankrolls <= RUIN_THRESHOLD, axis=1)
+        self.drawdown_sum += path_metrics['max_drawdowns'].sum(axis=1)
+        self.time_under_water_sum += path_metrics['time_under_water'].sum(axis=1)
+        self.losing_streak_sum += path_metrics['longest_losing_streaks'].sum(axis=1)
+
+    def summarize(self) -> Dict[str, np.ndarray]:
+        """
+        Compute the statistics of GRID_METRICS for every point.
+
+        Returns:
+            dict: One array per metric, indexed by point
+        """
+        count = max(self.count, 1)
+        return {
+            'mean_final_bankroll': self.mean,
+            'median_final_bankroll': np.median(self.samples.columns['final_bankrolls'], axis=0).astype(float),
+            'std_final_bankroll': np.sqrt(self.m2 / count),
+            'probability_of_ruin': self.num_ruined / count,
+            'mean_max_drawdown': self.drawdown_sum / count,
+            'mean_time_under_water': self.time_under_water_sum / count,
+            'mean_longest_losing_streak': self.losing_streak_sum / count,
+        }
+
+
+def grid_chunk_paths(num_points: int) -> int:
+    """
+    Number of paths per chunk, a whole number of stream blocks.
+    """
+    blocks = max(1, GRID_CHUNK_CELLS // (STREAM_BLOCK_PATHS * max(1, num_points)))
+    return blocks * STREAM_BLOCK_PATHS
+
+
+def run_grid_batch(configs: Sequence[SimulationConfig], strategy: StackedStrategy,
+                   uniforms: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Advance stacked grid points over a chunk of paths in lockstep.
+
+    Ruin and the path metrics follow the rules of run_batch_paths.
+
+    Args:
+        configs: Configuration of each point; they must have the same number of outcomes
+        strategy: Strategies of the points, stacked in the same order
+        uniforms: Shared uniforms of shape (max_rounds, chunk_paths)
+
+    Returns:
+        tuple: Final bankrolls and the path metrics (keyed as in
+               metrics.PATH_METRICS), of shape (num_points, chunk_paths)
+    """
+    num_points = len(configs)
+    width = uniforms.shape[1]
+    num_cells = num_points * width
+    num_outcomes = len(configs[0].outcomes)
+
+    samplers = [config.get_sampler() for config in configs]
+    multipliers = np.concatenate([sampler.multipliers for sampler in samplers])
+    cdf = np.array([np.cumsum(sampler.probabilities) for sampler in samplers])
+    # Each path's outcome index is the number of CDF boundaries at or below its uniform
+    boundaries = [np.repeat(cdf[:, k], width) for k in range(num_outcomes - 1)]
+    table_offsets = np.repeat(np.arange(num_points) * num_outcomes, width)
+    shared_boundaries = bool(np.all(cdf == cdf[0]))
+
+    horizons = np.array([config.num_rounds for config in configs])
+    path_horizons = np.repeat(horizons, width) if np.any(horizons != horizons.max()) else None
+    num_rounds = int(horizons.max())
+
+    bankrolls = np.repeat([float(config.initial_bankroll) for config in configs], width)
+    metrics = PathMetrics(bankrolls)
+
+    states = strategy.init_states(num_cells)
+    # Stationary strategies bet the same fraction every round
+    stationary = all(point.is_stationary() for point in strategy.strategies)
+    fixed_fractions = None
+    if stationary:
+        fixed_fractions = np.clip(strategy.get_bet_fractions(bankrolls, 0, states), 0.0, 1.0)
+
+    for round_idx in range(num_rounds):
+        if shared_boundaries:
+            local_idx = np.searchsorted(cdf[0], uniforms[round_idx], side='right')
+            outcome_idx = np.tile(np.minimum(local_idx, num_outcomes - 1), num_points)
+            round_multipliers = multipliers[table_offsets + outcome_idx]
+        else:
+            round_uniforms = np.tile(uniforms[round_idx], num_points)
+            table_idx = table_offsets.copy()
+            for column in boundaries:
+                table_idx += round_uniforms >= column
+            round_multipliers = multipliers[table_idx]
+            outcome_idx = None if stationary else table_idx - table_offsets
+
+        # Paths at or near zero, and paths past their point's rounds, are finished
+        active = bankrolls > RUIN_THRESHOLD
+        if path_horizons is not None:
+            active &= round_idx < path_horizons
+
+        if fixed_fractions is None:
+            bet_fractions = np.clip(strategy.get_bet_fractions(bankrolls, round_idx, states), 0.0, 1.0)
+        else:
+            bet_fractions = fixed_fractions
+        bet_amounts = bankrolls * bet_fractions
+        new_bankrolls = bankrolls - bet_amounts
+        new_bankrolls += bet_amounts * round_multipliers
+        np.maximum(new_bankrolls, 0.0, out=new_bankrolls)
+        new_bankrolls = np.where(active, new_bankrolls, bankrolls)
+        metrics.update(bankrolls, new_bankrolls, active)
+        bankrolls = new_bankrolls
+
+        if not stationary:
+            states = strategy.on_round_results(states, outcome_idx, round_multipliers, bankrolls)
+
+    return bankrolls.reshape(num_points, width), {
+        name: values.reshape(num_points, width) for name, values in metrics.arrays().items()
+    }
+
+
+def run_grid_points(configs: Sequence[SimulationConfig], strategies: Sequence[BettingStrategy],
+                    seed: int, engine: str = 'auto', progress_callback=None) -> Dict[str, np.ndarray]:
+    """
+    Run grid points on common random numbers in the calling thread.
+
+    Args:
+        configs: Configuration of each point; they must agree on the number of
+                 paths and outcomes and on antithetic sampling
+        strategies: Strategy of each point
+        seed: Run seed the path streams are derived from
+        engine: 'batch', 'scalar' or 'auto', as for Simulator
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+    Returns:
+        dict: One array per metric of GRID_METRICS, indexed by point
+    """
+    base_config = configs[0]
+    num_paths = base_config.num_simulations
+    max_rounds = max(config.num_rounds for config in configs)
+
+    batch = [i for i, strategy in enumerate(strategies) if engine != 'scalar' and strategy.supports_batch()]
+    scalar = sorted(set(range(len(strategies))) - set(batch))
+    simulators = {i: Simulator(configs[i], strategies[i], engine='scalar') for i in scalar}
+
+    # Batch points run in stacks of at most GRID_CHUNK_CELLS cells per round
+    chunk_paths = grid_chunk_paths(len(batch))
+    stack_size = max(1, GRID_CHUNK_CELLS // chunk_paths)
+    stacks = []
+    for start in range(0, len(batch), stack_size):
+        points = batch[start:start + stack_size]
+        stacks.append((points, [configs[i] for i in points], StackedStrategy([strategies[i] for i in points])))
+
+    statistics = GridStatistics(len(strategies), seed)
+    for chunk_start in range(0, num_paths, chunk_paths):
+        chunk_stop = min(chunk_start + chunk_paths, num_paths)
+        width = chunk_stop - chunk_start
+
+        # One set of uniforms for the chunk, shared by every point
+        streams = PathStreams(
+            seed, chunk_start, chunk_stop, num_paths, antithetic=base_config.antithetic,
+            qmc_dimensions=max_rounds if base_config.qmc else None
+        )
+        uniforms = streams.uniforms(max_rounds)
+
+        final_bankrolls = np.empty((len(strategies), width))
+        path_metrics = {name: np.empty((len(strategies), width)) for name in PARTIAL_METRICS}
+        for points, stack_configs, stacked in stacks:
+            final_bankrolls[points], stack_metrics = run_grid_batch(stack_configs, stacked, uniforms)
+            for name in PARTIAL_METRICS:
+                path_metrics[name][points] = stack_metrics[name]
+        for i in scalar:
+            config = configs[i]
+            outcome_indices = config.get_sampler().indices_from_uniforms(uniforms[:config.num_rounds])
+            partial = simulators[i].run_path_range(
+                seed, chunk_start, chunk_stop, record_paths=[], outcome_indices=outcome_indices
+            )
+            final_bankrolls[i] = partial['final_bankrolls']
+            for name in PARTIAL_METRICS:
+                path_metrics[name][i] = partial[name]
+        statistics.add(chunk_start, final_bankrolls, path_metrics)
+
+        if progress_callback:
+            progress_callback(chunk_stop / num_paths)
+
+    return statistics.summarize()
+
+
+def run_grid_sweep(config: SimulationConfig,
+                   strategy_factory: Callable[[SimulationConfig, Dict[str, float]], BettingStrategy],
+                   axes: Sequence[GridAxis], executor: str = 'serial', max_workers: Optional[int] = None,
+                   engine: str = 'auto', progress_callback=None) -> Dict[str, Any]:
+    """
+    Sweep every combination of the values of up to three parameters.
+
+    Args:
+        config: Base simulation configuration; num_simulations paths run at every point
+        strategy_factory: Creates the strategy of a point from its configuration
+                          and the value of every axis, keyed by parameter
+        axes: Grid axes, at most one per parameter
+        executor: 'serial' runs in the calling thread, 'thread' and 'process'
+                  split the points into groups run on a pool
+        max_workers: Pool size for the thread and process executors
+                     (defaults to the number of CPUs)
+        engine: 'batch', 'scalar' or 'auto', as for Simulator
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+    Returns:
+        dict: 'axes', the grid 'shape', the run 'seed' and 'grid_metrics' with
+              one encoded array of that shape per metric of GRID_METRICS
+    """
+    axes = list(axes)
+    if not 1 <= len(axes) <= MAX_GRID_DIMENSIONS:
+        raise ValueError(f"A grid sweep needs between 1 and {MAX_GRID_DIMENSIONS} axes (got {len(axes)})")
+    if len({axis.parameter for axis in axes}) != len(axes):
+        raise ValueError("Every grid axis needs a distinct parameter")
+    for axis in axes:
+        if axis.parameter in OUTCOME_PARAMETERS and not 0 <= axis.outcome_index < len(config.outcomes):
+            raise ValueError(f"Outcome index {axis.outcome_index} is out of range")
+    if executor not in Simulator.EXECUTOR_CHOICES:
+        raise ValueError(f"Unknown executor '{executor}' (expected one of {', '.join(Simulator.EXECUTOR_CHOICES)})")
+    if engine == 'analytic':
+        raise ValueError("The analytic engine cannot drive grid points off shared outcome paths")
+
+    start_time = time.time()
+    seed = resolve_seed(config.seed)
+    shape = tuple(len(axis.values) for axis in axes)
+
+    configs = []
+    strategies = []
+    for values in itertools.product(*(axis.values for axis in axes)):
+        point = point_config(config, axes, values)
+        configs.append(point)
+        strategies.append(strategy_factory(point, {axis.parameter: value for axis, value in zip(axes, values)}))
+
+    if executor == 'serial' or len(strategies) == 1:
+        metrics = run_grid_points(configs, strategies, seed, engine, progress_callback)
+    else:
+        metrics = _run_grid_sharded(configs, strategies, seed, engine, executor, max_workers, progress_callback)
+
+    return {
+        'axes': [axis.to_dict() for axis in axes],
+        'shape': list(shape),
+        'seed': seed,
+        'num_simulations': config.num_simulations,
+        'grid_metrics': {name: encode_grid_array(metrics[name].reshape(shape)) for name in GRID_METRICS},
+        'elapsed_time': time.time() - start_time,
+    }
+
+
+def _run_grid_sharded(configs, strategies, seed: int, engine: str, executor: str,
+                      max_workers: Optional[int], progress_callback=None) -> Dict[str, np.ndarray]:
+    """Run groups of grid points concurrently on a thread or process pool."""
+    max_workers = max_workers or os.cpu_count() or 1
+    groups = _point_groups(len(strategies), max_workers)
+    pool_class = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+
+    metrics = {name: np.zeros(len(strategies)) for name in GRID_METRICS}
+    done = 0
+    with pool_class(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(run_grid_points, configs[start:stop], strategies[start:stop], seed, engine): (start, stop)
+            for start, stop in groups
+        }
+        for future in as_completed(futures):
+            start, stop = futures[future]
+            for name, values in future.result().items():
+                metrics[name][start:stop] = values
+            done += stop - start
+            if progress_callback:
+                progress_callback(done / len(strategies))
+    return metrics
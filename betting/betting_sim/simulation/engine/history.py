@@ -0,0 +1,145 @@
+"""
+Columnar storage for the round-by-round history of a simulation path.
+
+ColumnarHistory keeps one preallocated column per history field instead of a
+dictionary per round. It still behaves like the list of dictionaries that
+strategies have always received, so history[-1]['bankroll_before'] and
+similar lookups keep working; rows are only materialized when accessed.
+"""
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+HISTORY_FIELDS = ('bankroll_before', 'bet_amount', 'bet_fraction', 'outcome_idx', 'multiplier', 'bankroll')
+
+
+class HistoryRow(Mapping):
+    """
+    Read-only view of one round of a ColumnarHistory.
+    """
+
+    __slots__ = ('_history', '_index')
+
+    def __init__(self, history: 'ColumnarHistory', index: int):
+        self._history = history
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'round':
+            return self._index
+        return self._history.columns[key][self._index]
+
+    def __iter__(self):
+        yield 'round'
+        yield from HISTORY_FIELDS
+
+    def __len__(self) -> int:
+        return len(HISTORY_FIELDS) + 1
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ColumnarHistory(Sequence):
+    """
+    History of a path stored as one column per field.
+
+    Columns are preallocated for the full number of rounds. The scalar engine
+    fills them as plain Python lists, which is much cheaper per round than
+    either building dictionaries or writing single NumPy elements; to_arrays
+    returns them as NumPy arrays for bulk processing.
+    """
+
+    def __init__(self, num_rounds: int = 0):
+        """
+        Initialize an empty history with room for num_rounds rounds.
+
+        Args:
+            num_rounds: Capacity of the columns
+        """
+        self.length = 0
+        self.bankroll_before: List[float] = [0.0] * num_rounds
+        self.bet_amount: List[float] = [0.0] * num_rounds
+        self.bet_fraction: List[float] = [0.0] * num_rounds
+        self.outcome_idx: List[int] = [0] * num_rounds
+        self.multiplier: List[float] = [0.0] * num_rounds
+        self.bankroll: List[float] = [0.0] * num_rounds
+        self._index_columns()
+
+    @classmethod
+    def from_arrays(cls, length: Optional[int] = None, **columns) -> 'ColumnarHistory':
+        """
+        Build a history from existing columns (lists or NumPy arrays).
+
+        Args:
+            length: Number of recorded rounds (defaults to the column length)
+            **columns: One sequence per field in HISTORY_FIELDS
+        """
+        history = cls()
+        for field in HISTORY_FIELDS:
+            setattr(history, field, columns[field])
+        history.length = len(columns['bankroll']) if length is None else length
+        history._index_columns()
+        return history
+
+    def _index_columns(self):
+        """Map field names to columns for fast row lookups."""
+        self.columns = {field: getattr(self, field) for field in HISTORY_FIELDS}
+
+    def append(self, bankroll_before: float, bet_amount: float, bet_fraction: float,
+               outcome_idx: int, multiplier: float, bankroll: float):
+        """Record the next round."""
+        i = self.length
+        self.bankroll_before[i] = bankroll_before
+        self.bet_amount[i] = bet_amount
+        self.bet_fraction[i] = bet_fraction
+        self.outcome_idx[i] = outcome_idx
+        self.multiplier[i] = multiplier
+        self.bankroll[i] = bankroll
+        self.length = i + 1
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [HistoryRow(self, i) for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("history index out of range")
+        return HistoryRow(self, index)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Return the recorded rounds as NumPy arrays, one per field.
+        """
+        arrays = {
+            field: np.asarray(getattr(self, field)[:self.length], dtype=float)
+            for field in HISTORY_FIELDS
+        }
+        arrays['outcome_idx'] = arrays['outcome_idx'].astype(np.int64)
+        return arrays
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """
+        Return the recorded rounds as JSON-serializable dictionaries.
+        """
+        columns = [
+            np.asarray(getattr(self, field)[:self.length]).tolist() for field in HISTORY_FIELDS
+        ]
+        return [
+            {
+                'round': round_idx,
+                'bankroll_before': bankroll_before,
+                'bet_amount': bet_amount,
+                'bet_fraction': bet_fraction,
+                'outcome_idx': int(outcome_idx),
+                'multiplier': multiplier,
+                'bankroll': bankroll,
+            }
+            for round_idx, (bankroll_before, bet_amount, bet_fraction, outcome_idx, multiplier, bankroll)
+            in enumerate(zip(*columns))
+        ]
@@ -0,0 +1,314 @@
+"""
+Importance sampling for the probability of ruin.
+
+A plain run counts ruined paths, which needs millions of paths when ruin is
+rare. Importance sampling instead draws outcomes from a tilted distribution q
+that makes losing outcomes more likely, and weights each path by the
+likelihood ratio of its outcomes under the configured probabilities p and
+under q. Only the rounds a path actually played count towards its weight
+(ruined paths stop playing), so the weight of a path is
+
+    W = prod_i (p_i / q_i) ** n_i
+
+where n_i is how often outcome i occurred. The mean of W * 1{ruin} is an
+unbiased estimate of the ruin probability for any q that gives every outcome
+a positive probability.
+
+The tilt is learned with the cross-entropy method: pilot runs under the
+current q keep their lowest-reaching paths, and q is refit to the outcome
+frequencies of those paths, lowering the level until it reaches the ruin
+threshold. Intermediate levels are fit without the likelihood ratios, which
+degenerate over long paths and would stall the descent; the final fit to the
+ruined paths weights them. This only needs the outcome list, so it works for
+every strategy, including ones whose bet depends on past results.
+"""
+import copy
+import dataclasses
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .aggregation import RunningStats, chunk_paths_for
+from .random_streams import MAX_SEED
+from .metrics import RUIN_THRESHOLD
+
+
+# Paths per cross-entropy pilot run
+PILOT_PATHS = 4096
+
+# Maximum number of cross-entropy iterations
+MAX_PILOT_ITERATIONS = 20
+
+# Fraction of the pilot paths kept as the elite of an iteration
+ELITE_FRACTION = 0.1
+
+# Weight of the refit distribution when updating q (the rest stays on the old q)
+SMOOTHING = 0.7
+
+# Every outcome keeps at least this share of its probability under q
+MIN_PROBABILITY_RATIO = 1e-3
+
+
+def derived_seed(seed: int, stage: int) -> int:
+    """
+    Derive an independent seed for one stage of the importance-sampling run.
+    """
+    state = np.random.SeedSequence([seed, stage]).generate_state(1, np.uint64)[0]
+    return int(state) & MAX_SEED
+
+
+def outcome_probabilities(config) -> np.ndarray:
+    """Configured outcome probabilities, normalized to sum to 1."""
+    probabilities = np.array([o.probability for o in config.outcomes], dtype=float)
+    return probabilities / probabilities.sum()
+
+
+def tilted_config(config, probabilities: np.ndarray, num_simulations: int, seed: int):
+    """
+    Copy a configuration with the outcome probabilities replaced.
+
+    Args:
+        config: Simulation configuration
+        probabilities: Sampling probability of each outcome
+        num_simulations: Number of paths of the copy
+        seed: Seed of the copy
+
+    Returns:
+        SimulationConfig: Configuration drawing outcomes from probabilities
+    """
+    outcomes = [
+        dataclasses.replace(outcome, probability=float(probability))
+        for outcome, probability in zip(config.outcomes, probabilities)
+    ]
+    return dataclasses.replace(
+        config, outcomes=outcomes, num_simulations=num_simulations, seed=seed, antithetic=False,
+        qmc=False
+    )
+
+
+def log_likelihood_ratios(outcome_counts: np.ndarray, probabilities: np.ndarray,
+                          sampling_probabilities: np.ndarray) -> np.ndarray:
+    """
+    Log of each path's likelihood ratio from its outcome counts.
+
+    Args:
+        outcome_counts: Occurrences of each outcome in the played rounds, one row per path
+        probabilities: Configured outcome probabilities p
+        sampling_probabilities: Probabilities q the paths were drawn from
+
+    Returns:
+        np.ndarray: log W for every path
+    """
+    with np.errstate(divide='ignore'):
+        log_ratios = np.log(probabilities) - np.log(sampling_probabilities)
+    # Outcomes that never occur under p never occur under q either
+    log_ratios = np.where(probabilities > 0, log_ratios, 0.0)
+    return outcome_counts @ log_ratios
+
+
+class ImportanceSamplingStats:
+    """
+    Mergeable statistics of the weighted ruin indicators.
+    """
+
+    def __init__(self):
+        self.weighted_ruin = RunningStats()
+        self.num_ruined = 0
+        self.weight_sum = 0.0
+        self.weight_square_sum = 0.0
+
+    def update(self, final_bankrolls: np.ndarray, log_weights: np.ndarray):
+        """
+        Add a batch of paths.
+
+        Args:
+            final_bankrolls: Final bankroll of each path
+            log_weights: Log likelihood ratio of each path
+        """
+        weights = np.exp(log_weights)
+        ruined = final_bankrolls <= RUIN_THRESHOLD
+        self.weighted_ruin.update(np.where(ruined, weights, 0.0))
+        self.num_ruined += int(np.count_nonzero(ruined))
+        self.weight_sum += float(weights.sum())
+        self.weight_square_sum += float(np.sum(weights ** 2))
+
+    def merge(self, other: 'ImportanceSamplingStats'):
+        """Combine with the statistics of another set of paths."""
+        self.weighted_ruin.merge(other.weighted_ruin)
+        self.num_ruined += other.num_ruined
+        self.weight_sum += other.weight_sum
+        self.weight_square_sum += other.weight_square_sum
+
+    def summarize(self) -> Dict[str, Any]:
+        """
+        Compute the ruin estimate and its standard error.
+
+        Returns:
+            dict: Estimate, standard error, relative error, number of ruined
+                  samples and the effective sample size of the weights
+        """
+        count = self.weighted_ruin.count
+        estimate = self.weighted_ruin.mean
+        standard_error = 0.0
+        if count > 1:
+            standard_error = float(np.sqrt(self.weighted_ruin.m2 / (count - 1) / count))
+        effective_sample_size = 0.0
+        if self.weight_square_sum > 0:
+            effective_sample_size = self.weight_sum ** 2 / self.weight_square_sum
+        return {
+            'estimate': float(estimate),
+            'standard_error': standard_error,
+            'relative_error': standard_error / estimate if estimate > 0 else None,
+            'num_simulations': count,
+            'num_ruined_samples': self.num_ruined,
+            'effective_sample_size': float(effective_sample_size),
+        }
+
+
+class ImportanceSampler:
+    """
+    Learns a tilted outcome distribution and estimates the ruin probability.
+    """
+
+    def __init__(self, simulator, seed: int):
+        """
+        Initialize the sampler for a simulator's configuration and strategy.
+
+        Args:
+            simulator: Simulator whose ruin probability is estimated
+            seed: Run seed the pilot and estimation seeds are derived from
+        """
+        self.simulator = simulator
+        self.seed = seed
+        self.probabilities = outcome_probabilities(simulator.config)
+        self.sampling_probabilities = self.probabilities.copy()
+        self.log_threshold = np.log(RUIN_THRESHOLD)
+
+    def counting_simulator(self, num_simulations: int, seed: int):
+        """
+        Copy the simulator to draw from the current tilt and count outcomes.
+        """
+        simulator = copy.copy(self.simulator)
+        simulator.config = tilted_config(
+            self.simulator.config, self.sampling_probabilities, num_simulations, seed
+        )
+        simulator.sampler = simulator.config.get_sampler()
+        simulator.control_variates = False
+        simulator.control_log_factors = None
+        simulator.sensitivity_fraction = None
+        simulator.count_outcomes = True
+        return simulator
+
+    def fit(self) -> List[Dict[str, Any]]:
+        """
+        Fit the tilted distribution with cross-entropy pilot runs.
+
+        Returns:
+            list: Level and elite size of every iteration
+        """
+        num_paths = min(PILOT_PATHS, self.simulator.config.num_simulations)
+        num_elite = max(1, int(np.ceil(ELITE_FRACTION * num_paths)))
+        minimum = MIN_PROBABILITY_RATIO * self.probabilities
+        iterations = []
+
+        for iteration in range(MAX_PILOT_ITERATIONS):
+            simulator = self.counting_simulator(num_paths, derived_seed(self.seed, iteration + 1))
+            partial = simulator.run_path_range(simulator.config.seed, 0, num_paths)
+            log_weights = log_likelihood_ratios(
+                partial['outcome_counts'], self.probabilities, self.sampling_probabilities
+            )
+
+            # Lowest bankroll each path reached; ruined paths reach the threshold
+            with np.errstate(divide='ignore'):
+                levels = np.log(partial['bankroll_trajectories'].min(axis=1))
+            level = max(np.partition(levels, num_elite - 1)[num_elite - 1], self.log_threshold)
+            elite = levels <= level
+            final = level <= self.log_threshold
+
+            # Refit q to the outcome frequencies of the elite paths, weighted
+            # by their likelihood ratios once the elite are the ruined paths
+            weights = np.ones(np.count_nonzero(elite))
+            if final:
+                weights = np.exp(log_weights[elite] - log_weights[elite].max())
+            counts = weights @ partial['outcome_counts'][elite]
+            iterations.append({'level': float(np.exp(level)), 'num_elite': int(np.count_nonzero(elite))})
+            if counts.sum() == 0:
+                break
+            refit = np.maximum(counts / counts.sum(), minimum)
+            refit = refit / refit.sum()
+            self.sampling_probabilities = SMOOTHING * refit + (1 - SMOOTHING) * self.sampling_probabilities
+
+            if final:
+                break
+        return iterations
+
+    def estimate(self, num_simulations: int, progress_callback=None) -> Dict[str, Any]:
+        """
+        Estimate the ruin probability from paths drawn under the fitted tilt.
+
+        Args:
+            num_simulations: Number of paths
+            progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+        Returns:
+            dict: Output of ImportanceSamplingStats.summarize
+        """
+        simulator = self.counting_simulator(num_simulations, derived_seed(self.seed, 0))
+        stats = ImportanceSamplingStats()
+        chunk_paths = chunk_paths_for(simulator.config.num_rounds)
+
+        for chunk_start in range(0, num_simulations, chunk_paths):
+            chunk_stop = min(chunk_start + chunk_paths, num_simulations)
+            chunk_callback = None
+            if progress_callback:
+                chunk_callback = lambda fraction, start=chunk_start, stop=chunk_stop: progress_callback(
+                    (start + fraction * (stop - start)) / num_simulations
+                )
+            partial = simulator.run_path_range(
+                simulator.config.seed, chunk_start, chunk_stop, chunk_callback, record_paths=[]
+            )
+            stats.update(
+                partial['final_bankrolls'],
+                log_likelihood_ratios(partial['outcome_counts'], self.probabilities, self.sampling_probabilities)
+            )
+        return stats.summarize()
+
+
+def estimate_ruin_probability(simulator, seed: int, num_simulations: Optional[int] = None,
+                              progress_callback=None) -> Dict[str, Any]:
+    """
+    Estimate a simulator's probability of ruin by importance sampling.
+
+    Args:
+        simulator: Simulator whose configuration and strategy are estimated
+        seed: Run seed the pilot and estimation streams are derived from
+        num_simulations: Number of paths for the estimate (defaults to the
+                         configuration's num_simulations)
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+    Returns:
+        dict: Ruin estimate with its standard error, the sampling
+              distribution and the cross-entropy iterations
+    """
+    num_simulations = num_simulations or simulator.config.num_simulations
+    sampler = ImportanceSampler(simulator, seed)
+    iterations = sampler.fit()
+    summary = sampler.estimate(num_simulations, progress_callback)
+    summary['sampling_probabilities'] = sampler.sampling_probabilities.tolist()
+    summary['pilot_iterations'] = iterations
+    return summary
+
+
+def apply_importance_sampling(results: Dict[str, Any], summary: Dict[str, Any]):
+    """
+    Replace the plain ruin frequency in a result dictionary with the estimate.
+
+    Args:
+        results: Aggregated simulation results, updated in place
+        summary: Output of estimate_ruin_probability
+    """
+    summary['plain_estimate'] = results['probability_of_ruin']
+    results['probability_of_ruin'] = min(max(summary['estimate'], 0.0), 1.0)
+    results['importance_sampling'] = summary
+    # The bootstrap interval of the ruin frequency does not apply to the estimate
+    results.get('bootstrap', {}).get('intervals', {}).pop('probability_of_ruin', None)
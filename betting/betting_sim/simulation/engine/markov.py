@@ -0,0 +1,324 @@
+"""
+Markov-chain engine for strategies whose bet depends only on the bankroll.
+
+When the bet fraction is a function of the current bankroll alone (Fixed
+Fraction, Kelly, bankroll-threshold rules), the bankroll is a Markov chain.
+The engine discretizes it onto log-spaced cells between the ruin threshold
+and a bound above the initial bankroll, plus cells below the threshold for
+ruined paths, which stop betting but keep what is left of their bankroll.
+Every cell carries its probability and the mean bankroll of that
+probability. A round takes the mean bankroll of every surviving cell through
+every outcome, betting the fraction of the cell's centre, into the cell of
+the resulting bankroll; ruined cells keep theirs. Ruin is thus decided on
+actual bankrolls rather than grid values, and the expected bankroll is
+carried exactly. The ruin probability and the rest of the distribution are
+exact while distinct bankrolls stay in distinct cells (and the strategy bets
+the same fraction across each cell), and otherwise accurate to the cell width.
+
+Each round is two weighted bincounts over the occupied cells, so a run costs
+O(cells x outcomes x rounds) whatever num_simulations is. This gives the
+per-round distribution, percentile bands and the probability of
+ruin deterministically. As with the analytic engine, drawdowns depend on the
+order of outcomes, so the drawdown statistics and example paths come from a
+sample of the run's paths.
+"""
+import time
+from typing import Any, Dict, Iterator, Tuple
+
+import numpy as np
+
+from .history import ColumnarHistory
+from .metrics import summarize_path_metrics, RUIN_THRESHOLD
+from .risk import risk_metrics
+from .bootstrap import bootstrap_confidence_intervals
+from .analytic import DRAWDOWN_SAMPLE_PATHS, FINAL_BANKROLL_PERCENTILES
+
+
+# Number of log-spaced bankroll cells above the ruin threshold
+MARKOV_GRID_CELLS = 4000
+
+# Number of cells holding ruined bankrolls at most; state 0 also holds
+# everything below the lowest of them, down to 0
+MARKOV_MAX_RUIN_CELLS = 1000
+
+# Decades above the initial bankroll covered by the grid at most; probability
+# that would grow past the top cell is held there and reported as clipped
+MARKOV_MAX_DECADES_ABOVE = 12
+
+# Per-round percentile bands reported in 'percentile_bands'
+BAND_PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+
+class BankrollMarkovChain:
+    """
+    Discretized bankroll process of a bankroll-only strategy.
+
+    States 0..num_ruin_cells - 1 hold the ruined bankrolls (state 0 also
+    everything down to 0) and the num_cells states after them the bankrolls
+    above the threshold, all in increasing order of their cells. Every state
+    carries its probability and the mean bankroll of that probability.
+    """
+
+    def __init__(self, config, strategy, num_cells: int = MARKOV_GRID_CELLS):
+        """
+        Build the bankroll cells and the bet of each cell.
+
+        Args:
+            config: Simulation configuration
+            strategy: Strategy whose bet fraction only depends on the bankroll
+            num_cells: Number of log-spaced cells above the ruin threshold
+        """
+        if not strategy.is_bankroll_only():
+            raise ValueError(
+                f"{type(strategy).__name__} cannot run on the Markov-chain engine; "
+                f"its bet must depend on the current bankroll only"
+            )
+        if num_cells < 2:
+            raise ValueError(f"num_cells must be at least 2 (got {num_cells})")
+
+        self.config = config
+        self.strategy = strategy
+        self.initial_bankroll = float(config.initial_bankroll)
+
+        total = sum(o.probability for o in config.outcomes)
+        self.probabilities = np.array([o.probability / total for o in config.outcomes])
+        self.multipliers = np.array([o.multiplier for o in config.outcomes], dtype=float)
+
+        self._build_grid(num_cells)
+
+    def _bet_fractions(self, bankrolls: np.ndarray) -> np.ndarray:
+        """Bet fraction of the strategy at each bankroll."""
+        if self.strategy.supports_batch():
+            fractions = self.strategy.get_bet_fractions(bankrolls, 0, self.strategy.init_states(len(bankrolls)))
+        else:
+            fractions = [self.strategy.get_state_bet_fraction(bankroll, 0, self.strategy.init_state(),
+                                                              ColumnarHistory())
+                         for bankroll in bankrolls]
+        return np.clip(np.asarray(fractions, dtype=float), 0.0, 1.0)
+
+    def _build_grid(self, num_cells: int):
+        """
+        Place num_cells log-spaced cells above the threshold and the ruined cells below it.
+        """
+        log_lower = np.log(RUIN_THRESHOLD)
+        log_initial = np.log(max(self.initial_bankroll, RUIN_THRESHOLD))
+
+        # Cover the largest growth the strategy can reach, up to the decade limit
+        probe = np.exp(np.linspace(log_lower, log_initial + MARKOV_MAX_DECADES_ABOVE * np.log(10), num_cells))
+        fractions = self._bet_fractions(probe)
+        factors = 1.0 - fractions[:, None] + fractions[:, None] * self.multipliers[None, :]
+        growth = self.config.num_rounds * np.log(max(np.max(factors), 1.0))
+        log_upper = log_initial + min(growth, MARKOV_MAX_DECADES_ABOVE * np.log(10))
+        spacing = max(log_upper - log_lower, 1e-9) / num_cells
+
+        # Cover the bankrolls one round can take ruined paths down to
+        losses = factors[factors > 0]
+        depth = -np.log(losses.min()) if losses.size else 0.0
+        num_ruin_cells = int(min(MARKOV_MAX_RUIN_CELLS, np.ceil(max(depth, 0.0) / spacing))) + 1
+
+        self.num_cells = num_cells
+        self.num_ruin_cells = num_ruin_cells
+        self.log_lower = log_lower
+        self.spacing = spacing
+        self.top_bankroll = np.exp(log_lower + spacing * num_cells)
+
+        # Each surviving cell bets the fraction of its geometric centre
+        centres = np.exp(log_lower + spacing * (np.arange(num_cells) + 0.5))
+        fractions = self._bet_fractions(centres)
+        self.factors = np.maximum(1.0 - fractions[:, None] + fractions[:, None] * self.multipliers[None, :], 0.0)
+
+    def _states(self, bankrolls: np.ndarray) -> np.ndarray:
+        """
+        State of each bankroll.
+
+        Bankrolls at or below the threshold go to the ruined states, those
+        above the top cell to the top cell.
+        """
+        position = np.floor((np.log(np.maximum(bankrolls, 1e-300)) - self.log_lower) / self.spacing)
+        ruined = np.clip(position, -self.num_ruin_cells, -1) + self.num_ruin_cells
+        surviving = np.clip(position, 0, self.num_cells - 1) + self.num_ruin_cells
+        return np.where(bankrolls <= RUIN_THRESHOLD, ruined, surviving).astype(np.int64)
+
+    def ruin_probability(self, mass: np.ndarray) -> float:
+        """Probability of the ruined states of a distribution."""
+        return float(mass[:self.num_ruin_cells].sum())
+
+    def initial_distribution(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distribution before the first round.
+
+        Returns:
+            tuple: (probability of each state, probability times mean bankroll of each state)
+        """
+        mass = np.zeros(self.num_ruin_cells + self.num_cells)
+        state = self._states(np.array([self.initial_bankroll]))[0]
+        mass[state] = 1.0
+        weighted = mass * self.initial_bankroll
+        return mass, weighted
+
+    def step(self, mass: np.ndarray, weighted: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        Propagate a distribution through one round.
+
+        Args:
+            mass: Probability of each state
+            weighted: Probability times mean bankroll of each state
+
+        Returns:
+            tuple: (probability and probability-weighted bankroll of each state
+                    after the round, probability that grew past the top cell)
+        """
+        new_mass = mass.copy()
+        new_weighted = weighted.copy()
+        cells = np.flatnonzero(mass[self.num_ruin_cells:] > 0)
+        states = cells + self.num_ruin_cells
+        new_mass[states] = 0.0
+        new_weighted[states] = 0.0
+        if not len(cells):
+            return new_mass, new_weighted, 0.0
+
+        # Every outcome moves the mean bankroll of a cell; ruined states keep theirs
+        bankrolls = (weighted[states] / mass[states])[:, None] * self.factors[cells]
+        weights = mass[states][:, None] * self.probabilities[None, :]
+        targets = self._states(bankrolls.ravel())
+        new_mass += np.bincount(targets, weights=weights.ravel(), minlength=len(mass))
+        new_weighted += np.bincount(targets, weights=(weights * bankrolls).ravel(), minlength=len(mass))
+        # The top cell holds whatever grows past it; count the probability entering that way
+        grown_past = (bankrolls > self.top_bankroll) & (cells < self.num_cells - 1)[:, None]
+        return new_mass, new_weighted, float(weights[grown_past].sum())
+
+    def iter_distributions(self) -> Iterator[Tuple[np.ndarray, np.ndarray, float]]:
+        """
+        Yield the distribution after every round, starting with round 0.
+
+        Yields:
+            tuple: (probability of each state, mean bankroll of each state,
+                    probability grown past the top cell so far)
+        """
+        mass, weighted = self.initial_distribution()
+        clipped = 0.0
+        yield mass, self.bankrolls(mass, weighted), clipped
+        for _ in range(self.config.num_rounds):
+            mass, weighted, round_clipped = self.step(mass, weighted)
+            clipped += round_clipped
+            yield mass, self.bankrolls(mass, weighted), clipped
+
+    def bankrolls(self, mass: np.ndarray, weighted: np.ndarray) -> np.ndarray:
+        """
+        Mean bankroll of each state (the cell's lower edge for empty states).
+        """
+        edges = np.exp(self.log_lower + self.spacing * (np.arange(len(mass)) - self.num_ruin_cells))
+        edges[0] = 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(mass > 0, weighted / mass, edges)
+
+    def distributions(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Full per-round distribution.
+
+        Returns:
+            tuple: Two matrices with one row per round (round 0 included), the
+                   probability and the mean bankroll of each state after the round
+        """
+        rows = list(self.iter_distributions())
+        return np.array([mass for mass, _, _ in rows]), np.array([bankrolls for _, bankrolls, _ in rows])
+
+    @staticmethod
+    def quantiles(mass: np.ndarray, bankrolls: np.ndarray, quantiles) -> np.ndarray:
+        """
+        Quantiles of one distribution (mean bankroll of the first state whose CDF reaches q).
+        """
+        cumulative = np.cumsum(mass)
+        idx = np.searchsorted(cumulative, np.asarray(quantiles, dtype=float) * cumulative[-1], side='left')
+        return bankrolls[np.clip(idx, 0, len(mass) - 1)]
+
+
+def run_markov_simulation(simulator, seed: int, start_time: float,
+                          progress_callback=None) -> Dict[str, Any]:
+    """
+    Compute the results of a bankroll-only strategy on the bankroll grid.
+
+    Produces the same result dictionary as Simulator.run_multiple_simulations,
+    with the final-bankroll statistics, ruin probability and trajectory bands
+    computed from the propagated distribution, plus 'percentile_bands' and
+    the per-round 'ruin_probability_by_round'.
+
+    Args:
+        simulator: Simulator with a bankroll-only strategy
+        seed: Run seed for the sampled drawdowns and example paths
+        start_time: Time the run started (from time.time())
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+    Returns:
+        dict: Aggregated simulation results
+    """
+    config = simulator.config
+    num_rounds = config.num_rounds
+    chain = BankrollMarkovChain(config, simulator.strategy)
+
+    band_quantiles = [p / 100 for p in BAND_PERCENTILES]
+    mean_trajectory = np.zeros(num_rounds + 1)
+    bands = np.zeros((len(BAND_PERCENTILES), num_rounds + 1))
+    ruin_by_round = np.zeros(num_rounds + 1)
+
+    for round_idx, (mass, bankrolls, clipped) in enumerate(chain.iter_distributions()):
+        mean_trajectory[round_idx] = float(np.dot(mass, bankrolls))
+        bands[:, round_idx] = chain.quantiles(mass, bankrolls, band_quantiles)
+        ruin_by_round[round_idx] = chain.ruin_probability(mass)
+
+        if progress_callback and round_idx % max(1, num_rounds // 100) == 0:
+            progress_callback(round_idx / max(1, num_rounds))
+    support = mass > 0
+    mean_bankroll = float(np.dot(mass, bankrolls))
+    variance = float(np.dot(mass, (bankrolls - mean_bankroll) ** 2))
+    percentiles = chain.quantiles(mass, bankrolls, np.array(FINAL_BANKROLL_PERCENTILES) / 100)
+
+    # Path-dependent metrics (drawdowns, streaks, time to ruin) come from sampled paths
+    sample = simulator.run_path_range(seed, 0, min(config.num_simulations, DRAWDOWN_SAMPLE_PATHS))
+    max_drawdowns = sample['max_drawdowns']
+    path_statistics = summarize_path_metrics(
+        max_drawdowns, sample['time_under_water'], sample['longest_losing_streaks']
+    )
+    path_statistics['risk_metrics'] = risk_metrics(
+        config.initial_bankroll, config.num_rounds, sample['final_bankrolls'],
+        sample['rounds_played'], sample['log_return_squares']
+    )
+    # The final-bankroll statistics are exact; only the sampled drawdowns carry sampling noise
+    path_statistics['bootstrap'] = bootstrap_confidence_intervals(
+        {'mean_max_drawdown': path_statistics['mean_max_drawdown']}, seed, max_drawdowns=max_drawdowns
+    )
+    if simulator.sensitivity_fraction is not None:
+        # The derivatives are pathwise, so they come from the sampled paths too
+        sensitivities = simulator.create_sensitivity_stats()
+        sensitivities.add_partial(sample)
+        path_statistics['sensitivities'] = sensitivities.summarize()
+
+    if progress_callback:
+        progress_callback(1.0)
+
+    band_rows = dict(zip(BAND_PERCENTILES, bands.tolist()))
+    return {
+        'num_simulations': config.num_simulations,
+        'mean_final_bankroll': mean_bankroll,
+        'median_final_bankroll': float(chain.quantiles(mass, bankrolls, [0.5])[0]),
+        'std_final_bankroll': float(np.sqrt(variance)),
+        'min_final_bankroll': float(bankrolls[support].min()),
+        'max_final_bankroll': float(bankrolls[support].max()),
+        'probability_of_ruin': chain.ruin_probability(mass),
+        **path_statistics,
+        'mean_trajectory': mean_trajectory.tolist(),
+        'percentile_10': band_rows[10],
+        'percentile_90': band_rows[90],
+        'individual_results': sample['individual_results'],
+        'elapsed_time': time.time() - start_time,
+        'seed': seed,
+        'engine': 'markov',
+        'final_bankroll_quantiles': {
+            str(p): float(v) for p, v in zip(FINAL_BANKROLL_PERCENTILES, percentiles)
+        },
+        'percentile_bands': {str(p): values for p, values in band_rows.items()},
+        'ruin_probability_by_round': ruin_by_round.tolist(),
+        'drawdown_sample_paths': len(max_drawdowns),
+        'markov_grid_cells': chain.num_cells,
+        'clipped_probability': clipped,
+    }
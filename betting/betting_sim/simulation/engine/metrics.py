@@ -0,0 +1,252 @@
+"""
+Vectorized per-path metrics of bankroll trajectories.
+
+Every engine reports the same path metrics, computed here in one of two ways:
+
+- trajectory_metrics works in bulk on a matrix of trajectories (one row per
+  path, one column per round), chunk of rows by chunk of rows, using a
+  running peak from np.maximum.accumulate
+- PathMetrics tracks the same metrics round by round for engines that advance
+  all paths in lockstep without keeping their trajectories
+
+The metrics of a path are its peak bankroll, its max drawdown (the largest
+drop below the running peak, relative to the peak), its time under water
+(rounds that end below the running peak) and its longest losing streak
+(consecutive rounds that shrink the bankroll). Rounds after a path is ruined
+are not played and do not count.
+
+For the risk metrics (see risk.py) a path also reports the number of rounds it
+played, which is its time to ruin if it was ruined, and the sum of its squared
+per-round log returns. Log returns floor the bankroll at the ruin threshold,
+so the return of the round that ruins a path stays finite, and a path's log
+returns add up to the log of its (floored) final over its initial bankroll.
+"""
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+# Bankrolls at or below this value count as ruined, as in the engines
+RUIN_THRESHOLD = 0.01
+
+# Upper bound on the number of trajectory cells processed at once
+METRICS_CHUNK_CELLS = 1_000_000
+
+# Per-path arrays returned by trajectory_metrics and PathMetrics.arrays
+PATH_METRICS = ('max_bankrolls', 'max_drawdowns', 'time_under_water', 'longest_losing_streaks')
+
+# Per-path arrays the engines return with each path range
+PARTIAL_METRICS = ('max_drawdowns', 'time_under_water', 'longest_losing_streaks')
+
+# Per-path arrays the risk metrics are computed from, returned with the above
+RISK_PATH_METRICS = ('rounds_played', 'log_return_squares')
+
+
+def longest_runs(mask: np.ndarray) -> np.ndarray:
+    """
+    Length of the longest run of True values in each row.
+
+    Args:
+        mask: Boolean matrix, one row per path
+
+    Returns:
+        np.ndarray: Longest run of each row
+    """
+    num_rows, num_columns = mask.shape
+    if num_columns == 0:
+        return np.zeros(num_rows, dtype=np.int64)
+    positions = np.arange(1, num_columns + 1)
+    # Position of the last False at or before each column
+    last_break = np.maximum.accumulate(np.where(mask, 0, positions), axis=1)
+    return (positions - last_break).max(axis=1)
+
+
+def trajectory_metrics(trajectories: np.ndarray, ruin_threshold: float = RUIN_THRESHOLD,
+                       chunk_cells: int = METRICS_CHUNK_CELLS) -> Dict[str, np.ndarray]:
+    """
+    Compute the path metrics of a trajectory matrix in bulk.
+
+    Trajectories are padded with zeros after ruin, as the engines return
+    them; the padding is not played and does not count.
+
+    Args:
+        trajectories: Matrix of bankrolls, one row per path and one column per round
+        ruin_threshold: Bankrolls at or below this value stop playing
+        chunk_cells: Upper bound on the number of cells processed at once
+
+    Returns:
+        dict: One array per metric of PATH_METRICS and RISK_PATH_METRICS, indexed by path
+    """
+    trajectories = np.asarray(trajectories, dtype=float)
+    num_paths, num_points = trajectories.shape
+    metrics = {
+        'max_bankrolls': np.empty(num_paths),
+        'max_drawdowns': np.empty(num_paths),
+        'time_under_water': np.empty(num_paths, dtype=np.int64),
+        'longest_losing_streaks': np.empty(num_paths, dtype=np.int64),
+        'rounds_played': np.empty(num_paths, dtype=np.int64),
+        'log_return_squares': np.empty(num_paths),
+    }
+
+    chunk_paths = max(1, chunk_cells // max(1, num_points))
+    for start in range(0, num_paths, chunk_paths):
+        rows = slice(start, min(start + chunk_paths, num_paths))
+        chunk = trajectories[rows]
+
+        # A round is played if the bankroll before it is above the threshold;
+        # unplayed rounds keep the bankroll the path finished with
+        played = chunk[:, :-1] > ruin_threshold
+        num_played = np.count_nonzero(played, axis=1)
+        finished_with = chunk[np.arange(len(chunk)), num_played]
+        values = chunk.copy()
+        values[:, 1:] = np.where(played, chunk[:, 1:], finished_with[:, None])
+
+        peaks = np.maximum.accumulate(values, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdowns = (peaks - values) / peaks
+
+        metrics['max_bankrolls'][rows] = peaks[:, -1]
+        metrics['max_drawdowns'][rows] = np.fmax.reduce(drawdowns, axis=1, initial=0.0)
+        metrics['time_under_water'][rows] = np.count_nonzero(played & (values[:, 1:] < peaks[:, 1:]), axis=1)
+        metrics['longest_losing_streaks'][rows] = longest_runs(played & (values[:, 1:] < values[:, :-1]))
+
+        # Unplayed rounds keep the bankroll, so their log return is zero
+        log_returns = np.diff(np.log(np.maximum(values, ruin_threshold)), axis=1)
+        metrics['rounds_played'][rows] = num_played
+        metrics['log_return_squares'][rows] = np.einsum('ij,ij->i', log_returns, log_returns)
+
+    return metrics
+
+
+class PathMetrics:
+    """
+    Path metrics of a set of paths, updated one round at a time.
+    """
+
+    def __init__(self, bankrolls: np.ndarray, risk_metrics: bool = False):
+        """
+        Start tracking paths at their initial bankrolls.
+
+        Args:
+            bankrolls: Initial bankroll of each path
+            risk_metrics: Also track the metrics of RISK_PATH_METRICS (one
+                          more logarithm per path and round)
+        """
+        num_paths = len(bankrolls)
+        self.max_bankrolls = np.array(bankrolls, dtype=float)
+        self.max_drawdowns = np.zeros(num_paths)
+        # Round counts fit in 32 bits, which halves the memory traffic per round
+        self.time_under_water = np.zeros(num_paths, dtype=np.int32)
+        self.losing_streaks = np.zeros(num_paths, dtype=np.int32)
+        self.longest_losing_streaks = np.zeros(num_paths, dtype=np.int32)
+        self.risk_metrics = risk_metrics
+        if risk_metrics:
+            self.rounds_played = np.zeros(num_paths, dtype=np.int32)
+            self.log_bankrolls = np.log(np.maximum(self.max_bankrolls, RUIN_THRESHOLD))
+            self.log_return_squares = np.zeros(num_paths)
+
+    def update(self, bankrolls: np.ndarray, new_bankrolls: np.ndarray, active: Optional[np.ndarray] = None):
+        """
+        Fold in one round.
+
+        Paths that did not play the round must keep their bankroll, which
+        leaves their peak, drawdown and losing streak unchanged.
+
+        Args:
+            bankrolls: Bankroll of each path before the round
+            new_bankrolls: Bankroll of each path after the round
+            active: Which paths played the round (all if None)
+        """
+        np.maximum(self.max_bankrolls, new_bankrolls, out=self.max_bankrolls)
+        # The largest drop below the running peak; it can only grow on a new low
+        drawdowns = self.max_bankrolls - new_bankrolls
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdowns /= self.max_bankrolls
+        np.fmax(self.max_drawdowns, drawdowns, out=self.max_drawdowns)
+
+        underwater = drawdowns > 0
+        if active is not None:
+            underwater &= active
+        self.time_under_water += underwater
+        self.losing_streaks += 1
+        self.losing_streaks *= new_bankrolls < bankrolls
+        np.maximum(self.longest_losing_streaks, self.losing_streaks, out=self.longest_losing_streaks)
+
+        if self.risk_metrics:
+            self.rounds_played += 1 if active is None else active
+            log_bankrolls = np.log(np.maximum(new_bankrolls, RUIN_THRESHOLD))
+            log_returns = log_bankrolls - self.log_bankrolls
+            log_returns *= log_returns
+            self.log_return_squares += log_returns
+            self.log_bankrolls = log_bankrolls
+
+    def compact(self, keep: np.ndarray):
+        """
+        Keep only some of the paths.
+
+        Args:
+            keep: Boolean mask or indices of the paths to keep
+        """
+        self.max_bankrolls = self.max_bankrolls[keep]
+        self.max_drawdowns = self.max_drawdowns[keep]
+        self.time_under_water = self.time_under_water[keep]
+        self.losing_streaks = self.losing_streaks[keep]
+        self.longest_losing_streaks = self.longest_losing_streaks[keep]
+        if self.risk_metrics:
+            self.rounds_played = self.rounds_played[keep]
+            self.log_bankrolls = self.log_bankrolls[keep]
+            self.log_return_squares = self.log_return_squares[keep]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        The tracked metrics.
+
+        Returns:
+            dict: One array per metric of PATH_METRICS, and of RISK_PATH_METRICS
+                  if tracked, indexed by path
+        """
+        names = PATH_METRICS + RISK_PATH_METRICS if self.risk_metrics else PATH_METRICS
+        return {name: getattr(self, name) for name in names}
+
+
+def individual_path_metrics(metrics: Dict[str, np.ndarray], index: int) -> Dict[str, Any]:
+    """
+    The metrics of one path, keyed as in the results of Simulator.run_single_simulation.
+
+    Args:
+        metrics: Per-path arrays of PATH_METRICS
+        index: Position of the path in the arrays
+
+    Returns:
+        dict: 'max_bankroll', 'max_drawdown', 'time_under_water' and 'longest_losing_streak'
+    """
+    return {
+        'max_bankroll': float(metrics['max_bankrolls'][index]),
+        'max_drawdown': float(metrics['max_drawdowns'][index]),
+        'time_under_water': int(metrics['time_under_water'][index]),
+        'longest_losing_streak': int(metrics['longest_losing_streaks'][index]),
+    }
+
+
+def summarize_path_metrics(max_drawdowns: np.ndarray, time_under_water: np.ndarray,
+                           longest_losing_streaks: np.ndarray) -> Dict[str, float]:
+    """
+    Aggregate statistics of the path metrics, as reported by every engine.
+
+    Args:
+        max_drawdowns: Max drawdown of each path
+        time_under_water: Rounds each path spent below its running peak
+        longest_losing_streaks: Longest losing streak of each path
+
+    Returns:
+        dict: Mean, median and largest max drawdown, mean time under water,
+              and mean and longest losing streak
+    """
+    return {
+        'mean_max_drawdown': float(np.mean(max_drawdowns)),
+        'median_max_drawdown': float(np.median(max_drawdowns)),
+        'max_max_drawdown': float(np.max(max_drawdowns)),
+        'mean_time_under_water': float(np.mean(time_under_water)),
+        'mean_longest_losing_streak': float(np.mean(longest_losing_streaks)),
+        'max_longest_losing_streak': int(np.max(longest_losing_streaks)),
+    }
@@ -0,0 +1,305 @@
+"""
+Search for the bet fraction that maximizes growth under a ruin cap.
+
+Instead of a dense sweep, the optimizer evaluates the bet fraction only where
+it needs to. A coarse scan of the range comes first, so the search does not
+rely on the shape of the curves: ruin need not grow with the fraction (it
+does not for Martingale, whose base and maximum bet both scale with it, nor
+for every custom strategy), and the objective may have several peaks. A
+bisection then refines the largest fraction within the ruin cap between the
+last scanned fraction within it and the next one, and a golden-section search
+maximizes the objective (the median final bankroll by default) around the
+best scanned fraction.
+
+Every evaluation plays the same outcome paths (the run's path streams, as in
+a sweep), so the objective is a deterministic function of the fraction and
+the comparisons between points are not swamped by sampling noise. Evaluated
+points are cached by a fingerprint of the configuration, seed and strategy,
+so a search repeated with another cap or objective reuses earlier runs. The
+seed is part of the key because points from different paths must not be
+compared: a configuration without a seed gets a fresh one for every search,
+so only searches with a fixed seed share the cache.
+"""
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from .simulator import SimulationConfig, BettingStrategy
+from .random_streams import resolve_seed
+from .sweep import run_sweep_points
+
+
+# Point statistics the search can maximize
+OBJECTIVES = ('median_final_bankroll', 'mean_final_bankroll')
+
+# Search stops once the bracket around the optimum is this narrow
+DEFAULT_TOLERANCE = 1e-3
+
+# Upper bound on the number of evaluated fractions
+DEFAULT_MAX_EVALUATIONS = 40
+
+# Evenly spaced fractions evaluated before the bisection and golden-section search
+COARSE_SCAN_POINTS = 9
+
+# Number of evaluated points kept in the cache
+EVALUATION_CACHE_SIZE = 4096
+
+# 1 / golden ratio
+INVERSE_PHI = (math.sqrt(5) - 1) / 2
+
+_evaluation_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def config_fingerprint(config: SimulationConfig, seed: int) -> Dict[str, Any]:
+    """
+    Everything about a configuration that changes the paths a point plays.
+    """
+    return {
+        'initial_bankroll': config.initial_bankroll,
+        'num_rounds': config.num_rounds,
+        'num_simulations': config.num_simulations,
+        'outcomes': [(o.probability, o.multiplier) for o in config.outcomes],
+        'sampler': config.sampler,
+        'antithetic': config.antithetic,
+        'qmc': config.qmc,
+        'seed': seed,
+    }
+
+
+def evaluation_fingerprint(config: SimulationConfig, seed: int, strategy: BettingStrategy, engine: str) -> str:
+    """
+    Cache key of one evaluated point.
+
+    Strategies are identified by class and pickled state, so two instances
+    with the same parameters share their cache entry. The key includes the
+    resolved seed, so searches on configurations without a seed (which get
+    a fresh seed each time) never hit each other's entries.
+    """
+    state = strategy.__getstate__() if hasattr(strategy, '__getstate__') else vars(strategy)
+    key = {
+        'config': config_fingerprint(config, seed),
+        'strategy': f"{type(strategy).__module__}.{type(strategy).__qualname__}",
+        'state': repr(sorted((state or {}).items())),
+        'engine': engine,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+def clear_evaluation_cache():
+    """Forget every cached evaluation."""
+    with _cache_lock:
+        _evaluation_cache.clear()
+
+
+class BetFractionOptimizer:
+    """
+    Finds the best bet fraction of a strategy on common random numbers.
+    """
+
+    def __init__(self, config: SimulationConfig, strategy_factory: Callable[[float], BettingStrategy],
+                 objective: str = 'median_final_bankroll', max_ruin_probability: Optional[float] = None,
+                 engine: str = 'auto'):
+        """
+        Initialize the optimizer.
+
+        Args:
+            config: Simulation configuration; every evaluation runs its num_simulations paths
+            strategy_factory: Creates the strategy for a bet fraction
+            objective: Point statistic to maximize, one of OBJECTIVES
+            max_ruin_probability: Largest acceptable probability of ruin (None for no cap)
+            engine: 'batch', 'scalar' or 'auto', as for Simulator
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{objective}' (expected one of {', '.join(OBJECTIVES)})")
+        if max_ruin_probability is not None and not 0 <= max_ruin_probability <= 1:
+            raise ValueError(f"max_ruin_probability must be between 0 and 1 (got {max_ruin_probability})")
+        if engine == 'analytic':
+            raise ValueError("The analytic engine cannot drive evaluations off shared outcome paths")
+
+        self.config = config
+        self.strategy_factory = strategy_factory
+        self.objective = objective
+        self.max_ruin_probability = max_ruin_probability
+        self.engine = engine
+        self.seed = resolve_seed(config.seed)
+        self.evaluations: Dict[float, Dict[str, Any]] = {}
+        self.num_simulator_calls = 0
+        self.num_cache_hits = 0
+
+    def evaluate(self, fraction: float) -> Dict[str, Any]:
+        """
+        Statistics of one bet fraction, from the cache when possible.
+
+        Args:
+            fraction: Bet fraction to evaluate
+
+        Returns:
+            dict: Point statistics as in sweep.PointStatistics.summarize
+        """
+        fraction = float(fraction)
+        if fraction in self.evaluations:
+            return self.evaluations[fraction]
+
+        strategy = self.strategy_factory(fraction)
+        key = evaluation_fingerprint(self.config, self.seed, strategy, self.engine)
+        with _cache_lock:
+            point = _evaluation_cache.get(key)
+            if point is not None:
+                _evaluation_cache.move_to_end(key)
+        if point is None:
+            point = run_sweep_points([self.config], [strategy], self.seed, self.engine)[0]
+            self.num_simulator_calls += 1
+            with _cache_lock:
+                _evaluation_cache[key] = point
+                while len(_evaluation_cache) > EVALUATION_CACHE_SIZE:
+                    _evaluation_cache.popitem(last=False)
+        else:
+            self.num_cache_hits += 1
+
+        self.evaluations[fraction] = point
+        return point
+
+    def feasible(self, fraction: float) -> bool:
+        """Whether a fraction's probability of ruin is within the cap."""
+        if self.max_ruin_probability is None:
+            return True
+        return self.evaluate(fraction)['probability_of_ruin'] <= self.max_ruin_probability
+
+    def score(self, fraction: float) -> float:
+        """Objective of a fraction."""
+        return self.evaluate(fraction)[self.objective]
+
+    def optimize(self, lower: float = 0.0, upper: float = 1.0, tolerance: float = DEFAULT_TOLERANCE,
+                 max_evaluations: int = DEFAULT_MAX_EVALUATIONS, progress_callback=None) -> Dict[str, Any]:
+        """
+        Search the bet fraction in [lower, upper].
+
+        Args:
+            lower: Smallest fraction considered
+            upper: Largest fraction considered
+            tolerance: Width of the final bracket
+            max_evaluations: Upper bound on the number of evaluated fractions
+            progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+        Returns:
+            dict: 'optimal_fraction' with its statistics, whether it meets the
+                  ruin cap, and every evaluated point ordered by fraction
+        """
+        if not 0 <= lower < upper <= 1:
+            raise ValueError(f"The search range must satisfy 0 <= lower < upper <= 1 (got {lower}, {upper})")
+        if tolerance <= 0:
+            raise ValueError(f"tolerance must be positive (got {tolerance})")
+
+        start_time = time.time()
+        # The scan, then bisection and golden-section steps that shrink their
+        # brackets geometrically from the scan spacing
+        spacing = (upper - lower) / (COARSE_SCAN_POINTS - 1)
+        expected = COARSE_SCAN_POINTS + 2
+        if spacing > tolerance:
+            expected += math.ceil(math.log(tolerance / (2 * spacing)) / math.log(INVERSE_PHI))
+            if self.max_ruin_probability is not None:
+                expected += math.ceil(math.log2(spacing / tolerance))
+        expected = min(expected, max_evaluations)
+
+        def report():
+            if progress_callback:
+                progress_callback(min(len(self.evaluations) / expected, 1.0))
+
+        # Coarse scan of the whole range
+        scan = [lower + i * spacing for i in range(COARSE_SCAN_POINTS - 1)] + [upper]
+        for fraction in scan:
+            self.evaluate(fraction)
+            report()
+        feasible_scan = [i for i, fraction in enumerate(scan) if self.feasible(fraction)]
+
+        # Largest fraction within the ruin cap, between the last scanned
+        # fraction within it and the next one
+        last = feasible_scan[-1] if feasible_scan else 0
+        feasible_upper = scan[last]
+        if last < len(scan) - 1:
+            low, high = scan[last], scan[last + 1]
+            while high - low > tolerance and len(self.evaluations) < max_evaluations:
+                middle = (low + high) / 2
+                if self.feasible(middle):
+                    low = middle
+                else:
+                    high = middle
+                report()
+            feasible_upper = low
+
+        # Golden-section search for the maximum around the best scanned
+        # fraction within the cap; ties move towards the smaller fraction,
+        # which carries less risk for the same objective
+        a, b = lower, feasible_upper
+        if feasible_scan:
+            best = max(feasible_scan, key=lambda i: (self.score(scan[i]), -i))
+            a = scan[max(best - 1, 0)]
+            b = feasible_upper if best == last else scan[best + 1]
+        c = b - INVERSE_PHI * (b - a)
+        d = a + INVERSE_PHI * (b - a)
+        while b - a > tolerance and len(self.evaluations) < max_evaluations:
+            if self.score(c) >= self.score(d):
+                b, d = d, c
+                c = b - INVERSE_PHI * (b - a)
+            else:
+                a, c = c, d
+                d = a + INVERSE_PHI * (b - a)
+            report()
+
+        # Best feasible point evaluated, including the ends of the range
+        for fraction in (lower, feasible_upper):
+            self.evaluate(fraction)
+        candidates = [f for f in self.evaluations if self.feasible(f)] or [lower]
+        optimal_fraction = max(candidates, key=lambda f: (self.score(f), -f))
+
+        if progress_callback:
+            progress_callback(1.0)
+
+        return {
+            'objective': self.objective,
+            'max_ruin_probability': self.max_ruin_probability,
+            'optimal_fraction': optimal_fraction,
+            'optimal': self.evaluations[optimal_fraction],
+            'feasible': self.feasible(optimal_fraction),
+            'evaluations': [
+                {'bet_fraction': fraction, **self.evaluations[fraction]} for fraction in sorted(self.evaluations)
+            ],
+            'num_simulator_calls': self.num_simulator_calls,
+            'num_cache_hits': self.num_cache_hits,
+            'seed': self.seed,
+            'num_simulations': self.config.num_simulations,
+            'elapsed_time': time.time() - start_time,
+        }
+
+
+def optimize_bet_fraction(config: SimulationConfig, strategy_factory: Callable[[float], BettingStrategy],
+                          objective: str = 'median_final_bankroll',
+                          max_ruin_probability: Optional[float] = None, lower: float = 0.0,
+                          upper: float = 1.0, tolerance: float = DEFAULT_TOLERANCE,
+                          max_evaluations: int = DEFAULT_MAX_EVALUATIONS, engine: str = 'auto',
+                          progress_callback=None) -> Dict[str, Any]:
+    """
+    Find the bet fraction that maximizes an objective under a ruin cap.
+
+    Args:
+        config: Simulation configuration; every evaluation runs its num_simulations paths
+        strategy_factory: Creates the strategy for a bet fraction
+        objective: Point statistic to maximize, one of OBJECTIVES
+        max_ruin_probability: Largest acceptable probability of ruin (None for no cap)
+        lower: Smallest fraction considered
+        upper: Largest fraction considered
+        tolerance: Width of the final bracket
+        max_evaluations: Upper bound on the number of evaluated fractions
+        engine: 'batch', 'scalar' or 'auto', as for Simulator
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+    Returns:
+        dict: Output of BetFractionOptimizer.optimize
+    """
+    optimizer = BetFractionOptimizer(config, strategy_factory, objective, max_ruin_probability, engine)
+    return optimizer.optimize(lower, upper, tolerance, max_evaluations, progress_callback)
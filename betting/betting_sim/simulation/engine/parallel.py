@@ -0,0 +1,133 @@
+"""
+Sharded execution of simulation runs on thread and process pools.
+
+The paths of a run are split into shards aligned to random stream blocks, so a
+sharded run produces exactly the same results as a serial run with the same
+seed. Each shard runs through Simulator.run_paths in a worker and the partial
+results are merged with combine_partial_results.
+"""
+import copy
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from .random_streams import STREAM_BLOCK_PATHS
+
+
+# Shards per worker; more shards give smoother progress and better load balancing
+SHARDS_PER_WORKER = 4
+
+
+def shard_ranges(num_paths: int, num_shards: int, block_paths: int = STREAM_BLOCK_PATHS) -> List[Tuple[int, int]]:
+    """
+    Split paths into contiguous ranges that start on stream block boundaries.
+
+    Args:
+        num_paths: Total number of paths
+        num_shards: Desired number of shards
+        block_paths: Number of paths per stream block
+
+    Returns:
+        list: (path_start, path_stop) tuples covering every path once
+    """
+    num_blocks = -(-num_paths // block_paths)
+    num_shards = max(1, min(num_shards, num_blocks))
+
+    ranges = []
+    for shard_idx in range(num_shards):
+        first_block = shard_idx * num_blocks // num_shards
+        last_block = (shard_idx + 1) * num_blocks // num_shards
+        path_start = first_block * block_paths
+        path_stop = min(last_block * block_paths, num_paths)
+        if path_stop > path_start:
+            ranges.append((path_start, path_stop))
+    return ranges
+
+
+class ShardProgress:
+    """
+    Combine the progress of concurrently running shards into one callback.
+    """
+
+    def __init__(self, progress_callback, total_paths: int):
+        self.progress_callback = progress_callback
+        self.total_paths = total_paths
+        self.shard_done: Dict[int, float] = {}
+        self.lock = threading.Lock()
+
+    def update(self, path_start: int, paths_done: float):
+        """Record the number of paths a shard has finished and report the total."""
+        with self.lock:
+            self.shard_done[path_start] = paths_done
+            if self.progress_callback:
+                self.progress_callback(sum(self.shard_done.values()) / self.total_paths)
+
+    def shard_callback(self, path_start: int, path_stop: int):
+        """Create a progress callback for one shard."""
+        num_paths = path_stop - path_start
+        return lambda fraction: self.update(path_start, fraction * num_paths)
+
+
+def _run_shard(simulator, seed: int, path_start: int, path_stop: int, progress_callback=None) -> Dict[str, Any]:
+    """Run one shard; module-level so process pools can pickle it."""
+    return simulator.run_paths(seed, path_start, path_stop, progress_callback)
+
+
+def run_sharded(simulator, seed: int, progress_callback=None, path_start: int = 0,
+                path_stop: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Run a range of a simulator's paths in shards on its configured executor.
+
+    Thread workers report progress while they run; process workers report
+    progress as each shard completes.
+
+    Args:
+        simulator: Simulator to run, with executor 'thread' or 'process'
+        seed: Run seed the path streams are derived from
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+        path_start: First path to run (must start a stream block)
+        path_stop: One past the last path to run (defaults to all paths)
+
+    Returns:
+        list: Partial results of every shard
+    """
+    if path_stop is None:
+        path_stop = simulator.config.num_simulations
+    num_paths = path_stop - path_start
+    max_workers = simulator.max_workers or os.cpu_count() or 1
+    ranges = [
+        (path_start + start, path_start + stop)
+        for start, stop in shard_ranges(num_paths, max_workers * SHARDS_PER_WORKER)
+    ]
+    progress = ShardProgress(progress_callback, num_paths)
+
+    if simulator.executor == 'thread':
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+    elif simulator.executor == 'process':
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        raise ValueError(f"Cannot shard with executor '{simulator.executor}'")
+
+    partials = []
+    with pool:
+        futures = {}
+        for shard_start, shard_stop in ranges:
+            if simulator.executor == 'thread':
+                # Strategies may keep per-path state, so every thread gets its own copy
+                shard_simulator = copy.copy(simulator)
+                shard_simulator.strategy = copy.deepcopy(simulator.strategy)
+                future = pool.submit(
+                    _run_shard, shard_simulator, seed, shard_start, shard_stop,
+                    progress.shard_callback(shard_start, shard_stop)
+                )
+            else:
+                future = pool.submit(_run_shard, simulator, seed, shard_start, shard_stop)
+            futures[future] = (shard_start, shard_stop)
+
+        for future in as_completed(futures):
+            shard_start, shard_stop = futures[future]
+            partials.append(future.result())
+            progress.update(shard_start, shard_stop - shard_start)
+
+    return partials
@@ -0,0 +1,218 @@
+"""
+Randomized quasi-Monte Carlo (Sobol) streams and their error estimates.
+
+With SimulationConfig(qmc=True), paths draw their uniforms from scrambled
+Sobol sequences instead of pseudo-random streams: every path is one Sobol
+point and every round one of its dimensions, mapped through the outcome CDF.
+Low-discrepancy points cover the space of outcome sequences more evenly, so
+the mean final bankroll and the percentiles converge faster than 1/sqrt(N)
+for short horizons.
+
+A single Sobol sequence has no usable standard error, so the run is split
+into independently scrambled replicates: stream block b belongs to replicate
+b % R and holds points (b // R) * block_paths onwards of that replicate's
+sequence. The spread of the per-replicate estimates gives the randomized-QMC
+standard error. As with the pseudo-random streams, the points of a block
+depend only on the seed and the block index, so results do not depend on how
+the paths are partitioned.
+
+Sobol points are generated whole (all rounds of a path at once), so a range
+of paths holds its uniforms for every round, as much memory as its
+trajectories. SciPy (scipy.stats.qmc) provides the sequences and is only
+needed for QMC runs.
+"""
+import math
+import warnings
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .metrics import RUIN_THRESHOLD
+
+
+# Number of independently scrambled Sobol sequences per run
+QMC_REPLICATES = 8
+
+# Largest number of dimensions (rounds) of scipy's Sobol direction numbers
+SOBOL_MAX_DIMENSIONS = 21201
+
+# Mixed into the run seed so the scrambles do not reuse the path streams
+QMC_STREAM = 0x50B0
+
+# Statistics with a randomized-QMC error estimate, in display order
+QMC_STATISTICS = (
+    'mean_final_bankroll', 'median_final_bankroll', 'percentile_10_final_bankroll',
+    'percentile_90_final_bankroll', 'probability_of_ruin'
+)
+
+
+def qmc_replicates(total_paths: int, block_paths: int) -> int:
+    """
+    Number of replicates of a run, at most one per stream block.
+    """
+    return max(1, min(QMC_REPLICATES, math.ceil(total_paths / block_paths)))
+
+
+class SobolBlockStream:
+    """
+    The Sobol points of one stream block, drawn round by round like a generator.
+    """
+
+    def __init__(self, points: np.ndarray):
+        """
+        Args:
+            points: Points of the block's paths, one row per path and one column per round
+        """
+        self.points = np.ascontiguousarray(points.T)
+        self.next_round = 0
+
+    def random(self, size) -> np.ndarray:
+        """
+        Return the next rounds of uniforms, as numpy.random.Generator.random does.
+
+        Args:
+            size: (num_rounds, width) of the block
+
+        Returns:
+            np.ndarray: Uniforms of shape (num_rounds, width)
+        """
+        num_rounds, width = size
+        if width != self.points.shape[1]:
+            raise ValueError(f"Sobol block holds {self.points.shape[1]} paths (got {width})")
+        if self.next_round + num_rounds > len(self.points):
+            raise ValueError(f"Sobol points cover {len(self.points)} rounds")
+        uniforms = self.points[self.next_round:self.next_round + num_rounds]
+        self.next_round += num_rounds
+        return uniforms
+
+
+def sobol_block_streams(seed: int, first_block: int, widths: Sequence[int], total_paths: int,
+                        dimensions: int, block_paths: int) -> List[SobolBlockStream]:
+    """
+    Create the Sobol streams of consecutive stream blocks.
+
+    Args:
+        seed: Run seed the scrambles are derived from
+        first_block: Index of the first block
+        widths: Number of paths of each block
+        total_paths: Total number of paths in the run
+        dimensions: Number of rounds every path draws
+        block_paths: Number of paths per stream block
+
+    Returns:
+        list: One SobolBlockStream per block
+    """
+    try:
+        from scipy.stats import qmc
+    except ImportError as exc:
+        raise ImportError("Quasi-Monte Carlo sampling needs SciPy (pip install scipy)") from exc
+    dimensions = max(dimensions, 1)
+    if dimensions > SOBOL_MAX_DIMENSIONS:
+        raise ValueError(
+            f"Quasi-Monte Carlo sampling supports at most {SOBOL_MAX_DIMENSIONS} rounds (got {dimensions})"
+        )
+
+    num_replicates = qmc_replicates(total_paths, block_paths)
+    engines = {}
+    streams = []
+    for block_idx, width in enumerate(widths, start=first_block):
+        replicate = block_idx % num_replicates
+        if replicate not in engines:
+            generator = np.random.Generator(np.random.PCG64(np.random.SeedSequence([seed, QMC_STREAM, replicate])))
+            engines[replicate] = qmc.Sobol(dimensions, scramble=True, seed=generator)
+            first_point = (block_idx // num_replicates) * block_paths
+            if first_point:
+                engines[replicate].fast_forward(first_point)
+        # The blocks of a replicate follow each other in its sequence; only the
+        # run's last block can be narrower, which Sobol warns about
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            streams.append(SobolBlockStream(engines[replicate].random(width)))
+    return streams
+
+
+class QMCStatistics:
+    """
+    Mergeable per-replicate final bankrolls of a QMC run.
+    """
+
+    def __init__(self, total_paths: int, block_paths: int):
+        """
+        Initialize empty statistics.
+
+        Args:
+            total_paths: Total number of paths in the run
+            block_paths: Number of paths per stream block
+        """
+        self.block_paths = block_paths
+        self.num_replicates = qmc_replicates(total_paths, block_paths)
+        self.final_bankrolls: List[List[np.ndarray]] = [[] for _ in range(self.num_replicates)]
+
+    def add_partial(self, partial: Dict[str, Any]):
+        """
+        Add the paths of a partial result from Simulator.run_path_range.
+        """
+        final_bankrolls = partial['final_bankrolls']
+        paths = partial['path_start'] + np.arange(len(final_bankrolls))
+        replicates = (paths // self.block_paths) % self.num_replicates
+        for replicate, values in enumerate(self.final_bankrolls):
+            values.append(final_bankrolls[replicates == replicate])
+
+    def merge(self, other: 'QMCStatistics'):
+        """Combine with the statistics of another set of paths."""
+        for values, other_values in zip(self.final_bankrolls, other.final_bankrolls):
+            values.extend(other_values)
+
+    def summarize(self) -> Dict[str, Any]:
+        """
+        Compute the randomized-QMC estimates and their standard errors.
+
+        The Monte Carlo standard error is what independent pseudo-random paths
+        would give for the same number of paths; their squared ratio is the
+        variance-reduction factor. Percentiles have no closed-form Monte Carlo
+        error and report None.
+
+        Returns:
+            dict: The number of replicates and paths, and per statistic the
+                  estimate (mean over replicates), its standard error (None
+                  with a single replicate), the Monte Carlo standard error and
+                  the variance-reduction factor
+        """
+        replicates = [np.concatenate(values) for values in self.final_bankrolls]
+        replicates = [values for values in replicates if len(values)]
+        all_values = np.concatenate(replicates) if replicates else np.zeros(0)
+        num_paths = len(all_values)
+
+        replicate_values = {name: [] for name in QMC_STATISTICS}
+        for values in replicates:
+            percentiles = np.percentile(values, [50, 10, 90])
+            replicate_values['mean_final_bankroll'].append(values.mean())
+            replicate_values['median_final_bankroll'].append(percentiles[0])
+            replicate_values['percentile_10_final_bankroll'].append(percentiles[1])
+            replicate_values['percentile_90_final_bankroll'].append(percentiles[2])
+            replicate_values['probability_of_ruin'].append(np.mean(values <= RUIN_THRESHOLD))
+
+        monte_carlo_errors: Dict[str, Optional[float]] = dict.fromkeys(QMC_STATISTICS)
+        if num_paths:
+            ruin = float(np.mean(all_values <= RUIN_THRESHOLD))
+            monte_carlo_errors['mean_final_bankroll'] = float(all_values.std(ddof=1) / math.sqrt(num_paths)) \
+                if num_paths > 1 else None
+            monte_carlo_errors['probability_of_ruin'] = math.sqrt(ruin * (1 - ruin) / num_paths)
+
+        summary: Dict[str, Any] = {'replicates': len(replicates), 'num_paths': num_paths}
+        for name in QMC_STATISTICS:
+            values = np.array(replicate_values[name])
+            standard_error = None
+            if len(values) > 1:
+                standard_error = float(values.std(ddof=1) / math.sqrt(len(values)))
+            monte_carlo_error = monte_carlo_errors[name]
+            factor = None
+            if standard_error and monte_carlo_error is not None:
+                factor = (monte_carlo_error / standard_error) ** 2
+            summary[name] = {
+                'estimate': float(values.mean()) if len(values) else None,
+                'standard_error': standard_error,
+                'monte_carlo_standard_error': monte_carlo_error,
+                'variance_reduction_factor': factor,
+            }
+        return summary
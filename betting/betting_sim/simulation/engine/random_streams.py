@@ -0,0 +1,185 @@
+"""
+Reproducible random number streams for simulation paths.
+
+Paths are grouped into fixed-size stream blocks. Every block gets its own
+numpy.random.Generator, derived from the run seed via SeedSequence spawning,
+and draws its uniforms round by round. Because a block's draws never depend on
+which other blocks run alongside it, results are bit-identical however the
+paths are partitioned, as long as partitions start on a block boundary.
+
+With antithetic draws, paths 2k and 2k + 1 of every block use mirrored
+uniforms u and 1 - u, which makes their outcomes negatively correlated under
+the monotone CDF sampler. Quasi-Monte Carlo runs replace each block's
+generator with scrambled Sobol points (see qmc.py).
+"""
+import secrets
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# Number of paths sharing one random stream
+STREAM_BLOCK_PATHS = 256
+
+# Seeds are kept within a signed 64-bit integer so they fit a database column
+MAX_SEED = 2 ** 63 - 1
+
+
+def resolve_seed(seed: Optional[int] = None) -> int:
+    """
+    Return the seed to use for a run, drawing a fresh one if none was given.
+
+    Args:
+        seed: Requested seed, or None for a random one
+
+    Returns:
+        int: Seed between 0 and MAX_SEED
+    """
+    if seed is None:
+        return secrets.randbelow(MAX_SEED + 1)
+    seed = int(seed)
+    if not 0 <= seed <= MAX_SEED:
+        raise ValueError(f"Seed must be between 0 and {MAX_SEED} (got {seed})")
+    return seed
+
+
+def block_generator(seed: int, block_idx: int) -> np.random.Generator:
+    """
+    Create the generator for one stream block.
+
+    Equivalent to np.random.SeedSequence(seed).spawn(n)[block_idx] for any
+    n > block_idx, without having to spawn the preceding blocks.
+
+    Args:
+        seed: Run seed
+        block_idx: Index of the stream block
+
+    Returns:
+        np.random.Generator: Independent generator for the block
+    """
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(block_idx,))))
+
+
+def _splitmix64(values: np.ndarray) -> np.ndarray:
+    """Apply the SplitMix64 finalizer to an array of uint64 values."""
+    with np.errstate(over='ignore'):
+        values = values + np.uint64(0x9E3779B97F4A7C15)
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+
+def path_keys(seed: int, path_indices) -> np.ndarray:
+    """
+    Derive a pseudo-random sort key for each path.
+
+    Keys depend only on the seed and the path index, so samples chosen by
+    smallest key are the same however the paths are partitioned.
+
+    Args:
+        seed: Run seed
+        path_indices: Indices of the paths
+
+    Returns:
+        np.ndarray: uint64 key per path
+    """
+    seed_key = _splitmix64(np.array([seed], dtype=np.uint64))[0]
+    return _splitmix64(np.asarray(path_indices, dtype=np.uint64) ^ seed_key)
+
+
+class PathStreams:
+    """
+    Random streams for a contiguous range of paths.
+    """
+
+    def __init__(self, seed: int, path_start: int, path_stop: int, total_paths: int,
+                 block_paths: int = STREAM_BLOCK_PATHS, antithetic: bool = False,
+                 qmc_dimensions: Optional[int] = None):
+        """
+        Initialize the streams for paths path_start to path_stop - 1.
+
+        Args:
+            seed: Run seed
+            path_start: First path (must be a multiple of block_paths)
+            path_stop: One past the last path
+            total_paths: Total number of paths in the run
+            block_paths: Number of paths sharing one stream (must be even for
+                         antithetic pairs to stay within a block)
+            antithetic: Give paths 2k and 2k + 1 mirrored uniforms
+            qmc_dimensions: Draw scrambled Sobol points with this many
+                            dimensions (the number of rounds) instead of
+                            pseudo-random uniforms (see qmc.py)
+        """
+        if path_start % block_paths != 0:
+            raise ValueError(f"Path ranges must start on a multiple of {block_paths} (got {path_start})")
+
+        self.seed = seed
+        self.path_start = path_start
+        self.path_stop = path_stop
+        self.num_paths = path_stop - path_start
+        self.antithetic = antithetic
+
+        widths = []
+        for block_start in range(path_start, path_stop, block_paths):
+            # The block width depends only on total_paths, never on the partition
+            width = min(block_paths, total_paths - block_start)
+            if block_start + width > path_stop:
+                raise ValueError("Path ranges must end on a stream block boundary")
+            widths.append(width)
+
+        first_block = path_start // block_paths
+        if qmc_dimensions is None:
+            generators = [block_generator(seed, first_block + i) for i in range(len(widths))]
+        else:
+            from .qmc import sobol_block_streams
+            generators = sobol_block_streams(seed, first_block, widths, total_paths, qmc_dimensions, block_paths)
+        self.blocks: List[Tuple[int, np.random.Generator]] = list(zip(widths, generators))
+
+    def uniforms(self, num_rounds: int) -> np.ndarray:
+        """
+        Draw the next num_rounds rounds of uniforms for every path.
+
+        Args:
+            num_rounds: Number of rounds to draw
+
+        Returns:
+            np.ndarray: Uniforms of shape (num_rounds, num_paths)
+        """
+        if not self.blocks:
+            return np.empty((num_rounds, 0))
+        return np.concatenate(
+            [self.block_uniforms(generator, width, num_rounds) for width, generator in self.blocks], axis=1
+        )
+
+    def block_uniforms(self, generator: np.random.Generator, width: int, num_rounds: int) -> np.ndarray:
+        """
+        Draw the next num_rounds rounds of uniforms for the paths of one block.
+
+        Args:
+            generator: Generator of the block
+            width: Number of paths in the block
+            num_rounds: Number of rounds to draw
+
+        Returns:
+            np.ndarray: Uniforms of shape (num_rounds, width)
+        """
+        if not self.antithetic:
+            return generator.random((num_rounds, width))
+        half = generator.random((num_rounds, (width + 1) // 2))
+        uniforms = np.empty((num_rounds, 2 * half.shape[1]))
+        uniforms[:, 0::2] = half
+        # 1 - u can be exactly 1, which is outside the samplers' [0, 1) domain
+        uniforms[:, 1::2] = np.minimum(1.0 - half, np.nextafter(1.0, 0.0))
+        return uniforms[:, :width]
+
+    def iter_blocks(self):
+        """
+        Iterate over stream blocks.
+
+        Yields:
+            tuple: (offset of the block's first path within this range, width, generator)
+        """
+        offset = 0
+        for width, generator in self.blocks:
+            yield offset, width, generator
+            offset += width
@@ -0,0 +1,198 @@
+"""
+Risk metrics of a run, folded in from the per-path metrics of each path range.
+
+RiskStatistics keeps a few running sums per run (and a count of ruined paths
+per round), so the metrics come out of the same pass over the paths as the
+other statistics, merge across shards and chunks, and never need a path's
+history:
+
+- Value-at-Risk and CVaR of the final bankroll, as losses against the initial
+  bankroll at each confidence level
+- the distribution of the time to ruin, the round in which each ruined path
+  went bust
+- the realized log-growth rate of each path, log(final / initial) per round
+- the mean and standard deviation of the per-round log returns, pooled over
+  every round played, and their ratio (a per-round Sharpe-like ratio)
+
+Log returns floor the bankroll at the ruin threshold (see metrics.py), so ruined
+paths contribute a large but finite loss. VaR, CVaR and the median growth rate
+need the final bankrolls themselves: they are exact when every path is kept,
+and come from the reservoir sample of a streaming run otherwise.
+"""
+import math
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from .metrics import RUIN_THRESHOLD
+
+
+# Confidence levels of Value-at-Risk and CVaR
+RISK_CONFIDENCE_LEVELS = (0.95, 0.99)
+
+
+def tail_risk(final_bankrolls: np.ndarray, initial_bankroll: float, confidence: float):
+    """
+    Value-at-Risk and CVaR of the final bankroll.
+
+    The worst ceil((1 - confidence) * n) paths form the tail: VaR is the loss
+    of the best of them and CVaR their mean loss.
+
+    Args:
+        final_bankrolls: Final bankroll of each path
+        initial_bankroll: Initial bankroll the losses are measured against
+        confidence: Confidence level, e.g. 0.95
+
+    Returns:
+        tuple: (value_at_risk, conditional_value_at_risk)
+    """
+    num_tail = max(1, math.ceil((1 - confidence) * len(final_bankrolls) - 1e-9))
+    tail = np.partition(final_bankrolls, num_tail - 1)[:num_tail]
+    return float(initial_bankroll - tail.max()), float(initial_bankroll - tail.mean())
+
+
+class RiskStatistics:
+    """
+    Mergeable running sums behind the risk metrics of a run.
+    """
+
+    def __init__(self, initial_bankroll: float, num_rounds: int):
+        """
+        Initialize empty statistics.
+
+        Args:
+            initial_bankroll: Initial bankroll of every path
+            num_rounds: Number of rounds per path
+        """
+        self.initial_bankroll = float(initial_bankroll)
+        self.num_rounds = num_rounds
+        self.count = 0
+        self.growth_sum = 0.0
+        self.growth_square_sum = 0.0
+        self.num_returns = 0
+        self.return_square_sum = 0.0
+        self.ruin_counts = np.zeros(num_rounds + 1, dtype=np.int64)
+
+    def add(self, final_bankrolls: np.ndarray, rounds_played: np.ndarray, log_return_squares: np.ndarray):
+        """
+        Fold in the paths of a path range.
+
+        Args:
+            final_bankrolls: Final bankroll of each path
+            rounds_played: Rounds each path played
+            log_return_squares: Sum of each path's squared per-round log returns
+        """
+        # A path's log returns add up to the log of its floored final over its initial bankroll
+        log_growth = np.log(np.maximum(final_bankrolls, RUIN_THRESHOLD) / self.initial_bankroll)
+        self.count += len(final_bankrolls)
+        self.growth_sum += float(log_growth.sum())
+        self.growth_square_sum += float(np.dot(log_growth, log_growth))
+        self.num_returns += int(rounds_played.sum())
+        self.return_square_sum += float(log_return_squares.sum())
+        ruined = final_bankrolls <= RUIN_THRESHOLD
+        self.ruin_counts += np.bincount(rounds_played[ruined], minlength=self.num_rounds + 1)
+
+    def add_partial(self, partial: Dict[str, Any]):
+        """
+        Fold in the paths of a partial result of Simulator.run_path_range.
+        """
+        self.add(partial['final_bankrolls'], partial['rounds_played'], partial['log_return_squares'])
+
+    def merge(self, other: 'RiskStatistics'):
+        """Combine with the statistics of another set of paths."""
+        self.count += other.count
+        self.growth_sum += other.growth_sum
+        self.growth_square_sum += other.growth_square_sum
+        self.num_returns += other.num_returns
+        self.return_square_sum += other.return_square_sum
+        self.ruin_counts += other.ruin_counts
+
+    def time_to_ruin(self) -> Dict[str, Any]:
+        """
+        Summary of the rounds in which ruined paths went bust.
+
+        Returns:
+            dict: Mean, median, 10th and 90th percentile over the ruined
+                  paths (None without ruin), and the number of paths ruined in
+                  each round
+        """
+        num_ruined = int(self.ruin_counts.sum())
+        summary = {'mean': None, 'median': None, 'percentile_10': None, 'percentile_90': None}
+        if num_ruined:
+            rounds = np.arange(self.num_rounds + 1)
+            cumulative = np.cumsum(self.ruin_counts)
+            summary['mean'] = float(np.dot(rounds, self.ruin_counts) / num_ruined)
+            for key, fraction in (('percentile_10', 0.1), ('median', 0.5), ('percentile_90', 0.9)):
+                summary[key] = int(np.searchsorted(cumulative, fraction * num_ruined))
+        summary['counts'] = self.ruin_counts.tolist()
+        return summary
+
+    def summarize(self, final_bankrolls: np.ndarray,
+                  confidence_levels: Sequence[float] = RISK_CONFIDENCE_LEVELS) -> Dict[str, Any]:
+        """
+        Compute the risk metrics.
+
+        Args:
+            final_bankrolls: Final bankrolls of every path, or a uniform sample of them
+            confidence_levels: Confidence levels of VaR and CVaR
+
+        Returns:
+            dict: VaR and CVaR keyed by confidence level, log-growth and
+                  log-return statistics, the Sharpe-like ratio, the time to ruin
+                  and the number of paths they were computed from
+        """
+        value_at_risk = {}
+        conditional_value_at_risk = {}
+        for confidence in confidence_levels:
+            key = f"{confidence * 100:g}"
+            value_at_risk[key], conditional_value_at_risk[key] = tail_risk(
+                final_bankrolls, self.initial_bankroll, confidence
+            )
+
+        rounds = max(self.num_rounds, 1)
+        count = max(self.count, 1)
+        mean_growth = self.growth_sum / count
+        growth_variance = max(self.growth_square_sum / count - mean_growth ** 2, 0.0)
+        median_final = float(np.median(final_bankrolls))
+
+        mean_return = self.growth_sum / self.num_returns if self.num_returns else 0.0
+        return_variance = 0.0
+        if self.num_returns:
+            return_variance = max(self.return_square_sum / self.num_returns - mean_return ** 2, 0.0)
+        std_return = math.sqrt(return_variance)
+
+        return {
+            'confidence_levels': list(confidence_levels),
+            'value_at_risk': value_at_risk,
+            'conditional_value_at_risk': conditional_value_at_risk,
+            'mean_log_growth': mean_growth / rounds,
+            'median_log_growth': math.log(max(median_final, RUIN_THRESHOLD) / self.initial_bankroll) / rounds,
+            'std_log_growth': math.sqrt(growth_variance) / rounds,
+            'mean_log_return': mean_return,
+            'std_log_return': std_return,
+            'sharpe_ratio': mean_return / std_return if std_return > 0 else None,
+            'time_to_ruin': self.time_to_ruin(),
+            'num_paths': self.count,
+        }
+
+
+def risk_metrics(initial_bankroll: float, num_rounds: int, final_bankrolls: np.ndarray,
+                 rounds_played: np.ndarray, log_return_squares: np.ndarray,
+                 confidence_levels: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+    """
+    Risk metrics of a set of paths whose per-path metrics are all at hand.
+
+    Args:
+        initial_bankroll: Initial bankroll of every path
+        num_rounds: Number of rounds per path
+        final_bankrolls: Final bankroll of each path
+        rounds_played: Rounds each path played
+        log_return_squares: Sum of each path's squared per-round log returns
+        confidence_levels: Confidence levels of VaR and CVaR
+
+    Returns:
+        dict: Output of RiskStatistics.summarize
+    """
+    statistics = RiskStatistics(initial_bankroll, num_rounds)
+    statistics.add(final_bankrolls, rounds_played, log_return_squares)
+    return statistics.summarize(final_bankrolls, confidence_levels or RISK_CONFIDENCE_LEVELS)
@@ -0,0 +1,158 @@
+"""
+Outcome samplers that turn uniform random numbers into outcome indices.
+
+Samplers are built once from a list of outcomes and can then map single
+uniforms or whole blocks of them to outcome indices. The uniforms come from
+the seeded path streams (see random_streams), never from a global state.
+"""
+import bisect
+from abc import ABC, abstractmethod
+from typing import Sequence
+
+import numpy as np
+
+
+# Outcome count from which the alias table beats a CDF binary search
+ALIAS_MIN_OUTCOMES = 8
+
+
+class OutcomeSampler(ABC):
+    """Abstract base class for outcome samplers."""
+
+    def __init__(self, outcomes: Sequence):
+        """
+        Initialize the sampler from outcome configurations.
+
+        Args:
+            outcomes: Objects with 'probability' and 'multiplier' attributes
+        """
+        if not outcomes:
+            raise ValueError("At least one outcome must be specified")
+
+        probabilities = np.array([o.probability for o in outcomes], dtype=float)
+        if np.any(probabilities < 0):
+            raise ValueError("Outcome probabilities must not be negative")
+
+        self.num_outcomes = len(outcomes)
+        self.probabilities = probabilities / probabilities.sum()
+        self.multipliers = np.array([o.multiplier for o in outcomes], dtype=float)
+
+    @abstractmethod
+    def indices_from_uniforms(self, uniforms: np.ndarray) -> np.ndarray:
+        """
+        Map uniform numbers in [0, 1) to outcome indices.
+
+        Args:
+            uniforms: Array of uniform random numbers
+
+        Returns:
+            np.ndarray: Outcome indices with the same shape as uniforms
+        """
+        pass
+
+    @abstractmethod
+    def index_from_uniform(self, uniform: float) -> int:
+        """
+        Map a single uniform number in [0, 1) to an outcome index.
+
+        Args:
+            uniform: Uniform random number
+
+        Returns:
+            int: Outcome index
+        """
+        pass
+
+
+class CDFSampler(OutcomeSampler):
+    """
+    Sampler that inverts the cumulative distribution with a binary search.
+    """
+
+    def __init__(self, outcomes: Sequence):
+        super().__init__(outcomes)
+        self.cdf = np.cumsum(self.probabilities)
+        self.cdf[-1] = 1.0  # Guard against floating point drift
+        self._cdf_list = self.cdf.tolist()
+
+    def indices_from_uniforms(self, uniforms: np.ndarray) -> np.ndarray:
+        indices = np.searchsorted(self.cdf, uniforms, side='right')
+        return np.minimum(indices, self.num_outcomes - 1)
+
+    def index_from_uniform(self, uniform: float) -> int:
+        return min(bisect.bisect_right(self._cdf_list, uniform), self.num_outcomes - 1)
+
+
+class AliasSampler(OutcomeSampler):
+    """
+    Walker alias table sampler (Vose's construction), O(1) per draw.
+
+    A single uniform number picks both the table column (integer part of
+    u * K) and the coin flip between the column and its alias (fractional part).
+    """
+
+    def __init__(self, outcomes: Sequence):
+        super().__init__(outcomes)
+        num_outcomes = self.num_outcomes
+
+        scaled = self.probabilities * num_outcomes
+        accept = np.ones(num_outcomes)
+        alias = np.arange(num_outcomes)
+
+        small = [i for i in range(num_outcomes) if scaled[i] < 1.0]
+        large = [i for i in range(num_outcomes) if scaled[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            accept[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # Leftovers are 1.0 up to rounding error
+        for i in small + large:
+            accept[i] = 1.0
+
+        self.accept = accept
+        self.alias = alias
+        self._accept_list = accept.tolist()
+        self._alias_list = alias.tolist()
+
+    def indices_from_uniforms(self, uniforms: np.ndarray) -> np.ndarray:
+        scaled = np.asarray(uniforms) * self.num_outcomes
+        columns = np.minimum(scaled.astype(np.int64), self.num_outcomes - 1)
+        coin = scaled - columns
+        return np.where(coin < self.accept[columns], columns, self.alias[columns])
+
+    def index_from_uniform(self, uniform: float) -> int:
+        scaled = uniform * self.num_outcomes
+        column = min(int(scaled), self.num_outcomes - 1)
+        if scaled - column < self._accept_list[column]:
+            return column
+        return self._alias_list[column]
+
+
+SAMPLER_CHOICES = {
+    'cdf': CDFSampler,
+    'alias': AliasSampler,
+}
+
+
+def create_sampler(outcomes: Sequence, method: str = 'auto') -> OutcomeSampler:
+    """
+    Create an outcome sampler.
+
+    Args:
+        outcomes: Objects with 'probability' and 'multiplier' attributes
+        method: 'cdf', 'alias', or 'auto' to use the alias table for many outcomes
+
+    Returns:
+        OutcomeSampler: The sampler
+    """
+    if method == 'auto':
+        method = 'alias' if len(outcomes) >= ALIAS_MIN_OUTCOMES else 'cdf'
+    if method not in SAMPLER_CHOICES:
+        raise ValueError(f"Unknown sampler '{method}' (expected one of {', '.join(SAMPLER_CHOICES)})")
+    return SAMPLER_CHOICES[method](outcomes)
@@ -0,0 +1,174 @@
+"""
+Pathwise sensitivities of a run to the bet fraction.
+
+A stationary strategy (Fixed Fraction, Kelly) bets one constant fraction f,
+so a round with multiplier m takes the bankroll B to B (1 + f (m - 1)). Given
+the outcome draws, the final bankroll of a path is a differentiable function
+of f, and its derivative is carried along with the bankroll in forward mode:
+
+    dB'/df = dB/df * (1 + f (m - 1)) + B (m - 1)
+
+Rounds a path does not play leave both unchanged. The mean of the pathwise
+derivatives estimates the derivative of the mean final bankroll, and the mean
+of dB_T / B_T over the surviving paths (ruined paths, floored at the ruin
+threshold, contribute zero) that of the mean log-growth per round as in
+risk.py. Both come out of the same paths as the run itself, instead of a
+sweep of runs over f.
+
+The estimate holds the round in which each path is ruined fixed: it leaves
+out the change in the number of paths crossing the ruin threshold, which
+only matters when many paths end close to it. At f = 1 the derivative is the
+one-sided derivative from below.
+"""
+import math
+from typing import Any, Dict
+
+import numpy as np
+
+from .metrics import RUIN_THRESHOLD
+
+
+# Quantities with a pathwise derivative, in display order
+SENSITIVITY_STATISTICS = ('mean_final_bankroll', 'mean_log_growth')
+
+
+def stationary_fraction(config, strategy) -> float:
+    """
+    Get the constant bet fraction of a stationary strategy.
+
+    Args:
+        config: Simulation configuration
+        strategy: Betting strategy
+
+    Returns:
+        float: The fraction the strategy bets every round, clipped to [0, 1]
+    """
+    if not strategy.is_stationary():
+        raise ValueError(
+            f"Pathwise sensitivities need a strategy betting a constant fraction "
+            f"({type(strategy).__name__} is not stationary)"
+        )
+    bankrolls = np.array([float(config.initial_bankroll)])
+    fractions = strategy.get_bet_fractions(bankrolls, 0, strategy.init_states(1))
+    return float(np.clip(fractions, 0.0, 1.0)[0])
+
+
+def advance_derivatives(derivatives: np.ndarray, bankrolls: np.ndarray, multipliers: np.ndarray,
+                        fractions, active: np.ndarray) -> np.ndarray:
+    """
+    Carry the derivatives of the bankrolls through one round.
+
+    Args:
+        derivatives: Derivative of each path's bankroll before the round
+        bankrolls: Bankroll of each path before the round
+        multipliers: Payout multiplier of each path's outcome
+        fractions: Bet fraction of each path (or one for all)
+        active: Whether each path plays the round
+
+    Returns:
+        np.ndarray: Derivative of each path's bankroll after the round
+    """
+    returns = multipliers - 1.0
+    return np.where(active, derivatives * (1.0 + fractions * returns) + bankrolls * returns, derivatives)
+
+
+def pathwise_derivatives(trajectories: np.ndarray, round_multipliers: np.ndarray, fraction: float) -> np.ndarray:
+    """
+    Derivatives of the final bankrolls of paths whose trajectories are at hand.
+
+    Args:
+        trajectories: Bankroll of each path after each round, one row per path
+                      and padded with zeros after ruin
+        round_multipliers: Payout multipliers, one row per round and one column per path
+        fraction: Constant bet fraction of the paths
+
+    Returns:
+        np.ndarray: Derivative of each path's final bankroll with respect to the fraction
+    """
+    derivatives = np.zeros(len(trajectories))
+    for round_idx in range(round_multipliers.shape[0]):
+        bankrolls = trajectories[:, round_idx]
+        derivatives = advance_derivatives(
+            derivatives, bankrolls, round_multipliers[round_idx], fraction, bankrolls > RUIN_THRESHOLD
+        )
+    return derivatives
+
+
+class SensitivityStatistics:
+    """
+    Mergeable running sums of the pathwise derivatives of a run.
+    """
+
+    def __init__(self, fraction: float, initial_bankroll: float, num_rounds: int):
+        """
+        Initialize empty statistics.
+
+        Args:
+            fraction: Bet fraction the derivatives are taken at
+            initial_bankroll: Initial bankroll of every path
+            num_rounds: Number of rounds per path
+        """
+        self.fraction = fraction
+        self.initial_bankroll = float(initial_bankroll)
+        self.num_rounds = num_rounds
+        self.count = 0
+        self.sums = np.zeros(2 * len(SENSITIVITY_STATISTICS))
+        self.square_sums = np.zeros(2 * len(SENSITIVITY_STATISTICS))
+
+    def add(self, final_bankrolls: np.ndarray, derivatives: np.ndarray):
+        """
+        Fold in the paths of a path range.
+
+        Args:
+            final_bankrolls: Final bankroll of each path
+            derivatives: Derivative of each path's final bankroll
+        """
+        surviving = final_bankrolls > RUIN_THRESHOLD
+        rounds = max(self.num_rounds, 1)
+        log_growth = np.log(np.maximum(final_bankrolls, RUIN_THRESHOLD) / self.initial_bankroll) / rounds
+        growth_derivatives = np.zeros(len(final_bankrolls))
+        np.divide(derivatives, final_bankrolls * rounds, out=growth_derivatives, where=surviving)
+
+        # Values and derivatives, in the order of SENSITIVITY_STATISTICS
+        columns = np.stack([final_bankrolls, log_growth, derivatives, growth_derivatives])
+        self.count += len(final_bankrolls)
+        self.sums += columns.sum(axis=1)
+        self.square_sums += (columns * columns).sum(axis=1)
+
+    def add_partial(self, partial: Dict[str, Any]):
+        """
+        Fold in the paths of a partial result of Simulator.run_path_range.
+        """
+        self.add(partial['final_bankrolls'], partial['bankroll_derivatives'])
+
+    def merge(self, other: 'SensitivityStatistics'):
+        """Combine with the statistics of another set of paths."""
+        self.count += other.count
+        self.sums += other.sums
+        self.square_sums += other.square_sums
+
+    def summarize(self) -> Dict[str, Any]:
+        """
+        Compute the estimated values and derivatives.
+
+        Returns:
+            dict: The bet fraction and number of paths, and per quantity its
+                  value, its derivative with respect to the bet fraction and
+                  the standard error of the derivative (None with one path)
+        """
+        count = max(self.count, 1)
+        means = self.sums / count
+        standard_errors = [None] * len(means)
+        if self.count > 1:
+            variances = np.maximum(self.square_sums - count * means ** 2, 0.0) / (count - 1)
+            standard_errors = [math.sqrt(variance / count) for variance in variances]
+
+        summary: Dict[str, Any] = {'bet_fraction': self.fraction, 'num_paths': self.count}
+        num_statistics = len(SENSITIVITY_STATISTICS)
+        for i, name in enumerate(SENSITIVITY_STATISTICS):
+            summary[name] = {
+                'value': float(means[i]),
+                'derivative': float(means[num_statistics + i]),
+                'standard_error': standard_errors[num_statistics + i],
+            }
+        return summary
@@ -2,12 +2,25 @@
 Core simulation engine for betting simulations.
 """
 import numpy as np
-from dataclasses import dataclass
-from typing import List, Dict, Any, Optional, Callable, Union, Tuple
-import random
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Callable, Union, Tuple, Sequence, Mapping
 import time
 from abc import ABC, abstractmethod
 
+from .samplers import OutcomeSampler, create_sampler
+from .random_streams import PathStreams, resolve_seed, STREAM_BLOCK_PATHS
+from .sketches import TrajectorySketch
+from .history import ColumnarHistory
+from .metrics import trajectory_metrics, individual_path_metrics, summarize_path_metrics, RUIN_THRESHOLD
+from .risk import risk_metrics
+from .bootstrap import bootstrap_confidence_intervals, BOOTSTRAP_STATISTICS
+from .adaptive import PrecisionTarget
+from .qmc import QMCStatistics
+from .sensitivity import SensitivityStatistics, stationary_fraction, pathwise_derivatives
+from .variance_reduction import (
+    VarianceReductionStats, control_log_factors, expected_control, apply_variance_reduction
+)
+
 
 @dataclass
 class OutcomeConfig:
@@ -24,6 +37,11 @@ class SimulationConfig:
     num_rounds: int = 100
     num_simulations: int = 1000
     outcomes: List[OutcomeConfig] = None
+    sampler: str = 'auto'
+    seed: Optional[int] = None
+    antithetic: bool = False
+    qmc: bool = False
+    _samplers: Dict[Any, OutcomeSampler] = field(default_factory=dict, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.outcomes is None:
@@ -33,11 +51,55 @@ class SimulationConfig:
         total_prob = sum(outcome.probability for outcome in self.outcomes)
         if not (0.99 <= total_prob <= 1.01):  # Allow for slight rounding errors
             raise ValueError(f"Outcome probabilities must sum to 1 (currently {total_prob})")
+        
+        if self.qmc and self.antithetic:
+            raise ValueError("Quasi-Monte Carlo sampling cannot be combined with antithetic draws")
+    
+    def get_sampler(self) -> OutcomeSampler:
+        """
+        Get the outcome sampler for this configuration, building it on first use.
+        
+        Returns:
+            OutcomeSampler: Sampler for the configured outcomes
+        """
+        # Antithetic pairs and Sobol points need a sampler that is monotone in the uniform
+        method = 'cdf' if (self.antithetic or self.qmc) and self.sampler == 'auto' else self.sampler
+        
+        # Key on the outcome values so edits to the outcome list rebuild the sampler
+        key = (method, tuple((o.probability, o.multiplier) for o in self.outcomes))
+        if key not in self._samplers:
+            self._samplers.clear()
+            self._samplers[key] = create_sampler(self.outcomes, method)
+        return self._samplers[key]
+    
+    def qmc_dimensions(self) -> Optional[int]:
+        """
+        Sobol dimensions of the path streams, or None for pseudo-random streams.
+        """
+        return self.num_rounds if self.qmc else None
 
 
 class BettingStrategy(ABC):
     """Abstract base class for betting strategies."""
     
+    # Strategies that never look at history can set this to False so the
+    # engine skips recording it for paths that are not reported
+    uses_history = True
+    
+    # Strategies whose bet fraction never changes (same for every bankroll,
+    # round and history) can set this to True to run on the analytic engine
+    stationary = False
+    
+    # Strategies whose bet fraction only depends on the current bankroll (not
+    # on the round, history or state) can set this to True to run on the
+    # Markov-chain engine; stationary strategies always qualify
+    bankroll_only = False
+    
+    # Attributes that get_bet_fractions and on_round_results only use
+    # elementwise: strategies of one class that differ only in them can run
+    # as one batch strategy with per-path arrays in their place
+    batch_parameters: Tuple[str, ...] = ()
+    
     @abstractmethod
     def get_bet_fraction(self, bankroll: float, round_idx: int, history: List[Dict[str, Any]]) -> float:
         """
@@ -46,8 +108,8 @@ class BettingStrategy(ABC):
         Args:
             bankroll: Current bankroll amount
             round_idx: Current round index (0-based)
-            history: List of dictionaries with past results
-                    Each dict has:
+            history: Sequence of past results (a ColumnarHistory), indexable
+                    like a list of dictionaries. Each row has:
                     - 'bankroll': bankroll after the round
                     - 'bet_amount': amount bet
                     - 'outcome_idx': index of the outcome that occurred
@@ -57,18 +119,275 @@ class BettingStrategy(ABC):
             float: Fraction of bankroll to bet (0.0 to 1.0)
         """
         pass
+    
+    def init_state(self) -> Any:
+        """
+        Create the state of a new path.
+        
+        The engine keeps one state per path and threads it through
+        on_round_result and get_state_bet_fraction, so strategies never need
+        to share mutable state between paths.
+        
+        Returns:
+            The initial per-path state (None for strategies without state)
+        """
+        return None
+    
+    def on_round_result(self, state: Any, outcome_idx: int, multiplier: float, bankroll: float) -> Any:
+        """
+        Update the per-path state after a round.
+        
+        Args:
+            state: Current state of the path
+            outcome_idx: Index of the outcome that occurred
+            multiplier: The multiplier applied
+            bankroll: Bankroll after the round
+            
+        Returns:
+            The updated state
+        """
+        return state
+    
+    def get_state_bet_fraction(self, bankroll: float, round_idx: int, state: Any,
+                               history: Sequence[Mapping[str, Any]]) -> float:
+        """
+        Calculate the bet fraction of a path from its state.
+        
+        This is the method the engine calls. By default it adapts strategies
+        written against get_bet_fraction, which ignore the state and read
+        the history instead.
+        
+        Args:
+            bankroll: Current bankroll amount
+            round_idx: Current round index (0-based)
+            state: Current state of the path
+            history: Past results of the path (empty unless uses_history is set)
+            
+        Returns:
+            float: Fraction of bankroll to bet (0.0 to 1.0)
+        """
+        return self.get_bet_fraction(bankroll, round_idx, history)
+    
+    def replay_state(self, history: Sequence[Mapping[str, Any]]) -> Any:
+        """
+        Rebuild the state of a path from its history.
+        
+        Args:
+            history: Past results of the path
+            
+        Returns:
+            The state after the last round of the history
+        """
+        state = self.init_state()
+        for row in history:
+            state = self.on_round_result(state, row['outcome_idx'], row['multiplier'], row['bankroll'])
+        return state
+    
+    def init_states(self, num_paths: int) -> Any:
+        """
+        Create the states of a batch of new paths, for get_bet_fractions.
+        
+        Args:
+            num_paths: Number of paths in the batch
+            
+        Returns:
+            The initial states, e.g. one array entry per path (None by default)
+        """
+        return None
+    
+    def on_round_results(self, states: Any, outcome_idx: np.ndarray, multipliers: np.ndarray,
+                         bankrolls: np.ndarray) -> Any:
+        """
+        Update the states of a batch of paths after a round.
+        
+        Args:
+            states: Current states of the paths
+            outcome_idx: Index of the outcome that occurred on each path
+            multipliers: The multiplier applied on each path
+            bankrolls: Bankroll of each path after the round
+            
+        Returns:
+            The updated states
+        """
+        return states
+    
+    def compact_states(self, states: Any, keep: np.ndarray) -> Any:
+        """
+        Keep the states of a subset of the paths of a batch.
+        
+        The batch engine calls this when it drops finished paths from the
+        batch. The default handles None, arrays with one entry per path, and
+        dictionaries of those; other states raise NotImplementedError, and
+        the engine then keeps every path in the batch.
+        
+        Args:
+            states: Current states of the paths
+            keep: Boolean mask of the paths to keep
+            
+        Returns:
+            The states of the kept paths, in order
+        """
+        if states is None:
+            return None
+        if isinstance(states, np.ndarray):
+            return states[keep]
+        if isinstance(states, dict):
+            return {key: self.compact_states(value, keep) for key, value in states.items()}
+        raise NotImplementedError(f"{type(self).__name__} cannot compact states of type {type(states).__name__}")
+    
+    def get_bet_fractions(self, bankrolls: np.ndarray, round_idx: int, states: Any) -> np.ndarray:
+        """
+        Calculate the bet fraction of every path of a batch at once.
+        
+        Optional: strategies implementing it (together with init_states and
+        on_round_results if they keep state) run on the batch engine, which
+        calls it once per round instead of once per path and round. Paths
+        that have already finished are included; their fractions are ignored.
+        
+        Args:
+            bankrolls: Current bankroll of each path
+            round_idx: Current round index (0-based)
+            states: Current states of the paths
+            
+        Returns:
+            np.ndarray: Fraction of bankroll to bet for each path (0.0 to 1.0)
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not implement get_bet_fractions")
+    
+    def supports_batch(self) -> bool:
+        """
+        Whether get_bet_fractions reproduces this strategy on whole arrays.
+        
+        get_bet_fractions must be defined by the same class as the scalar
+        methods or a subclass of it; a subclass that only overrides
+        get_bet_fraction falls back to the scalar engine.
+        
+        Returns:
+            bool: True if the batch engine can run the strategy
+        """
+        return self._defined_with_scalar_methods('get_bet_fractions')
+    
+    def is_stationary(self) -> bool:
+        """
+        Whether the bet fraction is one constant for every path and round.
+        
+        Like supports_batch, the stationary flag only counts when it is set
+        by the class defining the scalar methods or a subclass of it.
+        
+        Returns:
+            bool: True if the analytic engine can run the strategy
+        """
+        return self.stationary and self._defined_with_scalar_methods('stationary')
+    
+    def is_bankroll_only(self) -> bool:
+        """
+        Whether the bet fraction is a function of the current bankroll alone.
+        
+        Like is_stationary, the bankroll_only flag only counts when it is set
+        by the class defining the scalar methods or a subclass of it.
+        
+        Returns:
+            bool: True if the Markov-chain engine can run the strategy
+        """
+        return self.is_stationary() or (
+            self.bankroll_only and self._defined_with_scalar_methods('bankroll_only')
+        )
+    
+    def _defined_with_scalar_methods(self, name: str) -> bool:
+        """
+        Check that an attribute is defined below BettingStrategy, by the class
+        defining the scalar strategy methods or one of its subclasses.
+        """
+        mro = type(self).__mro__
+        
+        def owner(attribute: str) -> int:
+            return next(i for i, cls in enumerate(mro) if attribute in cls.__dict__)
+        
+        defined_at = owner(name)
+        scalar = min(owner(attribute) for attribute in ('get_bet_fraction', 'get_state_bet_fraction',
+                                                        'init_state', 'on_round_result'))
+        return defined_at < mro.index(BettingStrategy) and defined_at <= scalar
+
+
+class StatefulStrategy(BettingStrategy):
+    """
+    Base class for strategies that keep compact per-path state.
+    
+    Subclasses implement init_state, on_round_result and
+    get_state_bet_fraction, each in O(1) per round, and never read the
+    history. get_bet_fraction still works for callers using the old
+    signature by replaying the history into a state.
+    """
+    
+    uses_history = False
+    
+    @abstractmethod
+    def init_state(self) -> Any:
+        pass
+    
+    @abstractmethod
+    def on_round_result(self, state: Any, outcome_idx: int, multiplier: float, bankroll: float) -> Any:
+        pass
+    
+    @abstractmethod
+    def get_state_bet_fraction(self, bankroll: float, round_idx: int, state: Any,
+                               history: Sequence[Mapping[str, Any]]) -> float:
+        pass
+    
+    def get_bet_fraction(self, bankroll: float, round_idx: int, history: List[Dict[str, Any]]) -> float:
+        """
+        Calculate the bet fraction from the full history (O(rounds) per call).
+        """
+        return self.get_state_bet_fraction(bankroll, round_idx, self.replay_state(history), history)
 
 
 class Simulator:
     """Main simulation engine class."""
     
-    def __init__(self, config: SimulationConfig, strategy: BettingStrategy):
+    ENGINE_CHOICES = ('auto', 'analytic', 'markov', 'batch', 'scalar')
+    EXECUTOR_CHOICES = ('serial', 'thread', 'process')
+    
+    AGGREGATION_CHOICES = ('full', 'streaming')
+    
+    def __init__(self, config: SimulationConfig, strategy: BettingStrategy, engine: str = 'auto',
+                 executor: str = 'serial', max_workers: Optional[int] = None,
+                 aggregation: str = 'full', precision: Optional[PrecisionTarget] = None,
+                 control_variates: bool = False, importance_sampling: bool = False,
+                 sensitivities: bool = False):
         """
         Initialize the simulator with a configuration and strategy.
         
         Args:
             config: Simulation configuration
             strategy: Betting strategy to use
+            engine: 'analytic' computes the exact distribution for stationary
+                    strategies, 'batch' advances all paths together as NumPy
+                    arrays, 'scalar' runs the per-path Python loop, 'auto'
+                    picks the first of these the strategy supports; 'markov'
+                    (only on request) propagates the bankroll distribution of
+                    bankroll-only strategies on a discretized grid
+            executor: 'serial' runs in the calling thread, 'thread' and 'process'
+                      shard the paths across a thread or process pool
+            max_workers: Pool size for the thread and process executors
+                         (defaults to the number of CPUs)
+            aggregation: 'full' keeps every path's trajectory until the end of the
+                         run, 'streaming' folds paths into running statistics in
+                         chunks so memory does not grow with num_simulations (runs
+                         on the analytic and Markov-chain engines need neither and
+                         report 'aggregation': 'exact' instead)
+            precision: Target confidence-interval half-widths; paths then run in
+                       batches until the target is met, with num_simulations
+                       (or the target's max_simulations) as the budget
+            control_variates: Correct the mean final bankroll and ruin probability
+                              with the known expected log-growth of a fixed
+                              reference fraction (see variance_reduction)
+            importance_sampling: Estimate the probability of ruin from paths drawn
+                                 with losing outcomes made more likely, reweighted
+                                 by their likelihood ratio (see importance)
+            sensitivities: Estimate the derivatives of the mean final bankroll and
+                           the mean log-growth with respect to the bet fraction
+                           from the same paths (stationary strategies only, see
+                           sensitivity)
         """
         self.config = config
         self.strategy = strategy
@@ -77,168 +396,632 @@ class Simulator:
         if not config.outcomes:
             raise ValueError("At least one outcome must be specified")
         
-        # Pre-calculate cumulative probabilities for efficient sampling
-        self.cum_probs = np.cumsum([o.multiplier for o in config.outcomes])
-        self.cum_probs /= self.cum_probs[-1]  # Normalize
+        if engine not in self.ENGINE_CHOICES:
+            raise ValueError(f"Unknown engine '{engine}' (expected one of {', '.join(self.ENGINE_CHOICES)})")
+        self.engine = engine
         
-    def _sample_outcome(self) -> Tuple[int, float]:
-        """
-        Sample a random outcome based on configured probabilities.
+        if executor not in self.EXECUTOR_CHOICES:
+            raise ValueError(f"Unknown executor '{executor}' (expected one of {', '.join(self.EXECUTOR_CHOICES)})")
+        self.executor = executor
+        self.max_workers = max_workers
         
-        Returns:
-            tuple: (outcome_index, multiplier)
-        """
-        r = random.random()
-        cum_probs = [0] + [o.probability for o in self.config.outcomes]
-        for i in range(len(cum_probs) - 1):
-            cum_probs[i + 1] += cum_probs[i]
-            
-        for i, (lower, upper) in enumerate(zip(cum_probs, cum_probs[1:])):
-            if lower <= r < upper:
-                return i, self.config.outcomes[i].multiplier
-                
-        # Fallback for floating point errors
-        return len(self.config.outcomes) - 1, self.config.outcomes[-1].multiplier
+        if aggregation not in self.AGGREGATION_CHOICES:
+            raise ValueError(
+                f"Unknown aggregation '{aggregation}' (expected one of {', '.join(self.AGGREGATION_CHOICES)})"
+            )
+        self.aggregation = aggregation
+        self.precision = precision
+        
+        self.control_variates = control_variates
+        self.control_log_factors = None
+        if control_variates:
+            self.control_log_factors = control_log_factors(config, strategy)
         
-    def run_single_simulation(self) -> Dict[str, Any]:
+        # Bet fraction the pathwise derivatives are taken at
+        self.sensitivity_fraction = None
+        if sensitivities:
+            self.sensitivity_fraction = stationary_fraction(config, strategy)
+        
+        self.importance_sampling = importance_sampling
+        # Set on the copies importance sampling runs, to return 'outcome_counts'
+        self.count_outcomes = False
+        
+        # Build the outcome sampler once up front
+        self.sampler = config.get_sampler()
+        
+    def run_single_simulation(self, outcome_indices: Optional[List[int]] = None,
+                              record_history: bool = True, path_metrics: bool = True) -> Dict[str, Any]:
         """
         Run a single simulation.
         
+        Args:
+            outcome_indices: Pre-drawn outcome index for every round; drawn as
+                             path 0 of the run's seeded streams if not given
+                             (from config.seed, or a fresh seed if it is None)
+            record_history: Whether the result needs the round-by-round history;
+                            it is recorded anyway if the strategy uses it
+            path_metrics: Whether to compute the path metrics (peak, drawdown,
+                          time under water, losing streak); callers running many
+                          paths compute them in bulk from the trajectories instead
+        
         Returns:
-            dict: Results of the simulation
+            dict: Results of the simulation, with 'history' as a ColumnarHistory
         """
         bankroll = self.config.initial_bankroll
-        history = []
-        
-        # Track min bankroll for drawdown calculation
-        max_bankroll = bankroll
-        min_bankroll_after_max = bankroll
-        max_drawdown = 0.0
+        record_history = record_history or self.strategy.uses_history
+        history = ColumnarHistory(self.config.num_rounds if record_history else 0)
         
         # Track bankroll over time
         bankroll_over_time = [bankroll]
         
+        # Per-path strategy state
+        strategy = self.strategy
+        state = strategy.init_state()
+        
+        # Draw every outcome of the path in one block
+        if outcome_indices is None:
+            first_block = min(STREAM_BLOCK_PATHS, self.config.num_simulations)
+            seed = resolve_seed(self.config.seed)
+            outcome_indices = next(self._outcome_index_blocks(seed, 0, first_block))[:, 0]
+        outcome_indices = list(outcome_indices)
+        multipliers = [o.multiplier for o in self.config.outcomes]
+        
         for round_idx in range(self.config.num_rounds):
             # Stop if bankroll reaches zero or very close to zero
-            if bankroll <= 0.01:
+            if bankroll <= RUIN_THRESHOLD:
                 # Fill remaining rounds with zero
                 bankroll_over_time.extend([0] * (self.config.num_rounds - round_idx))
                 break
                 
             # Get bet fraction from strategy
-            bet_fraction = self.strategy.get_bet_fraction(bankroll, round_idx, history)
+            bet_fraction = strategy.get_state_bet_fraction(bankroll, round_idx, state, history)
             bet_fraction = max(0.0, min(1.0, bet_fraction))  # Clamp to [0, 1]
             
             # Calculate bet amount
             bet_amount = bankroll * bet_fraction
             
             # Sample outcome
-            outcome_idx, multiplier = self._sample_outcome()
+            outcome_idx = outcome_indices[round_idx]
+            multiplier = multipliers[outcome_idx]
             
             # Update bankroll
             new_bankroll = bankroll - bet_amount + (bet_amount * multiplier)
             new_bankroll = max(0, new_bankroll)  # Ensure non-negative
             
-            # Update history
-            history.append({
-                'round': round_idx,
-                'bankroll_before': bankroll,
-                'bet_amount': bet_amount,
-                'bet_fraction': bet_fraction,
-                'outcome_idx': outcome_idx,
-                'multiplier': multiplier,
-                'bankroll': new_bankroll,
-            })
-            
-            # Update drawdown tracking
-            if new_bankroll > max_bankroll:
-                max_bankroll = new_bankroll
-                min_bankroll_after_max = new_bankroll
-            elif new_bankroll < min_bankroll_after_max:
-                min_bankroll_after_max = new_bankroll
-                current_drawdown = (max_bankroll - min_bankroll_after_max) / max_bankroll
-                max_drawdown = max(max_drawdown, current_drawdown)
+            # Update history and strategy state
+            if record_history:
+                history.append(bankroll, bet_amount, bet_fraction, outcome_idx, multiplier, new_bankroll)
+            state = strategy.on_round_result(state, outcome_idx, multiplier, new_bankroll)
             
             # Update bankroll and record
             bankroll = new_bankroll
             bankroll_over_time.append(bankroll)
         
-        return {
+        result = {
             'initial_bankroll': self.config.initial_bankroll,
             'final_bankroll': bankroll,
-            'max_bankroll': max_bankroll,
-            'max_drawdown': max_drawdown,
-            'bankrupt': bankroll <= 0.01,
+            'bankrupt': bankroll <= RUIN_THRESHOLD,
             'history': history,
             'bankroll_over_time': bankroll_over_time,
         }
+        if path_metrics:
+            metrics = trajectory_metrics(np.array([bankroll_over_time], dtype=float))
+            result.update(individual_path_metrics(metrics, 0))
+        return result
     
-    def run_multiple_simulations(self, progress_callback=None) -> Dict[str, Any]:
+    def _sampling_options(self) -> List[str]:
         """
-        Run multiple simulations and compute aggregate statistics.
+        Names of the enabled options that only apply to sampled paths.
+        
+        The analytic and Markov-chain engines compute the distribution instead
+        of sampling paths, so they would ignore these options.
+        """
+        options = []
+        if self.config.qmc:
+            options.append('quasi-Monte Carlo sampling')
+        if self.importance_sampling:
+            options.append('importance sampling')
+        if self.precision is not None:
+            options.append('a precision target')
+        if self.config.antithetic:
+            options.append('antithetic draws')
+        if self.control_variates:
+            options.append('control variates')
+        return options
+    
+    def _check_exact_engine(self):
+        """
+        Reject a requested exact engine together with options it would ignore.
+        """
+        options = self._sampling_options()
+        if self.engine in ('analytic', 'markov') and options:
+            name = 'analytic' if self.engine == 'analytic' else 'Markov-chain'
+            raise ValueError(f"The {name} engine does not sample paths and cannot use {', '.join(options)}")
+    
+    def _use_analytic_engine(self) -> bool:
+        """
+        Decide whether the exact analytic engine should handle this run.
+        
+        'auto' only picks it when no option needs sampled paths.
+        
+        Returns:
+            bool: True if the analytic engine will be used
+        """
+        if self.engine not in ('auto', 'analytic'):
+            return False
+        self._check_exact_engine()
+        if self._sampling_options():
+            return False
+        
+        from .analytic import supports_analytic
+        
+        supported = supports_analytic(self.config, self.strategy)
+        if self.engine == 'analytic' and not supported:
+            raise ValueError(
+                f"{type(self.strategy).__name__} cannot run on the analytic engine with this "
+                f"configuration; it needs a stationary strategy and few distinct outcome multipliers"
+            )
+        return supported
+    
+    def _use_batch_engine(self) -> bool:
+        """
+        Decide whether the vectorized batch engine should handle this run.
+        
+        Returns:
+            bool: True if the batch engine will be used
+        """
+        if self.engine == 'scalar':
+            return False
+        
+        supported = self.strategy.supports_batch()
+        if self.engine == 'batch' and not supported:
+            raise ValueError(
+                f"{type(self.strategy).__name__} cannot run on the batch engine; use engine='scalar'"
+            )
+        return supported
+    
+    def run_paths(self, seed: int, path_start: int, path_stop: int,
+                  progress_callback=None) -> Dict[str, Any]:
+        """
+        Run one contiguous range of a run's paths.
         
         Args:
+            seed: Run seed the path streams are derived from
+            path_start: First path to run (must start a stream block)
+            path_stop: One past the last path to run
             progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
             
+        Returns:
+            dict: Partial results for combine_partial_results
+        """
+        if self.aggregation == 'streaming':
+            from .aggregation import run_streaming_paths
+            return run_streaming_paths(self, seed, path_start, path_stop, progress_callback)
+        
+        partial = self.run_path_range(seed, path_start, path_stop, progress_callback)
+        partial['trajectory_sketch'] = TrajectorySketch.for_bankroll(
+            self.config.num_rounds, self.config.initial_bankroll
+        )
+        partial['trajectory_sketch'].add(partial['bankroll_trajectories'])
+        if self.uses_variance_reduction:
+            partial['variance_reduction'] = self.create_variance_reduction_stats()
+            partial['variance_reduction'].add_partial(partial)
+        if self.config.qmc:
+            partial['qmc'] = self.create_qmc_stats()
+            partial['qmc'].add_partial(partial)
+        if self.sensitivity_fraction is not None:
+            partial['sensitivities'] = self.create_sensitivity_stats()
+            partial['sensitivities'].add_partial(partial)
+        return partial
+    
+    @property
+    def uses_variance_reduction(self) -> bool:
+        """Whether antithetic draws or control variates are enabled."""
+        return self.config.antithetic or self.control_variates
+    
+    def create_variance_reduction_stats(self) -> VarianceReductionStats:
+        """Create empty variance-reduction statistics for this run's settings."""
+        return VarianceReductionStats(self.config.antithetic, self.control_variates)
+    
+    def create_qmc_stats(self) -> QMCStatistics:
+        """Create empty randomized-QMC statistics for this run's paths."""
+        return QMCStatistics(self.config.num_simulations, STREAM_BLOCK_PATHS)
+    
+    def create_sensitivity_stats(self) -> SensitivityStatistics:
+        """Create empty bet-fraction sensitivity statistics for this run."""
+        return SensitivityStatistics(self.sensitivity_fraction, self.config.initial_bankroll, self.config.num_rounds)
+    
+    def combine_partials(self, partials: List[Dict[str, Any]], start_time: float,
+                         seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Merge partial results with combine_partial_results, apply variance reduction
+        and add the randomized-QMC error estimates and the bet-fraction sensitivities.
+        
+        Args:
+            partials: Results of run_paths, in any order
+            start_time: Time the run started (from time.time())
+            seed: Seed the run's random streams were derived from
+            
         Returns:
             dict: Aggregated simulation results
         """
+        stats = None
+        qmc_stats = None
+        sensitivity_stats = None
+        for partial in partials:
+            if 'variance_reduction' in partial:
+                if stats is None:
+                    stats = self.create_variance_reduction_stats()
+                stats.merge(partial.pop('variance_reduction'))
+            if 'qmc' in partial:
+                if qmc_stats is None:
+                    qmc_stats = self.create_qmc_stats()
+                qmc_stats.merge(partial.pop('qmc'))
+            if 'sensitivities' in partial:
+                if sensitivity_stats is None:
+                    sensitivity_stats = self.create_sensitivity_stats()
+                sensitivity_stats.merge(partial.pop('sensitivities'))
+        
+        results = combine_partial_results(partials, start_time, seed)
+        if qmc_stats is not None:
+            results['qmc'] = qmc_stats.summarize()
+        if sensitivity_stats is not None:
+            results['sensitivities'] = sensitivity_stats.summarize()
+        if stats is not None:
+            expected = None
+            if self.control_variates:
+                expected = expected_control(self.config, self.control_log_factors)
+            apply_variance_reduction(results, stats.summarize(expected))
+        return results
+    
+    def run_path_range(self, seed: int, path_start: int, path_stop: int, progress_callback=None,
+                       record_paths: Optional[Sequence[int]] = None,
+                       outcome_indices: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        Run a range of paths and keep every path's final bankroll and trajectory.
+        
+        Args:
+            seed: Run seed the path streams are derived from
+            path_start: First path to run (must start a stream block)
+            path_stop: One past the last path to run
+            progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+            record_paths: Paths whose full results are returned in 'individual_results'
+                          (defaults to the first 10 paths of the range)
+            outcome_indices: Pre-drawn outcome indices of shape (num_rounds, num_paths)
+                             to use instead of drawing from the path streams
+            
+        Returns:
+            dict: Per-path arrays for the range
+        """
+        if self._use_batch_engine():
+            from .batch import run_batch_paths
+            return run_batch_paths(
+                self.config, self.strategy, seed, path_start, path_stop, progress_callback, record_paths,
+                control_log_factors=self.control_log_factors, count_outcomes=self.count_outcomes,
+                outcome_indices=outcome_indices, sensitivities=self.sensitivity_fraction is not None
+            )
+        
+        if record_paths is None:
+            record_paths = range(path_start, min(path_start + 10, path_stop))
+        record_paths = sorted(record_paths)
+        record_set = set(record_paths)
+        
         results = []
         bankrolls = []
         bankroll_trajectories = []
         num_bankrupt = 0
-        max_drawdowns = []
+        recorded_offsets = []
         
-        start_time = time.time()
+        control_values = []
+        outcome_counts = []
+        bankroll_derivatives = []
         
-        for i in range(self.config.num_simulations):
-            result = self.run_single_simulation()
-            results.append(result)
-            bankrolls.append(result['final_bankroll'])
-            bankroll_trajectories.append(result['bankroll_over_time'])
+        num_paths = path_stop - path_start
+        
+        i = 0
+        for indices in self._outcome_index_blocks(seed, path_start, path_stop, outcome_indices):
+            if self.control_log_factors is not None:
+                control_values.append(self.control_log_factors[indices].sum(axis=0))
+            block_indices = indices.T.tolist()
+            block_offset = len(bankroll_trajectories)
             
-            if result['bankrupt']:
-                num_bankrupt += 1
+            for outcome_indices in block_indices:
+                recorded = path_start + i in record_set
+                result = self.run_single_simulation(outcome_indices, record_history=recorded, path_metrics=False)
+                if recorded:
+                    result['history'] = result['history'].to_list()
+                    results.append(result)
+                    recorded_offsets.append(i)
+                bankrolls.append(result['final_bankroll'])
+                bankroll_trajectories.append(result['bankroll_over_time'])
+                
+                if result['bankrupt']:
+                    num_bankrupt += 1
                 
-            max_drawdowns.append(result['max_drawdown'])
-            
-            if progress_callback and i % max(1, self.config.num_simulations // 100) == 0:
-                progress_callback(i / self.config.num_simulations)
-        
-        # Calculate statistics
-        bankrolls = np.array(bankrolls)
-        mean_bankroll = float(np.mean(bankrolls))
-        median_bankroll = float(np.median(bankrolls))
-        std_bankroll = float(np.std(bankrolls))
-        min_bankroll = float(np.min(bankrolls))
-        max_bankroll = float(np.max(bankrolls))
-        
-        # Calculate bankroll trajectories statistics
-        bankroll_trajectories = np.array(bankroll_trajectories)
-        mean_trajectory = np.mean(bankroll_trajectories, axis=0).tolist()
-        percentile_10 = np.percentile(bankroll_trajectories, 10, axis=0).tolist()
-        percentile_90 = np.percentile(bankroll_trajectories, 90, axis=0).tolist()
-        
-        # Calculate max drawdown statistics
-        mean_max_drawdown = float(np.mean(max_drawdowns))
-        median_max_drawdown = float(np.median(max_drawdowns))
-        max_max_drawdown = float(np.max(max_drawdowns))
-        
-        # Prepare results
-        return {
-            'num_simulations': self.config.num_simulations,
-            'mean_final_bankroll': mean_bankroll,
-            'median_final_bankroll': median_bankroll,
-            'std_final_bankroll': std_bankroll,
-            'min_final_bankroll': min_bankroll,
-            'max_final_bankroll': max_bankroll,
-            'probability_of_ruin': num_bankrupt / self.config.num_simulations,
-            'mean_max_drawdown': mean_max_drawdown,
-            'median_max_drawdown': median_max_drawdown,
-            'max_max_drawdown': max_max_drawdown,
-            'mean_trajectory': mean_trajectory,
-            'percentile_10': percentile_10,
-            'percentile_90': percentile_90,
-            'individual_results': results[:10],  # Include first 10 individual simulations
-            'elapsed_time': time.time() - start_time,
-        } 
\ No newline at end of file
+                if progress_callback and i % max(1, num_paths // 100) == 0:
+                    progress_callback(i / num_paths)
+                i += 1
+            
+            if self.count_outcomes:
+                # A round was played if the bankroll before it was above the threshold
+                played = np.array(bankroll_trajectories[block_offset:], dtype=float)[:, :-1].T > RUIN_THRESHOLD
+                outcome_counts.append(np.stack(
+                    [((indices == k) & played).sum(axis=0) for k in range(len(self.config.outcomes))], axis=1
+                ))
+            if self.sensitivity_fraction is not None:
+                bankroll_derivatives.append(pathwise_derivatives(
+                    np.array(bankroll_trajectories[block_offset:], dtype=float),
+                    self.sampler.multipliers[indices], self.sensitivity_fraction
+                ))
+        
+        # Path metrics of every path at once, from the trajectory matrix
+        bankroll_trajectories = np.array(bankroll_trajectories, dtype=float).reshape(num_paths, -1)
+        metrics = trajectory_metrics(bankroll_trajectories)
+        for offset, result in zip(recorded_offsets, results):
+            result.update(individual_path_metrics(metrics, offset))
+        
+        partial = {
+            'path_start': path_start,
+            'final_bankrolls': np.array(bankrolls, dtype=float),
+            'bankroll_trajectories': bankroll_trajectories,
+            'num_bankrupt': num_bankrupt,
+            'max_drawdowns': metrics['max_drawdowns'],
+            'time_under_water': metrics['time_under_water'],
+            'longest_losing_streaks': metrics['longest_losing_streaks'],
+            'rounds_played': metrics['rounds_played'],
+            'log_return_squares': metrics['log_return_squares'],
+            'individual_results': results,
+            'individual_paths': record_paths,
+        }
+        if self.control_log_factors is not None:
+            partial['control_values'] = np.concatenate(control_values) if control_values else np.zeros(0)
+        if self.count_outcomes:
+            partial['outcome_counts'] = (
+                np.concatenate(outcome_counts) if outcome_counts
+                else np.zeros((0, len(self.config.outcomes)), dtype=np.int64)
+            )
+        if self.sensitivity_fraction is not None:
+            partial['bankroll_derivatives'] = (
+                np.concatenate(bankroll_derivatives) if bankroll_derivatives else np.zeros(0)
+            )
+        return partial
+    
+    def _outcome_index_blocks(self, seed: int, path_start: int, path_stop: int,
+                              outcome_indices: Optional[np.ndarray] = None):
+        """
+        Iterate over the outcome indices of a range of paths, one stream block at a time.
+        
+        Yields:
+            np.ndarray: Outcome indices of a block, rows are rounds and columns are paths
+        """
+        if outcome_indices is not None:
+            for offset in range(0, path_stop - path_start, STREAM_BLOCK_PATHS):
+                yield outcome_indices[:, offset:offset + STREAM_BLOCK_PATHS]
+            return
+        
+        streams = PathStreams(
+            seed, path_start, path_stop, self.config.num_simulations, antithetic=self.config.antithetic,
+            qmc_dimensions=self.config.qmc_dimensions()
+        )
+        for _, width, generator in streams.iter_blocks():
+            uniforms = streams.block_uniforms(generator, width, self.config.num_rounds)
+            yield self.sampler.indices_from_uniforms(uniforms)
+    
+    def run_multiple_simulations(self, progress_callback=None) -> Dict[str, Any]:
+        """
+        Run multiple simulations and compute aggregate statistics.
+        
+        Stationary strategies are solved exactly by the analytic engine when
+        the outcome grid is small enough and no option needs sampled paths. The Markov-chain engine, used only
+        when requested, propagates the bankroll distribution on a grid. Strategies implementing
+        get_bet_fractions run on the vectorized batch engine unless the scalar
+        engine was requested; everything else uses the per-path loop.
+        Both engines draw outcomes from the same seeded per-block random
+        streams, so a run is reproducible from the 'seed' in its results.
+        With a thread or process executor the paths are split into shards
+        that run concurrently and are merged afterwards. With a precision
+        target the paths run in batches until the confidence intervals are
+        narrow enough, and the results include a 'precision' entry. With
+        importance sampling, a second set of paths drawn under a tilted
+        outcome distribution replaces the ruin frequency with a reweighted
+        estimate, described in an 'importance_sampling' entry.
+        
+        Args:
+            progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+            
+        Returns:
+            dict: Aggregated simulation results
+        """
+        seed = resolve_seed(self.config.seed)
+        start_time = time.time()
+        
+        exact_results = None
+        if self._use_analytic_engine():
+            from .analytic import run_analytic_simulation
+            exact_results = run_analytic_simulation(self, seed, start_time, progress_callback)
+        elif self.engine == 'markov':
+            self._check_exact_engine()
+            from .markov import run_markov_simulation
+            exact_results = run_markov_simulation(self, seed, start_time, progress_callback)
+        if exact_results is not None:
+            if self.aggregation == 'streaming':
+                # The exact engines keep no trajectories, so there is nothing to stream
+                exact_results['aggregation'] = 'exact'
+            return exact_results
+        
+        run_callback = progress_callback
+        if progress_callback and self.importance_sampling:
+            # The plain run and the importance-sampling run take half the progress each
+            run_callback = lambda fraction: progress_callback(fraction / 2)
+        
+        if self.precision is not None:
+            from .adaptive import run_adaptive_simulations
+            results = run_adaptive_simulations(self, seed, start_time, run_callback)
+        else:
+            partials = self.run_path_batch(seed, 0, self.config.num_simulations, run_callback)
+            results = self.combine_partials(partials, start_time, seed)
+        
+        if self.importance_sampling:
+            from .importance import estimate_ruin_probability, apply_importance_sampling
+            sampling_callback = None
+            if progress_callback:
+                sampling_callback = lambda fraction: progress_callback(0.5 + fraction / 2)
+            summary = estimate_ruin_probability(self, seed, results['num_simulations'], sampling_callback)
+            apply_importance_sampling(results, summary)
+            results['elapsed_time'] = time.time() - start_time
+        return results
+    
+    def run_path_batch(self, seed: int, path_start: int, path_stop: int,
+                       progress_callback=None) -> List[Dict[str, Any]]:
+        """
+        Run a range of paths on the configured executor.
+        
+        Args:
+            seed: Run seed the path streams are derived from
+            path_start: First path to run (must start a stream block)
+            path_stop: One past the last path to run
+            progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+            
+        Returns:
+            list: Partial results, to be merged with combine_partial_results
+        """
+        if self.executor == 'serial':
+            return [self.run_paths(seed, path_start, path_stop, progress_callback)]
+        
+        from .parallel import run_sharded
+        return run_sharded(self, seed, progress_callback, path_start, path_stop)
+
+
+def combine_partial_results(partials: List[Dict[str, Any]], start_time: float,
+                            seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Merge the partial results of path ranges and compute aggregate statistics.
+    
+    Args:
+        partials: Results of Simulator.run_paths, in any order
+        start_time: Time the run started (from time.time())
+        seed: Seed the run's random streams were derived from
+        
+    Returns:
+        dict: Aggregated simulation results
+    """
+    partials = sorted(partials, key=lambda partial: partial['path_start'])
+    
+    if 'aggregator' in partials[0]:
+        # Streaming partials carry their running statistics
+        aggregator = partials[0]['aggregator']
+        for partial in partials[1:]:
+            aggregator.merge(partial['aggregator'])
+        return aggregator.summarize(start_time, seed)
+    
+    individual_results = []
+    for partial in partials:
+        individual_results.extend(partial['individual_results'][:10 - len(individual_results)])
+    
+    trajectory_sketch = None
+    if all('trajectory_sketch' in partial for partial in partials):
+        trajectory_sketch = partials[0]['trajectory_sketch']
+        for partial in partials[1:]:
+            trajectory_sketch.merge(partial['trajectory_sketch'])
+    
+    return summarize_results(
+        bankrolls=np.concatenate([p['final_bankrolls'] for p in partials]),
+        bankroll_trajectories=np.concatenate([p['bankroll_trajectories'] for p in partials]),
+        num_bankrupt=sum(p['num_bankrupt'] for p in partials),
+        max_drawdowns=np.concatenate([p['max_drawdowns'] for p in partials]),
+        individual_results=individual_results,
+        start_time=start_time,
+        seed=seed,
+        trajectory_sketch=trajectory_sketch,
+        time_under_water=np.concatenate([p['time_under_water'] for p in partials]),
+        longest_losing_streaks=np.concatenate([p['longest_losing_streaks'] for p in partials]),
+        rounds_played=np.concatenate([p['rounds_played'] for p in partials]),
+        log_return_squares=np.concatenate([p['log_return_squares'] for p in partials]),
+    )
+
+
+def summarize_results(bankrolls: np.ndarray, bankroll_trajectories: np.ndarray, num_bankrupt: int,
+                      max_drawdowns: np.ndarray, individual_results: List[Dict[str, Any]],
+                      start_time: float, seed: Optional[int] = None,
+                      trajectory_sketch: Optional[TrajectorySketch] = None,
+                      time_under_water: Optional[np.ndarray] = None,
+                      longest_losing_streaks: Optional[np.ndarray] = None,
+                      rounds_played: Optional[np.ndarray] = None,
+                      log_return_squares: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Compute the aggregate statistics shared by every engine.
+    
+    Args:
+        bankrolls: Final bankroll of each path
+        bankroll_trajectories: Matrix of bankrolls, one row per path and one column per round
+        num_bankrupt: Number of paths that went bankrupt
+        max_drawdowns: Max drawdown of each path
+        individual_results: Per-path results to include in the output
+        start_time: Time the run started (from time.time())
+        seed: Seed the run's random streams were derived from
+        trajectory_sketch: Per-round quantile sketch of the trajectories, stored
+                           with the results for computing other percentile bands
+        time_under_water: Rounds each path spent below its running peak
+                          (computed from the trajectories if not given)
+        longest_losing_streaks: Longest losing streak of each path
+                                (computed from the trajectories if not given)
+        rounds_played: Rounds each path played
+                       (computed from the trajectories if not given)
+        log_return_squares: Sum of each path's squared per-round log returns
+                            (computed from the trajectories if not given)
+        
+    Returns:
+        dict: Aggregated simulation results
+    """
+    num_simulations = len(bankrolls)
+    
+    # Calculate statistics
+    mean_bankroll = float(np.mean(bankrolls))
+    median_bankroll = float(np.median(bankrolls))
+    std_bankroll = float(np.std(bankrolls))
+    min_bankroll = float(np.min(bankrolls))
+    max_bankroll = float(np.max(bankrolls))
+    
+    # Calculate bankroll trajectories statistics
+    mean_trajectory = np.mean(bankroll_trajectories, axis=0).tolist()
+    percentile_10 = np.percentile(bankroll_trajectories, 10, axis=0).tolist()
+    percentile_90 = np.percentile(bankroll_trajectories, 90, axis=0).tolist()
+    
+    # Calculate drawdown, time under water and losing streak statistics
+    given = (time_under_water, longest_losing_streaks, rounds_played, log_return_squares)
+    if any(values is None for values in given):
+        metrics = trajectory_metrics(bankroll_trajectories)
+        time_under_water = metrics['time_under_water']
+        longest_losing_streaks = metrics['longest_losing_streaks']
+        rounds_played = metrics['rounds_played']
+        log_return_squares = metrics['log_return_squares']
+    path_statistics = summarize_path_metrics(max_drawdowns, time_under_water, longest_losing_streaks)
+    
+    # VaR, CVaR, time to ruin and log-growth statistics, in the same pass
+    initial_bankroll, num_rounds = bankroll_trajectories[0, 0], bankroll_trajectories.shape[1] - 1
+    risk = risk_metrics(initial_bankroll, num_rounds, bankrolls, rounds_played, log_return_squares)
+    
+    # Prepare results
+    results = {
+        'num_simulations': num_simulations,
+        'mean_final_bankroll': mean_bankroll,
+        'median_final_bankroll': median_bankroll,
+        'std_final_bankroll': std_bankroll,
+        'min_final_bankroll': min_bankroll,
+        'max_final_bankroll': max_bankroll,
+        'probability_of_ruin': num_bankrupt / num_simulations,
+        **path_statistics,
+        'risk_metrics': risk,
+        'mean_trajectory': mean_trajectory,
+        'percentile_10': percentile_10,
+        'percentile_90': percentile_90,
+        'individual_results': individual_results,  # Include first 10 individual simulations
+        'elapsed_time': time.time() - start_time,
+        'seed': seed,
+    }
+    results['bootstrap'] = bootstrap_confidence_intervals(
+        {name: results[name] for name in BOOTSTRAP_STATISTICS}, seed, bankrolls, max_drawdowns
+    )
+    if trajectory_sketch is not None:
+        results['trajectory_sketch'] = trajectory_sketch.to_dict()
+    return results
@@ -5,8 +5,69 @@ import importlib.util
 import sys
 import os
 import inspect
-from typing import List, Dict, Any, Callable, Optional
-from .simulator import BettingStrategy
+from functools import lru_cache
+from typing import List, Dict, Any, Callable, Optional, Sequence, Mapping, Tuple
+
+import numpy as np
+
+from .simulator import BettingStrategy, StatefulStrategy
+
+
+# Bisection steps on the log-growth slope; 60 halvings of [0, 1] reach double precision
+KELLY_BISECTION_STEPS = 60
+
+# Number of outcome configurations whose Kelly fraction is kept
+KELLY_CACHE_SIZE = 1024
+
+
+def kelly_fraction(outcomes_config: List[Dict[str, float]]) -> float:
+    """
+    Growth-optimal (full Kelly) bet fraction of a set of outcomes.
+    
+    Maximizes the expected log-growth per round,
+    g(f) = sum(p * log(1 - f + f * multiplier)), over f in [0, 1]. The
+    function is concave, so its maximum is where the slope
+    g'(f) = sum(p * (multiplier - 1) / (1 + f * (multiplier - 1))) crosses
+    zero, found by bisection. This is exact for any number of outcomes,
+    unlike the (EV - 1) / variance approximation. Results are cached per
+    outcome configuration.
+    
+    Args:
+        outcomes_config: List of outcome configurations with probabilities and multipliers
+        
+    Returns:
+        float: Kelly fraction (0.0 to 1.0)
+    """
+    key = tuple((float(o['probability']), float(o['multiplier'])) for o in outcomes_config)
+    return _kelly_fraction(key)
+
+
+@lru_cache(maxsize=KELLY_CACHE_SIZE)
+def _kelly_fraction(outcomes: Tuple[Tuple[float, float], ...]) -> float:
+    probabilities = np.array([probability for probability, _ in outcomes])
+    gains = np.array([multiplier for _, multiplier in outcomes]) - 1.0
+    if probabilities.sum() <= 0:
+        return 0.0
+    probabilities = probabilities / probabilities.sum()
+    
+    def slope(fraction: float) -> float:
+        return float(np.dot(probabilities, gains / (1.0 + fraction * gains)))
+    
+    # No edge: any bet lowers the growth rate
+    if slope(0.0) <= 0:
+        return 0.0
+    # Growth still rises when betting everything (no outcome loses the whole stake)
+    if np.all(gains > -1.0) and slope(1.0) >= 0:
+        return 1.0
+    
+    low, high = 0.0, 1.0
+    for _ in range(KELLY_BISECTION_STEPS):
+        middle = (low + high) / 2
+        if slope(middle) > 0:
+            low = middle
+        else:
+            high = middle
+    return low
 
 
 class FixedFractionStrategy(BettingStrategy):
@@ -14,6 +75,10 @@ class FixedFractionStrategy(BettingStrategy):
     Bet a fixed fraction of the bankroll each round.
     """
     
+    uses_history = False
+    stationary = True
+    batch_parameters = ('fraction',)
+    
     def __init__(self, fraction: float = 0.1):
         """
         Initialize with the fixed fraction to bet.
@@ -36,27 +101,45 @@ class FixedFractionStrategy(BettingStrategy):
             float: Fraction of bankroll to bet (0.0 to 1.0)
         """
         return self.fraction
+    
+    def get_bet_fractions(self, bankrolls: np.ndarray, round_idx: int, states: Any) -> np.ndarray:
+        """
+        Return the fixed fraction for every path.
+        """
+        return np.full(bankrolls.shape, self.fraction)
 
 
 class KellyCriterionStrategy(BettingStrategy):
     """
     Kelly Criterion strategy that maximizes expected logarithmic growth.
+    
+    The Kelly fraction only depends on the outcomes, so it is computed once
+    at construction and the strategy bets that constant fraction.
     """
     
-    def __init__(self, outcomes_config: List[Dict[str, float]], fraction_limit: float = 1.0):
+    uses_history = False
+    stationary = True
+    
+    def __init__(self, outcomes_config: List[Dict[str, float]], fraction_limit: float = 1.0,
+                 kelly_multiplier: float = 1.0):
         """
         Initialize with the outcome configuration.
         
         Args:
             outcomes_config: List of outcome configurations with probabilities and multipliers
             fraction_limit: Upper limit on the bet fraction (0.0 to 1.0)
+            kelly_multiplier: Share of the full Kelly fraction to bet, for
+                              fractional Kelly (0.5 for half Kelly, 1.0 for full Kelly)
         """
         self.outcomes = outcomes_config
         self.fraction_limit = max(0.0, min(1.0, fraction_limit))
+        self.kelly_multiplier = max(0.0, min(1.0, kelly_multiplier))
+        self.kelly_fraction = kelly_fraction(outcomes_config)
+        self.fraction = min(self.kelly_multiplier * self.kelly_fraction, self.fraction_limit)
     
     def get_bet_fraction(self, bankroll: float, round_idx: int, history: List[Dict[str, Any]]) -> float:
         """
-        Calculate the Kelly Criterion bet fraction.
+        Return the (fractional) Kelly fraction.
         
         Args:
             bankroll: Current bankroll amount
@@ -66,28 +149,26 @@ class KellyCriterionStrategy(BettingStrategy):
         Returns:
             float: Fraction of bankroll to bet (0.0 to 1.0)
         """
-        # Calculate expected value
-        expected_value = sum(o['probability'] * o['multiplier'] for o in self.outcomes)
-        
-        # If EV <= 1, don't bet
-        if expected_value <= 1.0:
-            return 0.0
-        
-        # Calculate variance
-        variance = sum(o['probability'] * (o['multiplier'] - expected_value) ** 2 for o in self.outcomes)
-        
-        # Calculate Kelly bet fraction: f* = (EV - 1) / variance
-        kelly_fraction = (expected_value - 1) / variance if variance > 0 else 0.0
+        return self.fraction
+    
+    def get_bet_fractions(self, bankrolls: np.ndarray, round_idx: int, states: Any) -> np.ndarray:
+        """
+        Return the Kelly fraction for every path.
         
-        # Apply fraction limit
-        return min(kelly_fraction, self.fraction_limit)
+        The Kelly fraction does not depend on bankroll, round or history.
+        """
+        return np.full(bankrolls.shape, self.fraction)
 
 
-class MartingaleStrategy(BettingStrategy):
+class MartingaleStrategy(StatefulStrategy):
     """
     Martingale strategy that doubles the bet after each loss.
+    
+    The per-path state is the number of consecutive losses.
     """
     
+    batch_parameters = ('base_fraction', 'max_fraction')
+    
     def __init__(self, base_fraction: float = 0.01, max_fraction: float = 1.0):
         """
         Initialize with base and maximum fractions.
@@ -98,50 +179,95 @@ class MartingaleStrategy(BettingStrategy):
         """
         self.base_fraction = max(0.0, min(1.0, base_fraction))
         self.max_fraction = max(self.base_fraction, min(1.0, max_fraction))
-        self.consecutive_losses = 0
-        self.initial_bankroll = None
     
-    def get_bet_fraction(self, bankroll: float, round_idx: int, history: List[Dict[str, Any]]) -> float:
+    def init_state(self) -> int:
+        """
+        Start a path without losses.
+        """
+        return 0
+    
+    def on_round_result(self, state: int, outcome_idx: int, multiplier: float, bankroll: float) -> int:
+        """
+        Reset the loss streak after a win, otherwise extend it.
+        
+        A round is a win when the bankroll increased, i.e. when the
+        multiplier is above 1 (bets are never zero while base_fraction > 0).
+        
+        Args:
+            state: Consecutive losses before the round
+            outcome_idx: Index of the outcome that occurred
+            multiplier: The multiplier applied
+            bankroll: Bankroll after the round
+            
+        Returns:
+            int: Consecutive losses after the round
+        """
+        return 0 if multiplier > 1.0 else state + 1
+    
+    def get_state_bet_fraction(self, bankroll: float, round_idx: int, state: int,
+                               history: Sequence[Mapping[str, Any]]) -> float:
         """
         Calculate the Martingale bet fraction.
         
         Args:
             bankroll: Current bankroll amount
             round_idx: Current round index (0-based)
-            history: List of dictionaries with past results
+            state: Consecutive losses so far
+            history: Past results (not used)
             
         Returns:
             float: Fraction of bankroll to bet (0.0 to 1.0)
         """
-        # Store initial bankroll on first round
-        if round_idx == 0:
-            self.initial_bankroll = bankroll
-            self.consecutive_losses = 0
-            return self.base_fraction
-        
-        # Check if last round was a win or loss
-        last_round = history[-1]
-        last_bankroll_before = last_round['bankroll_before']
-        current_bankroll = bankroll
-        
-        # If bankroll increased, reset to base bet
-        if current_bankroll > last_bankroll_before:
-            self.consecutive_losses = 0
-            return self.base_fraction
-        
-        # Otherwise, double the bet
-        self.consecutive_losses += 1
-        fraction = self.base_fraction * (2 ** self.consecutive_losses)
+        fraction = self.base_fraction * (2 ** state)
         
         # Cap at max fraction
         return min(fraction, self.max_fraction)
+    
+    def init_states(self, num_paths: int) -> np.ndarray:
+        """
+        Start every path without losses.
+        """
+        return np.zeros(num_paths, dtype=np.int64)
+    
+    def on_round_results(self, states: np.ndarray, outcome_idx: np.ndarray, multipliers: np.ndarray,
+                         bankrolls: np.ndarray) -> np.ndarray:
+        """
+        Reset the loss streak of paths that won, extend it on the others.
+        """
+        return np.where(multipliers > 1.0, 0, states + 1)
+    
+    def get_bet_fractions(self, bankrolls: np.ndarray, round_idx: int, states: np.ndarray) -> np.ndarray:
+        """
+        Calculate the Martingale bet fraction of every path.
+        """
+        with np.errstate(over='ignore'):
+            fractions = self.base_fraction * np.exp2(states)
+        return np.minimum(fractions, self.max_fraction)
 
 
 class CustomStrategy(BettingStrategy):
     """
     Custom strategy that loads a user-defined bet_fraction function from a Python file.
+    
+    If the file also defines on_round_result(state, outcome_idx, multiplier,
+    bankroll), and optionally init_state(), the strategy is stateful: the
+    engine keeps one state per path and passes it to bet_fraction in place
+    of the history.
+    
+    A file may also define bet_fractions(bankrolls, round_idx, states), with
+    optional init_states(num_paths) and on_round_results(states, outcome_idx,
+    multipliers, bankrolls), to run on the vectorized batch engine.
+    
+    Files whose bet only depends on the current bankroll (e.g. threshold
+    rules) can set BANKROLL_ONLY = True to run on the Markov-chain engine.
     """
     
+    # Functions loaded from the strategy file
+    FUNCTION_ATTRIBUTES = (
+        'bet_fraction_func', 'init_state_func', 'on_round_result_func',
+        'bet_fractions_func', 'init_states_func', 'on_round_results_func',
+    )
+    
     def __init__(self, strategy_path: str):
         """
         Initialize by loading the custom strategy.
@@ -150,18 +276,38 @@ class CustomStrategy(BettingStrategy):
             strategy_path: Path to the Python file containing the strategy
         """
         self.strategy_path = strategy_path
-        self.bet_fraction_func = self._load_strategy(strategy_path)
+        self._load_strategy(strategy_path)
     
-    def _load_strategy(self, file_path: str) -> Callable:
+    def __getstate__(self):
         """
-        Load a Python module from file path and extract the bet_fraction function.
+        Pickle only the strategy path; loaded functions cannot be pickled.
+        """
+        state = self.__dict__.copy()
+        for name in self.FUNCTION_ATTRIBUTES:
+            del state[name]
+        return state
+    
+    def __setstate__(self, state):
+        """
+        Reload the strategy from its path, e.g. inside a worker process.
+        """
+        self.__dict__.update(state)
+        self._load_strategy(self.strategy_path)
+    
+    def _load_strategy(self, file_path: str):
+        """
+        Load a Python module from file path and extract the strategy functions.
+        
+        Sets bet_fraction_func, and the optional functions in
+        FUNCTION_ATTRIBUTES (None when the file does not define them).
         
         Args:
             file_path: Path to the Python file
-            
-        Returns:
-            callable: The bet_fraction function from the module
         """
+        for name in self.FUNCTION_ATTRIBUTES:
+            setattr(self, name, None)
+        self.uses_history = True
+        self.bankroll_only = False
         try:
             # Generate a module name based on the file path
             module_name = os.path.basename(file_path).replace('.py', '')
@@ -189,13 +335,147 @@ class CustomStrategy(BettingStrategy):
                     f"bankroll, round_idx, and history (found {len(sig.parameters)})"
                 )
             
-            return bet_fraction_func
+            # Optional per-path state hooks
+            on_round_result_func = getattr(module, 'on_round_result', None)
+            if on_round_result_func is not None:
+                sig = inspect.signature(on_round_result_func)
+                if len(sig.parameters) != 4:
+                    raise ValueError(
+                        f"on_round_result function must take exactly 4 parameters: "
+                        f"state, outcome_idx, multiplier, and bankroll (found {len(sig.parameters)})"
+                    )
+                self.init_state_func = getattr(module, 'init_state', None)
+                self.on_round_result_func = on_round_result_func
+                self.uses_history = False
+            
+            # Optional vectorized functions for the batch engine
+            bet_fractions_func = getattr(module, 'bet_fractions', None)
+            if bet_fractions_func is not None:
+                sig = inspect.signature(bet_fractions_func)
+                if len(sig.parameters) != 3:
+                    raise ValueError(
+                        f"bet_fractions function must take exactly 3 parameters: "
+                        f"bankrolls, round_idx, and states (found {len(sig.parameters)})"
+                    )
+                self.init_states_func = getattr(module, 'init_states', None)
+                self.on_round_results_func = getattr(module, 'on_round_results', None)
+                self.bet_fractions_func = bet_fractions_func
+            
+            self.bet_fraction_func = bet_fraction_func
+            self.bankroll_only = bool(getattr(module, 'BANKROLL_ONLY', False))
             
         except Exception as e:
             # If anything goes wrong, fallback to a safe default strategy
             import logging
             logging.error(f"Error loading custom strategy: {e}")
-            return lambda bankroll, round_idx, history: 0.01  # Safe default: bet 1%
+            for name in self.FUNCTION_ATTRIBUTES:
+                setattr(self, name, None)
+            self.uses_history = True
+            self.bankroll_only = False
+            self.bet_fraction_func = lambda bankroll, round_idx, history: 0.01  # Safe default: bet 1%
+    
+    def init_state(self) -> Any:
+        """
+        Call the user-defined init_state function, if any.
+        """
+        if self.init_state_func is None:
+            return None
+        return self.init_state_func()
+    
+    def on_round_result(self, state: Any, outcome_idx: int, multiplier: float, bankroll: float) -> Any:
+        """
+        Call the user-defined on_round_result function, if any.
+        
+        Args:
+            state: Current state of the path
+            outcome_idx: Index of the outcome that occurred
+            multiplier: The multiplier applied
+            bankroll: Bankroll after the round
+            
+        Returns:
+            The updated state (unchanged if the function raises an exception)
+        """
+        if self.on_round_result_func is None:
+            return state
+        try:
+            return self.on_round_result_func(state, outcome_idx, multiplier, bankroll)
+        except Exception as e:
+            import logging
+            logging.error(f"Error in custom on_round_result function: {e}")
+            return state
+    
+    def get_state_bet_fraction(self, bankroll: float, round_idx: int, state: Any,
+                               history: Sequence[Mapping[str, Any]]) -> float:
+        """
+        Call the user-defined bet_fraction function with the state or the history.
+        
+        Args:
+            bankroll: Current bankroll amount
+            round_idx: Current round index (0-based)
+            state: Current state of the path
+            history: Past results of the path
+            
+        Returns:
+            float: Fraction of bankroll to bet (0.0 to 1.0)
+        """
+        if self.on_round_result_func is None:
+            return self.get_bet_fraction(bankroll, round_idx, history)
+        return self._call_bet_fraction(bankroll, round_idx, state)
+    
+    def supports_batch(self) -> bool:
+        """
+        Whether the strategy file defines bet_fractions.
+        """
+        return self.bet_fractions_func is not None
+    
+    def is_bankroll_only(self) -> bool:
+        """
+        Whether the strategy file declares BANKROLL_ONLY.
+        """
+        return self.bankroll_only
+    
+    def init_states(self, num_paths: int) -> Any:
+        """
+        Call the user-defined init_states function, if any.
+        """
+        if self.init_states_func is None:
+            return None
+        return self.init_states_func(num_paths)
+    
+    def on_round_results(self, states: Any, outcome_idx: np.ndarray, multipliers: np.ndarray,
+                         bankrolls: np.ndarray) -> Any:
+        """
+        Call the user-defined on_round_results function, if any.
+        """
+        if self.on_round_results_func is None:
+            return states
+        try:
+            return self.on_round_results_func(states, outcome_idx, multipliers, bankrolls)
+        except Exception as e:
+            import logging
+            logging.error(f"Error in custom on_round_results function: {e}")
+            return states
+    
+    def get_bet_fractions(self, bankrolls: np.ndarray, round_idx: int, states: Any) -> np.ndarray:
+        """
+        Call the user-defined bet_fractions function.
+        
+        Args:
+            bankrolls: Current bankroll of each path
+            round_idx: Current round index (0-based)
+            states: Current states of the paths
+            
+        Returns:
+            np.ndarray: Fraction of bankroll to bet for each path
+        """
+        try:
+            fractions = np.asarray(self.bet_fractions_func(bankrolls, round_idx, states), dtype=float)
+            return np.broadcast_to(fractions, bankrolls.shape)
+        except Exception as e:
+            # As in _call_bet_fraction: log the error and bet 1% on every path
+            import logging
+            logging.error(f"Error in custom bet_fractions function: {e}")
+            return np.full(bankrolls.shape, 0.01)
     
     def get_bet_fraction(self, bankroll: float, round_idx: int, history: List[Dict[str, Any]]) -> float:
         """
@@ -209,9 +489,16 @@ class CustomStrategy(BettingStrategy):
         Returns:
             float: Fraction of bankroll to bet (0.0 to 1.0)
         """
+        if self.on_round_result_func is not None:
+            # Stateful strategies receive the state rebuilt from the history
+            history = self.replay_state(history)
+        return self._call_bet_fraction(bankroll, round_idx, history)
+    
+    def _call_bet_fraction(self, bankroll: float, round_idx: int, history_or_state: Any) -> float:
+        """Call bet_fraction safely and clamp the result."""
         try:
             # Call the custom function and clamp the result
-            fraction = self.bet_fraction_func(bankroll, round_idx, history)
+            fraction = self.bet_fraction_func(bankroll, round_idx, history_or_state)
             return max(0.0, min(1.0, fraction))
         except Exception as e:
             # If the function raises an exception, log it and return a safe bet
@@ -0,0 +1,349 @@
+"""
+Parallel common-random-numbers parameter sweeps.
+
+Every point of a sweep plays the same outcome paths: each worker draws the
+outcome matrix of a chunk of paths once from the run's path streams and drives
+all of its points off it, so every point gets the full number of paths and the
+differences between neighbouring points are not drowned in independent noise.
+
+Points that share a configuration and support the batch engine are stacked
+into a single batch run, one slice of paths per point, so a sweep over the bet
+fraction advances every point with one vectorized update per round. Groups of
+points run concurrently on a thread or process pool; since the outcome
+matrices only depend on the seed, workers draw them independently and still
+see the same paths.
+"""
+import copy
+import dataclasses
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .simulator import Simulator, SimulationConfig, BettingStrategy
+from .random_streams import PathStreams, resolve_seed, STREAM_BLOCK_PATHS
+from .aggregation import CHUNK_CELLS
+from .metrics import RUIN_THRESHOLD
+
+
+# Parameters a sweep can vary
+SWEEP_PARAMETERS = ('bet_fraction', 'initial_bankroll')
+
+class StackedStrategy(BettingStrategy):
+    """
+    Several batch strategies run side by side in one batch.
+
+    The paths of the batch are split into equal consecutive slices, one per
+    strategy, and every call is forwarded to each strategy with its slice.
+    Strategies of one class that only differ in their batch_parameters are
+    merged into a single strategy holding per-path parameter arrays, so the
+    whole batch takes one call per round whatever the number of slices.
+    """
+
+    uses_history = False
+
+    def __init__(self, strategies: Sequence[BettingStrategy]):
+        """
+        Initialize with the strategies of each slice.
+
+        Args:
+            strategies: Strategies supporting the batch engine
+        """
+        self.strategies = list(strategies)
+        self.mergeable = _mergeable(self.strategies)
+
+    def _slices(self, num_paths: int) -> List[slice]:
+        width = num_paths // len(self.strategies)
+        return [slice(i * width, (i + 1) * width) for i in range(len(self.strategies))]
+
+    def get_bet_fraction(self, bankroll: float, round_idx: int, history: List[Dict[str, Any]]) -> float:
+        raise NotImplementedError("StackedStrategy only runs on the batch engine")
+
+    def init_states(self, num_paths: int) -> Any:
+        width = num_paths // len(self.strategies)
+        if self.mergeable:
+            # The merged strategy travels with the states, as it depends on the width
+            merged = copy.copy(self.strategies[0])
+            for name in merged.batch_parameters:
+                setattr(merged, name, np.repeat([getattr(s, name) for s in self.strategies], width))
+            return merged, merged.init_states(num_paths)
+        return [strategy.init_states(width) for strategy in self.strategies]
+
+    def on_round_results(self, states: Any, outcome_idx: np.ndarray, multipliers: np.ndarray,
+                         bankrolls: np.ndarray) -> Any:
+        if self.mergeable:
+            merged, merged_states = states
+            return merged, merged.on_round_results(merged_states, outcome_idx, multipliers, bankrolls)
+        return [
+            strategy.on_round_results(state, outcome_idx[part], multipliers[part], bankrolls[part])
+            for strategy, state, part in zip(self.strategies, states, self._slices(len(bankrolls)))
+        ]
+
+    def compact_states(self, states: Any, keep: np.ndarray) -> Any:
+        if not self.mergeable:
+            # Unmerged strategies each own an equal slice of the batch
+            raise NotImplementedError("StackedStrategy can only compact merged strategies")
+        merged, merged_states = states
+        compacted = copy.copy(merged)
+        for name in compacted.batch_parameters:
+            setattr(compacted, name, getattr(merged, name)[keep])
+        return compacted, merged.compact_states(merged_states, keep)
+
+    def get_bet_fractions(self, bankrolls: np.ndarray, round_idx: int, states: Any) -> np.ndarray:
+        if self.mergeable:
+            merged, merged_states = states
+            return merged.get_bet_fractions(bankrolls, round_idx, merged_states)
+        fractions = np.empty(len(bankrolls))
+        for strategy, state, part in zip(self.strategies, states, self._slices(len(bankrolls))):
+            fractions[part] = strategy.get_bet_fractions(bankrolls[part], round_idx, state)
+        return fractions
+
+
+def _mergeable(strategies: Sequence[BettingStrategy]) -> bool:
+    """
+    Whether strategies can run as one strategy with per-path parameter arrays.
+
+    They must share a class whose batch_parameters are declared by the class
+    defining the vectorized methods or a subclass of it, and agree on every
+    other attribute.
+    """
+    cls = type(strategies[0])
+    if len(strategies) < 2 or not cls.batch_parameters or any(type(s) is not cls for s in strategies):
+        return False
+    mro = cls.__mro__
+
+    def owner(attribute: str) -> int:
+        return next(i for i, base in enumerate(mro) if attribute in base.__dict__)
+
+    if owner('batch_parameters') > min(owner('get_bet_fractions'), owner('on_round_results')):
+        return False
+    try:
+        shared = [
+            {name: value for name, value in vars(s).items() if name not in cls.batch_parameters}
+            for s in strategies
+        ]
+        return all(attributes == shared[0] for attributes in shared[1:])
+    except (TypeError, ValueError):
+        # Attributes that cannot be compared, e.g. arrays
+        return False
+
+
+class PointStatistics:
+    """
+    Per-path values of one sweep point, collected chunk by chunk.
+    """
+
+    def __init__(self):
+        self.final_bankrolls: List[np.ndarray] = []
+        self.max_drawdowns: List[np.ndarray] = []
+        self.time_under_water: List[np.ndarray] = []
+        self.longest_losing_streaks: List[np.ndarray] = []
+
+    def add(self, partial: Dict[str, Any], part: slice = slice(None)):
+        """Add the paths of a chunk, or the part of them that belongs to this point."""
+        self.final_bankrolls.append(partial['final_bankrolls'][part])
+        self.max_drawdowns.append(partial['max_drawdowns'][part])
+        self.time_under_water.append(partial['time_under_water'][part])
+        self.longest_losing_streaks.append(partial['longest_losing_streaks'][part])
+
+    def summarize(self) -> Dict[str, Any]:
+        """
+        Compute the statistics reported for a sweep point.
+
+        Returns:
+            dict: Mean, median and standard deviation of the final bankroll,
+                  probability of ruin, mean max drawdown, mean time under
+                  water and mean longest losing streak
+        """
+        final_bankrolls = np.concatenate(self.final_bankrolls)
+        return {
+            'mean_final_bankroll': float(np.mean(final_bankrolls)),
+            'median_final_bankroll': float(np.median(final_bankrolls)),
+            'std_final_bankroll': float(np.std(final_bankrolls)),
+            'probability_of_ruin': float(np.mean(final_bankrolls <= RUIN_THRESHOLD)),
+            'mean_max_drawdown': float(np.mean(np.concatenate(self.max_drawdowns))),
+            'mean_time_under_water': float(np.mean(np.concatenate(self.time_under_water))),
+            'mean_longest_losing_streak': float(np.mean(np.concatenate(self.longest_losing_streaks))),
+        }
+
+
+def sweep_chunk_paths(num_rounds: int, num_stacked: int) -> int:
+    """
+    Number of paths per chunk and point, a whole number of stream blocks.
+
+    Stacked points share a chunk, so the chunk shrinks with their number to
+    keep the trajectory memory of a chunk bounded.
+    """
+    blocks = max(1, CHUNK_CELLS // ((num_rounds + 1) * STREAM_BLOCK_PATHS * max(1, num_stacked)))
+    return blocks * STREAM_BLOCK_PATHS
+
+
+def _stackable_groups(configs: Sequence[SimulationConfig], strategies: Sequence[BettingStrategy],
+                      engine: str) -> List[List[int]]:
+    """
+    Split points into runs of consecutive points that can share one batch.
+    """
+    batch = [engine != 'scalar' and strategy.supports_batch() for strategy in strategies]
+    groups: List[List[int]] = []
+    for i, config in enumerate(configs):
+        previous = groups[-1][-1] if groups else None
+        if previous is not None and batch[i] and batch[previous] and configs[previous] is config:
+            groups[-1].append(i)
+        else:
+            groups.append([i])
+    return groups
+
+
+def run_sweep_points(configs: Sequence[SimulationConfig], strategies: Sequence[BettingStrategy],
+                     seed: int, engine: str = 'auto', progress_callback=None) -> List[Dict[str, Any]]:
+    """
+    Run sweep points on common random numbers in the calling thread.
+
+    Args:
+        configs: Configuration of each point; they must agree on everything
+                 but the initial bankroll, and may be the same object
+        strategies: Strategy of each point
+        seed: Run seed the path streams are derived from
+        engine: 'batch', 'scalar' or 'auto', as for Simulator
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+    Returns:
+        list: Statistics of every point, in order
+    """
+    base_config = configs[0]
+    num_paths = base_config.num_simulations
+    num_rounds = base_config.num_rounds
+    sampler = base_config.get_sampler()
+    groups = _stackable_groups(configs, strategies, engine)
+    statistics = [PointStatistics() for _ in strategies]
+
+    runners = []
+    for group in groups:
+        if len(group) > 1:
+            runners.append((group, StackedStrategy([strategies[i] for i in group])))
+        else:
+            runners.append((group, Simulator(configs[group[0]], strategies[group[0]], engine=engine)))
+
+    from .batch import run_batch_paths
+
+    chunk_paths = sweep_chunk_paths(num_rounds, max(len(group) for group in groups))
+    for chunk_start in range(0, num_paths, chunk_paths):
+        chunk_stop = min(chunk_start + chunk_paths, num_paths)
+        width = chunk_stop - chunk_start
+
+        # One outcome matrix for the chunk, shared by every point
+        streams = PathStreams(
+            seed, chunk_start, chunk_stop, num_paths, antithetic=base_config.antithetic,
+            qmc_dimensions=num_rounds if base_config.qmc else None
+        )
+        outcome_indices = sampler.indices_from_uniforms(streams.uniforms(num_rounds))
+
+        for group, runner in runners:
+            if isinstance(runner, StackedStrategy):
+                # Every point of the group gets its own copy of the chunk's paths
+                partial = run_batch_paths(
+                    configs[group[0]], runner, seed, 0, width * len(group), record_paths=[],
+                    outcome_indices=np.tile(outcome_indices, (1, len(group))), record_trajectories=False
+                )
+                for slot, i in enumerate(group):
+                    part = slice(slot * width, (slot + 1) * width)
+                    statistics[i].add(partial, part)
+            else:
+                partial = runner.run_path_range(
+                    seed, chunk_start, chunk_stop, record_paths=[], outcome_indices=outcome_indices
+                )
+                statistics[group[0]].add(partial)
+
+        if progress_callback:
+            progress_callback(chunk_stop / num_paths)
+
+    return [point.summarize() for point in statistics]
+
+
+def run_parameter_sweep(config: SimulationConfig, strategy_factory: Callable[[float], BettingStrategy],
+                        parameter: str, values: Sequence[float], executor: str = 'serial',
+                        max_workers: Optional[int] = None, engine: str = 'auto',
+                        progress_callback=None) -> Dict[str, Any]:
+    """
+    Sweep a parameter with the full number of paths at every point.
+
+    Args:
+        config: Simulation configuration; num_simulations paths run at every point
+        strategy_factory: Creates the strategy of a point from its parameter value
+                          (called with the bet fraction, or with the initial
+                          bankroll when that is swept)
+        parameter: 'bet_fraction' or 'initial_bankroll'
+        values: Parameter value of each point
+        executor: 'serial' runs in the calling thread, 'thread' and 'process'
+                  split the points into groups run on a pool
+        max_workers: Pool size for the thread and process executors
+                     (defaults to the number of CPUs)
+        engine: 'batch', 'scalar' or 'auto', as for Simulator
+        progress_callback: Optional callback function to report progress (receives value 0.0-1.0)
+
+    Returns:
+        dict: 'parameter', the run 'seed' and 'sweep_results' with the
+              statistics of every point
+    """
+    if parameter not in SWEEP_PARAMETERS:
+        raise ValueError(f"Unknown sweep parameter '{parameter}' (expected one of {', '.join(SWEEP_PARAMETERS)})")
+    if executor not in Simulator.EXECUTOR_CHOICES:
+        raise ValueError(f"Unknown executor '{executor}' (expected one of {', '.join(Simulator.EXECUTOR_CHOICES)})")
+    if engine == 'analytic':
+        raise ValueError("The analytic engine cannot drive sweep points off shared outcome paths")
+
+    start_time = time.time()
+    seed = resolve_seed(config.seed)
+    values = [float(value) for value in values]
+    strategies = [strategy_factory(value) for value in values]
+    if parameter == 'initial_bankroll':
+        configs = [dataclasses.replace(config, initial_bankroll=value) for value in values]
+    else:
+        configs = [config] * len(values)
+
+    if executor == 'serial' or len(values) == 1:
+        point_results = run_sweep_points(configs, strategies, seed, engine, progress_callback)
+    else:
+        point_results = _run_sweep_sharded(configs, strategies, seed, engine, executor, max_workers,
+                                           progress_callback)
+
+    return {
+        'parameter': parameter,
+        'seed': seed,
+        'num_simulations': config.num_simulations,
+        'sweep_results': [
+            {'param_value': value, **point} for value, point in zip(values, point_results)
+        ],
+        'elapsed_time': time.time() - start_time,
+    }
+
+
+def _point_groups(num_points: int, num_groups: int) -> List[Tuple[int, int]]:
+    """Split the points into contiguous groups of nearly equal size."""
+    bounds = np.linspace(0, num_points, min(num_groups, num_points) + 1).round().astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def _run_sweep_sharded(configs, strategies, seed: int, engine: str, executor: str,
+                       max_workers: Optional[int], progress_callback=None) -> List[Dict[str, Any]]:
+    """Run groups of sweep points concurrently on a thread or process pool."""
+    max_workers = max_workers or os.cpu_count() or 1
+    groups = _point_groups(len(strategies), max_workers)
+    pool_class = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+
+    point_results: List[Optional[Dict[str, Any]]] = [None] * len(strategies)
+    done = 0
+    with pool_class(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(run_sweep_points, configs[start:stop], strategies[start:stop], seed, engine): (start, stop)
+            for start, stop in groups
+        }
+        for future in as_completed(futures):
+            start, stop = futures[future]
+            point_results[start:stop] = future.result()
+            done += stop - start
+            if progress_callback:
+                progress_callback(done / len(strategies))
+    return point_results
@@ -0,0 +1,217 @@
+"""
+Variance reduction for the Monte Carlo estimates of a run.
+
+Two opt-in techniques are supported:
+
+- Antithetic draws (SimulationConfig.antithetic): paths 2k and 2k + 1 use
+  mirrored uniforms, and each pair counts as one sampling unit.
+- Control variates (Simulator(control_variates=True)): every path also
+  records the log-growth its outcomes would have produced under a fixed
+  reference fraction. Its expectation is known exactly, so the deviation of
+  a path's control from that expectation corrects its final bankroll and ruin
+  indicator by the regression coefficient between them.
+
+Statistics are kept as mergeable co-moments, so shards and streaming chunks
+combine exactly. The summary reports the estimates with their standard
+errors, the variance-reduction factor (naive variance over the variance of
+the estimator used) and the effective sample size.
+"""
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .history import ColumnarHistory
+from .metrics import RUIN_THRESHOLD
+
+
+# The reference fraction is kept away from 0 (no signal) and 1 (log of zero)
+MIN_REFERENCE_FRACTION = 0.01
+MAX_REFERENCE_FRACTION = 0.99
+
+# Estimated quantities, in the order of the co-moment vectors
+TARGETS = ('mean_final_bankroll', 'probability_of_ruin')
+
+
+def reference_fraction(config, strategy) -> float:
+    """
+    Get the fixed fraction whose log-growth serves as the control variate.
+
+    This is the strategy's first bet of a path: the constant fraction of
+    Fixed Fraction and Kelly, the base fraction of Martingale.
+    """
+    fraction = strategy.get_state_bet_fraction(
+        config.initial_bankroll, 0, strategy.init_state(), ColumnarHistory()
+    )
+    return min(max(fraction, MIN_REFERENCE_FRACTION), MAX_REFERENCE_FRACTION)
+
+
+def control_log_factors(config, strategy) -> np.ndarray:
+    """
+    Log-growth of each outcome at the reference fraction.
+
+    Returns:
+        np.ndarray: One log factor per outcome, indexed like config.outcomes
+    """
+    fraction = reference_fraction(config, strategy)
+    multipliers = np.array([o.multiplier for o in config.outcomes], dtype=float)
+    return np.log(np.maximum(1.0 - fraction + fraction * multipliers, 1e-300))
+
+
+def expected_control(config, log_factors: np.ndarray) -> float:
+    """
+    Exact expectation of a path's control value over num_rounds rounds.
+    """
+    probabilities = np.array([o.probability for o in config.outcomes], dtype=float)
+    probabilities = probabilities / probabilities.sum()
+    return config.num_rounds * float(np.dot(probabilities, log_factors))
+
+
+class CoMoments:
+    """
+    Running count, mean vector and co-moment matrix (Chan et al.).
+    """
+
+    def __init__(self, dimension: int):
+        self.count = 0
+        self.mean = np.zeros(dimension)
+        self.m2 = np.zeros((dimension, dimension))
+
+    def update(self, rows: np.ndarray):
+        """Add a batch of observations, one row each."""
+        if len(rows) == 0:
+            return
+        batch = CoMoments(rows.shape[1])
+        batch.count = len(rows)
+        batch.mean = rows.mean(axis=0)
+        deviations = rows - batch.mean
+        batch.m2 = deviations.T @ deviations
+        self.merge(batch)
+
+    def merge(self, other: 'CoMoments'):
+        """Combine with the co-moments of another set of observations."""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / count
+        self.m2 = self.m2 + other.m2 + np.outer(delta, delta) * self.count * other.count / count
+        self.count = count
+
+    @property
+    def covariance(self) -> np.ndarray:
+        """Sample covariance matrix."""
+        return self.m2 / max(self.count - 1, 1)
+
+
+class VarianceReductionStats:
+    """
+    Mergeable statistics for antithetic and control-variate estimates.
+    """
+
+    def __init__(self, antithetic: bool, control: bool):
+        """
+        Initialize empty statistics.
+
+        Args:
+            antithetic: Whether consecutive path pairs are antithetic units
+            control: Whether the partials carry control values
+        """
+        self.antithetic = antithetic
+        self.control = control
+        # Per path: final bankroll, ruin indicator
+        self.paths = CoMoments(len(TARGETS))
+        # Per sampling unit: final bankroll, ruin indicator, control value
+        self.units = CoMoments(len(TARGETS) + 1)
+
+    def add_partial(self, partial: Dict[str, Any]):
+        """
+        Add the paths of a partial result from Simulator.run_path_range.
+        """
+        final_bankrolls = partial['final_bankrolls']
+        values = np.column_stack([final_bankrolls, final_bankrolls <= RUIN_THRESHOLD])
+        self.paths.update(values)
+
+        controls = partial.get('control_values')
+        if controls is None:
+            controls = np.zeros(len(final_bankrolls))
+        rows = np.column_stack([values, controls])
+
+        if self.antithetic:
+            # Partials start on even paths, so pairs never straddle two partials
+            num_pairs = len(rows) // 2
+            units = rows[:2 * num_pairs].reshape(num_pairs, 2, -1).mean(axis=1)
+            if len(rows) % 2:
+                units = np.vstack([units, rows[-1:]])
+            rows = units
+        self.units.update(rows)
+
+    def merge(self, other: 'VarianceReductionStats'):
+        """Combine with the statistics of another set of paths."""
+        self.paths.merge(other.paths)
+        self.units.merge(other.units)
+
+    def summarize(self, expected_control_value: Optional[float]) -> Dict[str, Any]:
+        """
+        Compute the variance-reduced estimates.
+
+        Args:
+            expected_control_value: Exact expectation of the control, or None
+                                    without control variates
+
+        Returns:
+            dict: Per target the estimate, standard errors, variance-reduction
+                  factor and effective sample size
+        """
+        num_paths = self.paths.count
+        num_units = self.units.count
+        path_covariance = self.paths.covariance
+        unit_covariance = self.units.covariance
+        control_variance = unit_covariance[-1, -1]
+        use_control = self.control and expected_control_value is not None and control_variance > 0
+
+        summary: Dict[str, Any] = {
+            'antithetic': self.antithetic,
+            'control_variate': use_control,
+            'num_units': num_units,
+        }
+        for i, name in enumerate(TARGETS):
+            estimate = self.units.mean[i]
+            variance = unit_covariance[i, i]
+            beta = 0.0
+            if use_control:
+                beta = unit_covariance[i, -1] / control_variance
+                estimate -= beta * (self.units.mean[-1] - expected_control_value)
+                variance -= unit_covariance[i, -1] ** 2 / control_variance
+            estimator_variance = max(variance, 0.0) / max(num_units, 1)
+            naive_variance = path_covariance[i, i] / max(num_paths, 1)
+
+            if estimator_variance > 0:
+                factor = naive_variance / estimator_variance
+            else:
+                factor = 1.0 if naive_variance == 0 else float('inf')
+            summary[name] = {
+                'estimate': float(estimate),
+                'raw_estimate': float(self.paths.mean[i]),
+                'standard_error': float(np.sqrt(estimator_variance)),
+                'naive_standard_error': float(np.sqrt(naive_variance)),
+                'variance_reduction_factor': float(factor),
+                'effective_sample_size': float(num_paths * factor),
+                'control_coefficient': float(beta),
+            }
+        return summary
+
+
+def apply_variance_reduction(results: Dict[str, Any], summary: Dict[str, Any]):
+    """
+    Replace the plain estimates in a result dictionary with the reduced ones.
+
+    Args:
+        results: Aggregated simulation results, updated in place
+        summary: Output of VarianceReductionStats.summarize
+    """
+    results['mean_final_bankroll'] = summary['mean_final_bankroll']['estimate']
+    results['probability_of_ruin'] = min(max(summary['probability_of_ruin']['estimate'], 0.0), 1.0)
+    results['variance_reduction'] = summary
+    # The bootstrap intervals of the plain estimates do not apply to the reduced ones
+    for name in ('mean_final_bankroll', 'probability_of_ruin'):
+        results.get('bootstrap', {}).get('intervals', {}).pop(name, None)
@@ -44,12 +44,23 @@ OutcomeFormSet = forms.inlineformset_factory(
 
 class SimulationForm(forms.ModelForm):
     """Form for creating or updating a simulation"""
+    comparison_strategies = forms.MultipleChoiceField(
+        choices=Simulation.STRATEGY_CHOICES, required=False,
+        widget=forms.CheckboxSelectMultiple(attrs={'class': 'form-check-input'}),
+        help_text="Strategies played on the same outcome paths and compared pairwise."
+    )
+    
     class Meta:
         model = Simulation
         fields = [
             'name', 'description', 'initial_bankroll', 'num_rounds',
-            'bet_fraction', 'num_simulations', 'strategy', 'custom_strategy',
-            'is_parameter_sweep', 'sweep_parameter', 'sweep_start', 'sweep_end', 'sweep_steps'
+            'bet_fraction', 'num_simulations', 'seed', 'engine', 'target_ruin_half_width', 'target_mean_half_width',
+            'ruin_importance_sampling', 'qmc_sampling', 'pathwise_sensitivities', 'strategy', 'custom_strategy', 'kelly_multiplier',
+            'is_parameter_sweep', 'sweep_parameter', 'sweep_start', 'sweep_end', 'sweep_steps',
+            'sweep_parameter_2', 'sweep_start_2', 'sweep_end_2', 'sweep_steps_2',
+            'sweep_parameter_3', 'sweep_start_3', 'sweep_end_3', 'sweep_steps_3', 'sweep_outcome',
+            'is_strategy_comparison', 'comparison_strategies',
+            'is_optimization', 'optimization_objective', 'max_ruin_probability'
         ]
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control'}),
@@ -58,25 +69,51 @@ class SimulationForm(forms.ModelForm):
             'num_rounds': forms.NumberInput(attrs={'class': 'form-control', 'min': '1', 'max': '10000'}),
             'bet_fraction': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': '0', 'max': '1'}),
             'num_simulations': forms.NumberInput(attrs={'class': 'form-control', 'min': '1', 'max': '10000'}),
+            'seed': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
+            'engine': forms.Select(attrs={'class': 'form-select'}),
+            'target_ruin_half_width': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.001', 'min': '0.0001'}),
+            'target_mean_half_width': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1', 'min': '0.01'}),
+            'ruin_importance_sampling': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+            'qmc_sampling': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+            'pathwise_sensitivities': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'strategy': forms.Select(attrs={'class': 'form-select', 'id': 'strategy-select'}),
             'custom_strategy': forms.Select(attrs={'class': 'form-select', 'id': 'custom-strategy-select'}),
+            'kelly_multiplier': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.05', 'min': '0', 'max': '1'}),
             'is_parameter_sweep': forms.CheckboxInput(attrs={'class': 'form-check-input', 'id': 'is-parameter-sweep'}),
             'sweep_parameter': forms.Select(attrs={'class': 'form-select', 'id': 'sweep-parameter'}),
             'sweep_start': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'sweep_end': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'sweep_steps': forms.NumberInput(attrs={'class': 'form-control', 'min': '2', 'max': '100'}),
+            'sweep_parameter_2': forms.Select(attrs={'class': 'form-select'}),
+            'sweep_start_2': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+            'sweep_end_2': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+            'sweep_steps_2': forms.NumberInput(attrs={'class': 'form-control', 'min': '2', 'max': '100'}),
+            'sweep_parameter_3': forms.Select(attrs={'class': 'form-select'}),
+            'sweep_start_3': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+            'sweep_end_3': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+            'sweep_steps_3': forms.NumberInput(attrs={'class': 'form-control', 'min': '2', 'max': '100'}),
+            'sweep_outcome': forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
+            'is_strategy_comparison': forms.CheckboxInput(attrs={'class': 'form-check-input', 'id': 'is-strategy-comparison'}),
+            'is_optimization': forms.CheckboxInput(attrs={'class': 'form-check-input', 'id': 'is-optimization'}),
+            'optimization_objective': forms.Select(attrs={'class': 'form-select'}),
+            'max_ruin_probability': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.001', 'min': '0', 'max': '1'}),
         }
     
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         
-        # Setup sweep_parameter choices
-        self.fields['sweep_parameter'].choices = [
-            ('', '-- Select Parameter --'),
-            ('bet_fraction', 'Bet Fraction'),
-            ('initial_bankroll', 'Initial Bankroll'),
-        ]
+        # Setup sweep parameter choices; the second and third axes are optional
+        for name, empty_label in (('sweep_parameter', '-- Select Parameter --'),
+                                  ('sweep_parameter_2', '-- None --'), ('sweep_parameter_3', '-- None --')):
+            self.fields[name] = forms.ChoiceField(
+                choices=[('', empty_label)] + Simulation.SWEEP_PARAMETER_CHOICES, required=False,
+                label=self.fields[name].label, widget=self.fields[name].widget
+            )
+        
+        # The model stores the compared strategies as a comma-separated list
+        if self.instance.pk:
+            self.initial['comparison_strategies'] = self.instance.get_comparison_strategies()
         
         # Filter custom strategies by user if user is provided
         if user and not user.is_anonymous:
@@ -94,26 +131,89 @@ class SimulationForm(forms.ModelForm):
         if strategy == 'custom' and not custom_strategy:
             self.add_error('custom_strategy', 'A custom strategy must be selected.')
         
+        # The exact engines only solve some strategies
+        engine = cleaned_data.get('engine')
+        if engine == 'analytic' and strategy not in ('fixed_fraction', 'kelly_criterion'):
+            self.add_error('engine', 'The analytic engine only runs the Fixed Fraction and Kelly strategies.')
+        if engine == 'markov' and strategy == 'martingale':
+            self.add_error('engine', 'The Markov chain needs a strategy whose bet depends only on the bankroll.')
+
+        # The exact engines do not sample paths, so sampling options do not apply
+        if engine in ('analytic', 'markov'):
+            if cleaned_data.get('qmc_sampling'):
+                self.add_error('qmc_sampling', 'Quasi-Monte Carlo sampling needs the batch, scalar or auto engine.')
+            if cleaned_data.get('ruin_importance_sampling'):
+                self.add_error('ruin_importance_sampling', 'Importance sampling needs the batch, scalar or auto engine.')
+            for name in ('target_ruin_half_width', 'target_mean_half_width'):
+                if cleaned_data.get(name):
+                    self.add_error(name, 'Precision targets need the batch, scalar or auto engine.')
+
         # Validate parameter sweep values if enabled
         if is_parameter_sweep:
             sweep_parameter = cleaned_data.get('sweep_parameter')
-            sweep_start = cleaned_data.get('sweep_start')
-            sweep_end = cleaned_data.get('sweep_end')
-            sweep_steps = cleaned_data.get('sweep_steps')
             
             if not sweep_parameter:
                 self.add_error('sweep_parameter', 'Parameter to sweep is required.')
             
-            if sweep_start is None:
-                self.add_error('sweep_start', 'Start value is required.')
+            if cleaned_data.get('sweep_parameter_3') and not cleaned_data.get('sweep_parameter_2'):
+                self.add_error('sweep_parameter_3', 'Set the second axis before the third.')
+            
+            swept = []
+            for suffix in ('', '_2', '_3'):
+                parameter = cleaned_data.get(f'sweep_parameter{suffix}')
+                if not parameter:
+                    continue
+                if parameter in swept:
+                    self.add_error(f'sweep_parameter{suffix}', 'Every sweep axis needs a different parameter.')
+                swept.append(parameter)
+                self._clean_sweep_axis(cleaned_data, suffix)
+            
+            if {'outcome_probability', 'outcome_multiplier'} & set(swept) and not cleaned_data.get('sweep_outcome'):
+                self.add_error('sweep_outcome', 'Select the outcome whose probability or multiplier is swept.')
+            
+            if {'martingale_base_fraction', 'martingale_max_fraction'} & set(swept) and strategy != 'martingale':
+                self.add_error('strategy', 'Martingale fractions can only be swept with the Martingale strategy.')
+        
+        # Validate the compared strategies if a strategy comparison is enabled
+        if cleaned_data.get('is_strategy_comparison'):
+            comparison_strategies = cleaned_data.get('comparison_strategies', '').split(',')
             
-            if sweep_end is None:
-                self.add_error('sweep_end', 'End value is required.')
+            if is_parameter_sweep:
+                self.add_error('is_strategy_comparison', 'A simulation cannot be both a parameter sweep and a strategy comparison.')
             
-            if sweep_steps is None:
-                self.add_error('sweep_steps', 'Number of steps is required.')
+            if len([key for key in comparison_strategies if key]) < 2:
+                self.add_error('comparison_strategies', 'Select at least two strategies to compare.')
             
-            if sweep_start is not None and sweep_end is not None and sweep_start >= sweep_end:
-                self.add_error('sweep_end', 'End value must be greater than start value.')
+            if 'custom' in comparison_strategies and not custom_strategy:
+                self.add_error('custom_strategy', 'A custom strategy must be selected to compare it.')
         
-        return cleaned_data 
\ No newline at end of file
+        # The bet-fraction optimization is a run type of its own
+        if cleaned_data.get('is_optimization'):
+            if is_parameter_sweep or cleaned_data.get('is_strategy_comparison'):
+                self.add_error('is_optimization', 'An optimization cannot also be a parameter sweep or a strategy comparison.')
+            
+            if strategy == 'custom':
+                self.add_error('is_optimization', 'Custom strategies do not take a bet fraction to optimize.')
+        
+        return cleaned_data
+    
+    def _clean_sweep_axis(self, cleaned_data, suffix):
+        """Validate the range of one sweep axis."""
+        sweep_start = cleaned_data.get(f'sweep_start{suffix}')
+        sweep_end = cleaned_data.get(f'sweep_end{suffix}')
+        sweep_steps = cleaned_data.get(f'sweep_steps{suffix}')
+        
+        if sweep_start is None:
+            self.add_error(f'sweep_start{suffix}', 'Start value is required.')
+        
+        if sweep_end is None:
+            self.add_error(f'sweep_end{suffix}', 'End value is required.')
+        
+        if sweep_steps is None:
+            self.add_error(f'sweep_steps{suffix}', 'Number of steps is required.')
+        
+        if sweep_start is not None and sweep_end is not None and sweep_start >= sweep_end:
+            self.add_error(f'sweep_end{suffix}', 'End value must be greater than start value.')
+    
+    def clean_comparison_strategies(self):
+        return ','.join(self.cleaned_data['comparison_strategies']) 
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+Benchmark the simulation engine across executors and worker counts.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from simulation.engine import (
+    Simulator, SimulationConfig, OutcomeConfig, FixedFractionStrategy, MartingaleStrategy
+)
+
+
+class Command(BaseCommand):
+    help = "Time run_multiple_simulations for increasing worker counts and report the speedup."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simulations', type=int, default=20000, help="Number of paths per run")
+        parser.add_argument('--rounds', type=int, default=1000, help="Number of rounds per path")
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                            help="Worker counts to benchmark")
+        parser.add_argument('--executor', choices=['thread', 'process'], default='process')
+        # The analytic engine ignores executors, so Monte Carlo is the default here
+        parser.add_argument('--engine', choices=Simulator.ENGINE_CHOICES, default='batch')
+        parser.add_argument('--strategy', choices=['fixed_fraction', 'martingale'], default='fixed_fraction')
+        parser.add_argument('--seed', type=int, default=12345)
+
+    def handle(self, *args, **options):
+        config = SimulationConfig(
+            initial_bankroll=100.0,
+            num_rounds=options['rounds'],
+            num_simulations=options['simulations'],
+            outcomes=[
+                OutcomeConfig(name='Win', probability=0.55, multiplier=2.0),
+                OutcomeConfig(name='Loss', probability=0.45, multiplier=0.0),
+            ],
+            seed=options['seed'],
+        )
+        if options['strategy'] == 'martingale':
+            strategy = MartingaleStrategy(base_fraction=0.01, max_fraction=0.1)
+        else:
+            strategy = FixedFractionStrategy(fraction=0.1)
+
+        self.stdout.write(
+            f"{options['simulations']} paths x {options['rounds']} rounds, "
+            f"{options['strategy']} strategy, {options['engine']} engine"
+        )
+
+        self.stdout.write(f"{'executor':>10} {'workers':>8} {'time':>11} {'speedup':>9}")
+
+        # Serial baseline
+        baseline, reference = self._time_run(Simulator(config, strategy, engine=options['engine']))
+        self.stdout.write(f"{'serial':>10} {'1':>8} {baseline:10.2f}s {1.0:8.2f}x")
+
+        for workers in options['workers']:
+            simulator = Simulator(
+                config, strategy, engine=options['engine'],
+                executor=options['executor'], max_workers=workers
+            )
+            elapsed, results = self._time_run(simulator)
+            if results['mean_final_bankroll'] != reference['mean_final_bankroll']:
+                self.stderr.write(f"Results with {workers} workers differ from the serial run")
+            self.stdout.write(
+                f"{options['executor']:>10} {workers:>8} {elapsed:10.2f}s {baseline / elapsed:8.2f}x"
+            )
+
+    def _time_run(self, simulator):
+        start = time.perf_counter()
+        results = simulator.run_multiple_simulations()
+        return time.perf_counter() - start, results
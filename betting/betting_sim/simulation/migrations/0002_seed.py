@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:51
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulation',
+            name='seed',
+            field=models.BigIntegerField(blank=True, help_text='Leave blank to draw a new random seed for every run.', null=True, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.AddField(
+            model_name='simulationresult',
+            name='seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:12
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0002_seed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulation',
+            name='target_mean_half_width',
+            field=models.FloatField(blank=True, help_text='Stop once the 95% CI on the mean final bankroll is within this half-width.', null=True, validators=[django.core.validators.MinValueValidator(0.01)]),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='target_ruin_half_width',
+            field=models.FloatField(blank=True, help_text='Stop once the 95% CI on the ruin probability is within this half-width.', null=True, validators=[django.core.validators.MinValueValidator(0.0001)]),
+        ),
+    ]
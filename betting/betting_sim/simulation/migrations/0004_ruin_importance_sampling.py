@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0003_precision_target'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulation',
+            name='ruin_importance_sampling',
+            field=models.BooleanField(default=False, help_text='Estimate the probability of ruin by importance sampling (for rare ruin).'),
+        ),
+    ]
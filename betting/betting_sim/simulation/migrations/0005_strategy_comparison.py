@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0004_ruin_importance_sampling'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulation',
+            name='comparison_strategies',
+            field=models.CharField(blank=True, help_text='Comma-separated strategies compared on common random numbers.', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='is_strategy_comparison',
+            field=models.BooleanField(default=False),
+        ),
+    ]
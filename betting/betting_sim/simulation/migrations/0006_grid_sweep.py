@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:34
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0005_strategy_comparison'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulation',
+            name='sweep_end_2',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='sweep_end_3',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='sweep_outcome',
+            field=models.IntegerField(blank=True, help_text='Number of the outcome (1 for the first) whose probability or multiplier is swept.', null=True, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='sweep_parameter_2',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='sweep_parameter_3',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='sweep_start_2',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='sweep_start_3',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='sweep_steps_2',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='sweep_steps_3',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:37
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0006_grid_sweep'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulation',
+            name='is_optimization',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='max_ruin_probability',
+            field=models.FloatField(blank=True, help_text='Largest acceptable probability of ruin (leave blank for no cap).', null=True, validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(1.0)]),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='optimization_objective',
+            field=models.CharField(choices=[('median_final_bankroll', 'Median Final Bankroll'), ('mean_final_bankroll', 'Mean Final Bankroll')], default='median_final_bankroll', max_length=50),
+        ),
+    ]
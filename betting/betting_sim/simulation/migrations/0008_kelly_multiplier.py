@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:40
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0007_bet_fraction_optimization'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulation',
+            name='kelly_multiplier',
+            field=models.FloatField(default=1.0, help_text='Share of the full Kelly fraction to bet (0.5 for half Kelly).', validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(1.0)]),
+        ),
+    ]
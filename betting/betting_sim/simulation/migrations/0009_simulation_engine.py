@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0008_kelly_multiplier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulation',
+            name='engine',
+            field=models.CharField(choices=[('auto', 'Automatic'), ('analytic', 'Analytic (exact)'), ('markov', 'Markov Chain (bankroll grid)'), ('batch', 'Batch Monte Carlo'), ('scalar', 'Scalar Monte Carlo')], default='auto', help_text='The Markov chain solves strategies whose bet depends only on the bankroll.', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0009_simulation_engine'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulation',
+            name='qmc_sampling',
+            field=models.BooleanField(default=False, help_text='Quasi-Monte Carlo (Sobol) sampling, which converges faster for short horizons.', verbose_name='Quasi-Monte Carlo sampling'),
+        ),
+    ]
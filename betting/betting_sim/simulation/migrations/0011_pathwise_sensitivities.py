@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0010_qmc_sampling'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulation',
+            name='pathwise_sensitivities',
+            field=models.BooleanField(default=False, help_text='Estimate how the mean final bankroll and log-growth change with the bet fraction (Fixed Fraction and Kelly only).', verbose_name='Bet-fraction sensitivities'),
+        ),
+    ]
@@ -1,7 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.validators import MinValueValidator, MaxValueValidator
 import json
 
+from .engine.sketches import TrajectorySketch
+from .engine.grid import decode_grid_array
+
 
 class Outcome(models.Model):
     """
@@ -27,6 +31,29 @@ class Simulation(models.Model):
         ('custom', 'Custom Strategy'),
     ]
     
+    SWEEP_PARAMETER_CHOICES = [
+        ('bet_fraction', 'Bet Fraction'),
+        ('initial_bankroll', 'Initial Bankroll'),
+        ('num_rounds', 'Number of Rounds'),
+        ('outcome_probability', 'Outcome Probability'),
+        ('outcome_multiplier', 'Outcome Multiplier'),
+        ('martingale_base_fraction', 'Martingale Base Fraction'),
+        ('martingale_max_fraction', 'Martingale Max Fraction'),
+    ]
+    
+    ENGINE_CHOICES = [
+        ('auto', 'Automatic'),
+        ('analytic', 'Analytic (exact)'),
+        ('markov', 'Markov Chain (bankroll grid)'),
+        ('batch', 'Batch Monte Carlo'),
+        ('scalar', 'Scalar Monte Carlo'),
+    ]
+    
+    OPTIMIZATION_OBJECTIVE_CHOICES = [
+        ('median_final_bankroll', 'Median Final Bankroll'),
+        ('mean_final_bankroll', 'Mean Final Bankroll'),
+    ]
+    
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='simulations', null=True, blank=True)
@@ -38,11 +65,52 @@ class Simulation(models.Model):
     num_rounds = models.IntegerField(default=100)
     bet_fraction = models.FloatField(default=0.1)
     num_simulations = models.IntegerField(default=1000)
+    seed = models.BigIntegerField(null=True, blank=True, validators=[MinValueValidator(0)],
+                                  help_text="Leave blank to draw a new random seed for every run.")
+    
+    # Adaptive precision: stop early once the confidence intervals are this narrow
+    target_ruin_half_width = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(0.0001)],
+        help_text="Stop once the 95% CI on the ruin probability is within this half-width."
+    )
+    target_mean_half_width = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(0.01)],
+        help_text="Stop once the 95% CI on the mean final bankroll is within this half-width."
+    )
+    
+    # Engine of single runs (sweeps, comparisons and optimizations pick their own)
+    engine = models.CharField(
+        max_length=20, choices=ENGINE_CHOICES, default='auto',
+        help_text="The Markov chain solves strategies whose bet depends only on the bankroll."
+    )
+    
+    # Estimate rare ruin probabilities from reweighted paths tilted towards losses
+    ruin_importance_sampling = models.BooleanField(
+        default=False,
+        help_text="Estimate the probability of ruin by importance sampling (for rare ruin)."
+    )
+    
+    # Draw outcomes from scrambled Sobol sequences instead of pseudo-random numbers
+    qmc_sampling = models.BooleanField(
+        "Quasi-Monte Carlo sampling", default=False,
+        help_text="Quasi-Monte Carlo (Sobol) sampling, which converges faster for short horizons."
+    )
+    
+    # Differentiate the results with respect to the bet fraction along each path
+    pathwise_sensitivities = models.BooleanField(
+        "Bet-fraction sensitivities", default=False,
+        help_text="Estimate how the mean final bankroll and log-growth change with the bet fraction "
+                  "(Fixed Fraction and Kelly only)."
+    )
     
     # Strategy
     strategy = models.CharField(max_length=50, choices=STRATEGY_CHOICES, default='fixed_fraction')
     custom_strategy = models.ForeignKey('strategies.Strategy', on_delete=models.SET_NULL, 
                                        null=True, blank=True, related_name='simulations')
+    kelly_multiplier = models.FloatField(
+        default=1.0, validators=[MinValueValidator(0.0), MaxValueValidator(1.0)],
+        help_text="Share of the full Kelly fraction to bet (0.5 for half Kelly)."
+    )
     
     # Parameter sweeping
     is_parameter_sweep = models.BooleanField(default=False)
@@ -51,6 +119,80 @@ class Simulation(models.Model):
     sweep_end = models.FloatField(null=True, blank=True)
     sweep_steps = models.IntegerField(null=True, blank=True)
     
+    # Optional second and third axes turn the sweep into a grid over every combination
+    sweep_parameter_2 = models.CharField(max_length=50, blank=True)
+    sweep_start_2 = models.FloatField(null=True, blank=True)
+    sweep_end_2 = models.FloatField(null=True, blank=True)
+    sweep_steps_2 = models.IntegerField(null=True, blank=True)
+    sweep_parameter_3 = models.CharField(max_length=50, blank=True)
+    sweep_start_3 = models.FloatField(null=True, blank=True)
+    sweep_end_3 = models.FloatField(null=True, blank=True)
+    sweep_steps_3 = models.IntegerField(null=True, blank=True)
+    sweep_outcome = models.IntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1)],
+        help_text="Number of the outcome (1 for the first) whose probability or multiplier is swept."
+    )
+    
+    # Strategy comparison: several strategies played on the same outcome paths
+    is_strategy_comparison = models.BooleanField(default=False)
+    comparison_strategies = models.CharField(
+        max_length=200, blank=True,
+        help_text="Comma-separated strategies compared on common random numbers."
+    )
+    
+    # Bet-fraction optimization: search the best bet fraction under a ruin cap
+    is_optimization = models.BooleanField(default=False)
+    optimization_objective = models.CharField(
+        max_length=50, choices=OPTIMIZATION_OBJECTIVE_CHOICES, default='median_final_bankroll'
+    )
+    max_ruin_probability = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(0.0), MaxValueValidator(1.0)],
+        help_text="Largest acceptable probability of ruin (leave blank for no cap)."
+    )
+    
+    def get_sweep_axes(self):
+        """
+        Returns the configured sweep axes as dictionaries with 'parameter',
+        'start', 'end' and 'steps', the first axis first.
+        """
+        axes = []
+        for suffix in ('', '_2', '_3'):
+            parameter = getattr(self, f'sweep_parameter{suffix}')
+            if parameter:
+                axes.append({
+                    'parameter': parameter,
+                    'start': getattr(self, f'sweep_start{suffix}'),
+                    'end': getattr(self, f'sweep_end{suffix}'),
+                    'steps': getattr(self, f'sweep_steps{suffix}'),
+                })
+        return axes
+    
+    def get_sweep_axes_display(self):
+        """
+        Returns a description of every sweep axis.
+        """
+        choices = dict(self.SWEEP_PARAMETER_CHOICES)
+        descriptions = []
+        for axis in self.get_sweep_axes():
+            name = choices.get(axis['parameter'], axis['parameter'])
+            if axis['parameter'] in ('outcome_probability', 'outcome_multiplier'):
+                name += f" of outcome {self.sweep_outcome}"
+            descriptions.append(f"{name} from {axis['start']:.2f} to {axis['end']:.2f} ({axis['steps']} steps)")
+        return descriptions
+    
+    def get_comparison_strategies(self):
+        """
+        Returns the list of strategy keys of a strategy comparison.
+        """
+        return [key for key in self.comparison_strategies.split(',') if key]
+    
+    def get_comparison_strategies_display(self):
+        """
+        Returns the display names of the compared strategies.
+        """
+        choices = dict(self.STRATEGY_CHOICES)
+        return [choices.get(key, key) for key in self.get_comparison_strategies()]
+    
     def __str__(self):
         return self.name
 
@@ -71,6 +213,9 @@ class SimulationResult(models.Model):
     probability_of_ruin = models.FloatField()
     max_drawdown = models.FloatField()
     
+    # Seed the run's random streams were derived from, for replaying it
+    seed = models.BigIntegerField(null=True, blank=True)
+    
     # Detailed results (stored as JSON)
     detailed_results = models.TextField()
     
@@ -86,5 +231,165 @@ class SimulationResult(models.Model):
         """
         self.detailed_results = json.dumps(results_dict)
     
+    def get_precision(self):
+        """
+        Returns the achieved confidence intervals of an adaptive-precision run,
+        or None for runs with a fixed number of simulations.
+        """
+        return self.get_detailed_results().get('precision')
+    
+    def get_path_metrics(self):
+        """
+        Returns the mean time under water and the mean and longest losing
+        streak, or None for results stored before they were computed.
+        """
+        detailed_results = self.get_detailed_results()
+        if 'mean_time_under_water' not in detailed_results:
+            return None
+        return {
+            'mean_time_under_water': detailed_results['mean_time_under_water'],
+            'mean_longest_losing_streak': detailed_results['mean_longest_losing_streak'],
+            'max_longest_losing_streak': detailed_results['max_longest_losing_streak'],
+        }
+    
+    def get_risk_metrics(self):
+        """
+        Returns the risk metrics (VaR, CVaR, log growth, Sharpe-like ratio and
+        time to ruin) with the VaR and CVaR of each confidence level as one
+        row of 'tail_risk', or None for results stored before they were computed.
+        """
+        risk_metrics = self.get_detailed_results().get('risk_metrics')
+        if risk_metrics is None:
+            return None
+        risk_metrics['tail_risk'] = [
+            {
+                'confidence': key,
+                'value_at_risk': value,
+                'conditional_value_at_risk': risk_metrics['conditional_value_at_risk'][key],
+            }
+            for key, value in risk_metrics['value_at_risk'].items()
+        ]
+        return risk_metrics
+    
+    def get_bootstrap(self):
+        """
+        Returns the bootstrap confidence intervals as rows with the statistic's
+        'name', 'estimate', 'lower' and 'upper' bounds and whether it is an
+        'amount', or None for results stored before they were computed.
+        """
+        bootstrap = self.get_detailed_results().get('bootstrap')
+        if bootstrap is None:
+            return None
+        names = {
+            'mean_final_bankroll': 'Mean Final Bankroll',
+            'median_final_bankroll': 'Median Final Bankroll',
+            'probability_of_ruin': 'Probability of Ruin',
+            'mean_max_drawdown': 'Mean Max Drawdown',
+        }
+        bootstrap['rows'] = [
+            {'name': names[key], 'amount': key.endswith('_bankroll'), **interval}
+            for key, interval in bootstrap['intervals'].items()
+        ]
+        bootstrap['confidence_percent'] = round(bootstrap['confidence'] * 100)
+        return bootstrap
+    
+    def get_qmc(self):
+        """
+        Returns the randomized quasi-Monte Carlo estimates with their standard
+        errors as one row per statistic under 'rows', or None for other runs.
+        """
+        qmc = self.get_detailed_results().get('qmc')
+        if qmc is None:
+            return None
+        names = {
+            'mean_final_bankroll': 'Mean Final Bankroll',
+            'median_final_bankroll': 'Median Final Bankroll',
+            'percentile_10_final_bankroll': '10th Percentile Final Bankroll',
+            'percentile_90_final_bankroll': '90th Percentile Final Bankroll',
+            'probability_of_ruin': 'Probability of Ruin',
+        }
+        qmc['rows'] = [
+            {'name': label, 'amount': key.endswith('_bankroll'), **qmc[key]}
+            for key, label in names.items() if key in qmc
+        ]
+        return qmc
+    
+    def get_sensitivities(self):
+        """
+        Returns the derivatives with respect to the bet fraction as one row per
+        quantity under 'rows', or None for runs without them.
+        """
+        sensitivities = self.get_detailed_results().get('sensitivities')
+        if sensitivities is None:
+            return None
+        names = {
+            'mean_final_bankroll': 'Mean Final Bankroll',
+            'mean_log_growth': 'Mean Log-Growth per Round',
+        }
+        sensitivities['rows'] = [
+            {'name': label, 'amount': key.endswith('_bankroll'), **sensitivities[key]}
+            for key, label in names.items() if key in sensitivities
+        ]
+        return sensitivities
+    
+    def get_importance_sampling(self):
+        """
+        Returns the importance-sampling ruin estimate and its standard error,
+        or None for runs that counted ruined paths directly.
+        """
+        return self.get_detailed_results().get('importance_sampling')
+    
+    def get_comparison(self):
+        """
+        Returns the per-strategy summaries and paired differences of a
+        strategy comparison, or None for other runs.
+        """
+        return self.get_detailed_results().get('comparison')
+    
+    def get_optimization(self):
+        """
+        Returns the optimal bet fraction and the evaluated points of a
+        bet-fraction optimization, or None for other runs.
+        """
+        return self.get_detailed_results().get('optimization')
+    
+    def get_markov_chain(self):
+        """
+        Returns the grid size and the probability held at the top of the grid
+        of a Markov-chain run, or None for other runs.
+        """
+        detailed_results = self.get_detailed_results()
+        if detailed_results.get('engine') != 'markov':
+            return None
+        return {
+            'grid_cells': detailed_results['markov_grid_cells'],
+            'clipped_probability': detailed_results['clipped_probability'],
+        }
+    
+    def get_grid_metric(self, name):
+        """
+        Returns one metric of a grid sweep as a nested list with one level
+        per grid axis, or None for other runs.
+        """
+        grid_metrics = self.get_detailed_results().get('grid_metrics')
+        if grid_metrics is None or name not in grid_metrics:
+            return None
+        return decode_grid_array(grid_metrics[name]).tolist()
+    
+    def get_percentile_band(self, percentile):
+        """
+        Computes a per-round percentile of the bankroll from the stored trajectory sketch,
+        or reads it from the bands of a Markov-chain run. Returns None for results
+        stored with neither.
+        """
+        detailed_results = self.get_detailed_results()
+        bands = detailed_results.get('percentile_bands', {})
+        if str(percentile) in bands:
+            return bands[str(percentile)]
+        sketch_data = detailed_results.get('trajectory_sketch')
+        if sketch_data is None:
+            return None
+        return TrajectorySketch.from_dict(sketch_data).percentile(percentile).tolist()
+    
     def __str__(self):
         return f"Result for {self.simulation.name} (Run: {self.run_date})" 
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+Shared helpers of the simulation tests.
+"""
+import pytest
+
+from simulation.engine import Simulator, SimulationConfig, OutcomeConfig, FixedFractionStrategy
+
+
+# Even-money game with a small edge, where moderate fractions ruin some paths
+EDGE_OUTCOMES = ((0.55, 2.0), (0.45, 0.0))
+
+
+def make_config(num_rounds: int = 50, num_simulations: int = 1000, seed: int = 1,
+                outcomes=EDGE_OUTCOMES, **kwargs) -> SimulationConfig:
+    """
+    Build a configuration from (probability, multiplier) pairs.
+    """
+    return SimulationConfig(
+        initial_bankroll=100.0,
+        num_rounds=num_rounds,
+        num_simulations=num_simulations,
+        outcomes=[
+            OutcomeConfig(name=f"Outcome {i}", probability=probability, multiplier=multiplier)
+            for i, (probability, multiplier) in enumerate(outcomes)
+        ],
+        seed=seed,
+        **kwargs
+    )
+
+
+def kelly_outcomes(outcomes=EDGE_OUTCOMES):
+    """Outcomes in the format of KellyCriterionStrategy."""
+    return [{'probability': probability, 'multiplier': multiplier} for probability, multiplier in outcomes]
+
+
+@pytest.fixture
+def config():
+    return make_config()
+
+
+def assert_needs_sampled_paths(config: SimulationConfig, **options):
+    """
+    Check that an option keeps 'auto' off the analytic engine and is refused by the exact engines.
+    """
+    strategy = FixedFractionStrategy(0.2)
+    results = Simulator(config, strategy, **options).run_multiple_simulations()
+    assert results.get('engine') not in ('analytic', 'markov')
+
+    for engine in ('analytic', 'markov'):
+        with pytest.raises(ValueError, match='does not sample paths'):
+            Simulator(config, strategy, engine=engine, **options).run_multiple_simulations()
@@ -0,0 +1,63 @@
+"""
+Wilson intervals and early stopping of adaptive-precision runs.
+"""
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy, PrecisionTarget
+from simulation.engine.adaptive import wilson_interval
+
+from .conftest import make_config, assert_needs_sampled_paths
+
+
+def test_wilson_interval_without_successes_is_informative():
+    low, high = wilson_interval(0, 1000, 1.96)
+    assert low == 0.0
+    assert 0.0 < high < 0.005
+    assert wilson_interval(0, 0, 1.96) == (0.0, 1.0)
+
+
+def test_wilson_interval_contains_the_proportion():
+    low, high = wilson_interval(30, 100, 1.96)
+    assert low < 0.3 < high
+    assert high - low == pytest.approx(0.177, abs=0.002)
+
+
+def test_run_stops_once_the_target_is_met():
+    config = make_config(num_rounds=50, num_simulations=1000, seed=2)
+    target = PrecisionTarget(ruin_half_width=0.02, max_simulations=200_000)
+
+    results = Simulator(config, FixedFractionStrategy(0.4), precision=target).run_multiple_simulations()
+
+    precision = results['precision']
+    assert precision['converged']
+    assert precision['ruin_half_width'] <= 0.02
+    assert precision['simulations_used'] == results['num_simulations'] < 200_000
+    low, high = precision['ruin_ci']
+    assert low <= results['probability_of_ruin'] <= high
+
+
+def test_run_stops_at_the_budget():
+    config = make_config(num_rounds=50, num_simulations=1000, seed=2)
+    target = PrecisionTarget(ruin_half_width=0.001, max_simulations=2048)
+
+    results = Simulator(config, FixedFractionStrategy(0.4), precision=target).run_multiple_simulations()
+
+    assert not results['precision']['converged']
+    assert results['num_simulations'] == 2048
+
+
+def test_stopped_run_matches_a_fixed_run_of_the_same_size():
+    config = make_config(num_rounds=50, num_simulations=1000, seed=2)
+    strategy = FixedFractionStrategy(0.4)
+    adaptive = Simulator(config, strategy, precision=PrecisionTarget(ruin_half_width=0.02)).run_multiple_simulations()
+
+    fixed_config = make_config(num_rounds=50, num_simulations=adaptive['num_simulations'], seed=2)
+    fixed = Simulator(fixed_config, strategy, engine='batch').run_multiple_simulations()
+
+    assert adaptive['probability_of_ruin'] == fixed['probability_of_ruin']
+    assert adaptive['mean_final_bankroll'] == pytest.approx(fixed['mean_final_bankroll'], rel=1e-12)
+
+
+def test_precision_targets_need_sampled_paths():
+    config = make_config(num_rounds=20, num_simulations=512)
+    assert_needs_sampled_paths(config, precision=PrecisionTarget(ruin_half_width=0.05))
@@ -0,0 +1,64 @@
+"""
+Streaming aggregation against the in-memory run.
+"""
+import numpy as np
+import pytest
+
+from simulation import utils
+from simulation.engine import Simulator, FixedFractionStrategy
+from simulation.engine.aggregation import CHUNK_CELLS
+from simulation.models import Simulation
+
+from .conftest import make_config
+
+
+# Statistics a streaming run computes exactly from running sums
+EXACT_STATISTICS = (
+    'num_simulations', 'min_final_bankroll', 'max_final_bankroll', 'probability_of_ruin',
+)
+
+
+def run(strategy, config, **kwargs):
+    results = Simulator(config, strategy, engine='batch', **kwargs).run_multiple_simulations()
+    results.pop('elapsed_time')
+    return results
+
+
+def test_streaming_matches_in_memory():
+    config = make_config(num_rounds=40, num_simulations=3000, seed=11)
+    strategy = FixedFractionStrategy(0.3)
+
+    full = run(strategy, config)
+    streaming = run(strategy, config, aggregation='streaming')
+
+    assert streaming['aggregation'] == 'streaming'
+    for key in EXACT_STATISTICS:
+        assert streaming[key] == full[key], key
+    for key in ('mean_final_bankroll', 'std_final_bankroll', 'mean_max_drawdown'):
+        assert streaming[key] == pytest.approx(full[key], rel=1e-12), key
+    # The reservoir holds every path of a run this small, so the median is exact
+    assert streaming['median_final_bankroll'] == full['median_final_bankroll']
+    np.testing.assert_allclose(streaming['mean_trajectory'], full['mean_trajectory'], rtol=1e-12)
+
+
+def test_exact_engines_report_skipped_streaming():
+    config = make_config(num_rounds=20, num_simulations=512)
+    results = Simulator(config, FixedFractionStrategy(0.2), aggregation='streaming').run_multiple_simulations()
+    assert results['engine'] == 'analytic'
+    assert results['aggregation'] == 'exact'
+
+
+def test_runs_outgrowing_a_chunk_stream():
+    assert utils.choose_aggregation(make_config(num_rounds=999, num_simulations=CHUNK_CELLS // 1000 + 1)) == 'streaming'
+    assert utils.choose_aggregation(make_config(num_rounds=999, num_simulations=CHUNK_CELLS // 1000)) == 'full'
+
+
+@pytest.mark.django_db
+def test_web_runs_pick_their_aggregation():
+    simulation = Simulation.objects.create(name='Long', num_rounds=10000, num_simulations=1000, engine='batch')
+    simulation.outcomes.create(name='Win', probability=0.55, multiplier=2.0)
+    simulation.outcomes.create(name='Loss', probability=0.45, multiplier=0.0)
+
+    simulator, _ = utils.create_simulator_from_model(simulation)
+
+    assert simulator.aggregation == 'streaming'
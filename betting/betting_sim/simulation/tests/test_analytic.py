@@ -0,0 +1,34 @@
+"""
+The exact analytic engine against Monte Carlo runs.
+"""
+import numpy as np
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy, KellyCriterionStrategy
+
+from .conftest import make_config, kelly_outcomes
+
+
+@pytest.mark.parametrize('strategy', [FixedFractionStrategy(0.4), KellyCriterionStrategy(kelly_outcomes())])
+def test_analytic_engine_agrees_with_monte_carlo(strategy):
+    config = make_config(num_rounds=100, num_simulations=20000, seed=3)
+
+    exact = Simulator(config, strategy, engine='analytic').run_multiple_simulations()
+    sampled = Simulator(config, strategy, engine='batch').run_multiple_simulations()
+
+    assert exact['engine'] == 'analytic'
+    ruin = exact['probability_of_ruin']
+    ruin_error = np.sqrt(max(ruin * (1 - ruin), 1e-12) / config.num_simulations)
+    assert abs(sampled['probability_of_ruin'] - ruin) < 4 * ruin_error
+    mean_error = sampled['std_final_bankroll'] / np.sqrt(config.num_simulations)
+    assert abs(sampled['mean_final_bankroll'] - exact['mean_final_bankroll']) < 4 * mean_error
+
+
+def test_auto_engine_solves_stationary_strategies_exactly():
+    config = make_config(num_rounds=50, num_simulations=1000)
+
+    results = Simulator(config, FixedFractionStrategy(0.2)).run_multiple_simulations()
+
+    assert results['engine'] == 'analytic'
+    # Fixed fraction f on an even-money game multiplies the mean by 1 + f (2p - 1) each round
+    assert results['mean_final_bankroll'] == pytest.approx(100.0 * (1 + 0.2 * 0.1) ** 50, rel=1e-9)
@@ -0,0 +1,70 @@
+"""
+Bootstrap confidence intervals of the summary statistics.
+"""
+import numpy as np
+import pytest
+
+from simulation.engine.bootstrap import bootstrap_confidence_intervals
+from simulation.engine.metrics import RUIN_THRESHOLD
+
+
+def estimates_of(final_bankrolls, max_drawdowns):
+    return {
+        'mean_final_bankroll': final_bankrolls.mean(),
+        'median_final_bankroll': np.median(final_bankrolls),
+        'probability_of_ruin': np.mean(final_bankrolls <= RUIN_THRESHOLD),
+        'mean_max_drawdown': max_drawdowns.mean(),
+    }
+
+
+def sample_paths(seed, num_paths=500):
+    generator = np.random.default_rng(seed)
+    final_bankrolls = np.where(generator.random(num_paths) < 0.2, 0.0, generator.lognormal(4.5, 0.5, num_paths))
+    return final_bankrolls, generator.random(num_paths)
+
+
+def test_intervals_depend_only_on_the_seed():
+    final_bankrolls, max_drawdowns = sample_paths(1)
+    estimates = estimates_of(final_bankrolls, max_drawdowns)
+
+    def intervals(seed, chunk_cells):
+        return bootstrap_confidence_intervals(estimates, seed, final_bankrolls, max_drawdowns,
+                                              chunk_cells=chunk_cells)['intervals']
+
+    reference = intervals(7, 1 << 20)
+    # Drawing the resamples a few rows at a time consumes the same stream
+    assert intervals(7, 1 << 20) == reference == intervals(7, 1500)
+    assert intervals(8, 1 << 20) != reference
+    for name, interval in reference.items():
+        assert interval['lower'] <= interval['estimate'] <= interval['upper'], name
+
+
+def test_mean_interval_has_its_nominal_coverage():
+    true_mean = np.exp(4.5 + 0.5 ** 2 / 2)
+    covered = 0
+    num_trials = 300
+    for trial in range(num_trials):
+        final_bankrolls = np.random.default_rng(trial).lognormal(4.5, 0.5, 400)
+        interval = bootstrap_confidence_intervals(
+            {'mean_final_bankroll': final_bankrolls.mean()}, trial, final_bankrolls, num_resamples=400
+        )['intervals']['mean_final_bankroll']
+        covered += interval['lower'] <= true_mean <= interval['upper']
+
+    # 95% nominal; four standard errors of the coverage estimate either way
+    assert abs(covered / num_trials - 0.95) < 4 * np.sqrt(0.95 * 0.05 / num_trials)
+
+
+def test_sampled_runs_scale_the_interval_to_the_run_size():
+    final_bankrolls, max_drawdowns = sample_paths(2, num_paths=8000)
+    estimates = {'mean_final_bankroll': final_bankrolls.mean()}
+
+    full = bootstrap_confidence_intervals(estimates, 3, final_bankrolls, max_paths=8000)
+    sampled = bootstrap_confidence_intervals(estimates, 3, final_bankrolls, max_paths=2000)
+
+    assert sampled['sample_paths'] == 2000
+
+    def width(result):
+        interval = result['intervals']['mean_final_bankroll']
+        return interval['upper'] - interval['lower']
+
+    assert width(sampled) == pytest.approx(width(full), rel=0.15)
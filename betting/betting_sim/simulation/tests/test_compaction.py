@@ -0,0 +1,35 @@
+"""
+Compacting finished paths out of the batch engine's active set.
+"""
+import numpy as np
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy, MartingaleStrategy
+from simulation.engine import batch
+
+from .conftest import make_config
+
+
+def run_paths(monkeypatch, threshold, strategy, **options):
+    monkeypatch.setattr(batch, 'COMPACTION_THRESHOLD', threshold)
+    config = make_config(num_rounds=80, num_simulations=500, seed=3, outcomes=((0.5, 2.0), (0.5, 0.0)))
+    return Simulator(config, strategy, engine='batch', **options).run_path_range(3, 0, config.num_simulations)
+
+
+@pytest.mark.parametrize('strategy, options', [
+    (FixedFractionStrategy(0.4), {}),
+    (FixedFractionStrategy(0.4), {'sensitivities': True, 'control_variates': True}),
+    (MartingaleStrategy(0.05, 0.8), {}),
+])
+def test_compaction_does_not_change_results(monkeypatch, strategy, options):
+    # A threshold of 1 compacts after every round, -1 never compacts
+    compacted = run_paths(monkeypatch, 1.0, strategy, **options)
+    uncompacted = run_paths(monkeypatch, -1.0, strategy, **options)
+
+    assert 0 < compacted['num_bankrupt'] < 500
+    assert compacted.keys() == uncompacted.keys()
+    for key, value in compacted.items():
+        if isinstance(value, np.ndarray):
+            np.testing.assert_array_equal(value, uncompacted[key], err_msg=key)
+    assert [r['history'] for r in compacted['individual_results']] == \
+        [r['history'] for r in uncompacted['individual_results']]
@@ -0,0 +1,49 @@
+"""
+Common-random-numbers strategy comparison.
+"""
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy, MartingaleStrategy, compare_strategies
+
+from .conftest import make_config
+
+
+def test_paired_differences_equal_the_difference_of_standalone_runs():
+    config = make_config(num_rounds=40, num_simulations=2000, seed=8)
+    strategies = [FixedFractionStrategy(0.2), MartingaleStrategy(0.02, 0.5)]
+
+    comparison = compare_strategies(config, strategies, names=['fixed', 'martingale'], engine='batch')
+    fixed, martingale = (
+        Simulator(config, strategy, engine='batch').run_multiple_simulations() for strategy in strategies
+    )
+
+    assert comparison['results']['fixed']['mean_final_bankroll'] == pytest.approx(
+        fixed['mean_final_bankroll'], rel=1e-12
+    )
+    differences = {entry['metric']: entry for entry in comparison['paired_differences']}
+    assert differences['final_bankroll']['mean_difference'] == pytest.approx(
+        fixed['mean_final_bankroll'] - martingale['mean_final_bankroll'], rel=1e-9
+    )
+    assert differences['ruined']['mean_difference'] == pytest.approx(
+        fixed['probability_of_ruin'] - martingale['probability_of_ruin'], abs=1e-12
+    )
+    assert differences['max_drawdown']['mean_difference'] == pytest.approx(
+        fixed['mean_max_drawdown'] - martingale['mean_max_drawdown'], rel=1e-9
+    )
+
+
+def test_common_random_numbers_shrink_the_standard_error():
+    config = make_config(num_rounds=40, num_simulations=2000, seed=8)
+
+    comparison = compare_strategies(config, [FixedFractionStrategy(0.2), FixedFractionStrategy(0.25)])
+
+    assert comparison['strategies'] == ['FixedFractionStrategy 1', 'FixedFractionStrategy 2']
+    final = comparison['paired_differences'][0]
+    assert final['metric'] == 'final_bankroll'
+    assert final['standard_error'] < final['independent_standard_error']
+    assert final['variance_reduction_factor'] > 1.0
+
+
+def test_comparison_needs_two_strategies():
+    with pytest.raises(ValueError, match='at least two strategies'):
+        compare_strategies(make_config(), [FixedFractionStrategy(0.2)])
@@ -0,0 +1,49 @@
+"""
+Agreement between the batch and scalar engines.
+"""
+import numpy as np
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy, KellyCriterionStrategy, MartingaleStrategy
+
+from .conftest import make_config, kelly_outcomes
+
+
+PATH_ARRAYS = (
+    'final_bankrolls', 'bankroll_trajectories', 'max_drawdowns', 'time_under_water',
+    'longest_losing_streaks', 'rounds_played',
+)
+
+
+def strategies():
+    return {
+        'fixed_fraction': FixedFractionStrategy(0.3),
+        'kelly': KellyCriterionStrategy(kelly_outcomes()),
+        'martingale': MartingaleStrategy(0.02, 0.5),
+    }
+
+
+@pytest.mark.parametrize('name', ['fixed_fraction', 'kelly', 'martingale'])
+def test_batch_matches_scalar_bit_for_bit(name):
+    config = make_config(num_rounds=60, num_simulations=600, seed=1)
+    strategy = strategies()[name]
+
+    batch = Simulator(config, strategy, engine='batch').run_path_range(1, 0, config.num_simulations)
+    scalar = Simulator(config, strategy, engine='scalar').run_path_range(1, 0, config.num_simulations)
+
+    for key in PATH_ARRAYS:
+        np.testing.assert_array_equal(batch[key], scalar[key], err_msg=key)
+    # Sums of squared log-returns are accumulated in a different order
+    np.testing.assert_allclose(batch['log_return_squares'], scalar['log_return_squares'], rtol=1e-12)
+    assert batch['num_bankrupt'] == scalar['num_bankrupt']
+    assert [r['history'] for r in batch['individual_results']] == [r['history'] for r in scalar['individual_results']]
+
+
+
+def test_run_single_simulation_plays_the_first_seeded_path():
+    config = make_config(num_rounds=30, num_simulations=300, seed=5)
+    simulator = Simulator(config, MartingaleStrategy(0.02, 0.5), engine='scalar')
+
+    single = simulator.run_single_simulation()
+    assert single['final_bankroll'] == simulator.run_path_range(5, 0, 256)['final_bankrolls'][0]
+    assert simulator.run_single_simulation()['final_bankroll'] == single['final_bankroll']
@@ -0,0 +1,40 @@
+"""
+Grid sweeps and the encoding of their arrays.
+"""
+import numpy as np
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy, GridAxis, run_grid_sweep
+from simulation.engine.grid import GRID_METRICS, encode_grid_array, decode_grid_array
+
+from .conftest import make_config
+
+
+def test_encode_decode_round_trip():
+    values = np.random.default_rng(0).normal(size=(3, 4, 5)) * 1e3
+
+    decoded = decode_grid_array(encode_grid_array(values))
+
+    assert decoded.shape == values.shape
+    np.testing.assert_array_equal(decoded, values.astype(np.float32))
+
+
+def test_unknown_parameter_is_rejected():
+    with pytest.raises(ValueError, match='Unknown grid parameter'):
+        GridAxis('house_edge', [0.1])
+
+
+def test_grid_points_match_single_runs():
+    config = make_config(num_rounds=30, num_simulations=1000, seed=6)
+    fractions = [0.1, 0.3, 0.5]
+    axis = GridAxis('bet_fraction', fractions)
+
+    sweep = run_grid_sweep(config, lambda point, values: FixedFractionStrategy(values['bet_fraction']), [axis])
+
+    assert sweep['shape'] == [3]
+    assert sweep['seed'] == 6
+    metrics = {name: decode_grid_array(sweep['grid_metrics'][name]) for name in GRID_METRICS}
+    for i, fraction in enumerate(fractions):
+        single = Simulator(config, FixedFractionStrategy(fraction), engine='batch').run_multiple_simulations()
+        for name in ('mean_final_bankroll', 'median_final_bankroll', 'probability_of_ruin'):
+            assert metrics[name][i] == pytest.approx(single[name], rel=1e-6), name
@@ -0,0 +1,37 @@
+"""
+Importance-sampling estimates of the probability of ruin.
+"""
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy
+from simulation.engine.importance import estimate_ruin_probability
+
+from .conftest import make_config, assert_needs_sampled_paths
+
+
+@pytest.mark.parametrize('fraction', [0.3, 0.5])
+def test_estimate_is_unbiased(fraction):
+    config = make_config(num_rounds=60, num_simulations=8192, seed=4)
+    strategy = FixedFractionStrategy(fraction)
+    exact = Simulator(config, strategy, engine='analytic').run_multiple_simulations()['probability_of_ruin']
+
+    summary = estimate_ruin_probability(Simulator(config, strategy, engine='batch'), 4)
+
+    assert summary['num_simulations'] == config.num_simulations
+    assert abs(summary['estimate'] - exact) < 4 * summary['standard_error']
+
+
+def test_rare_ruin_needs_few_paths():
+    config = make_config(num_rounds=60, num_simulations=8192, seed=4)
+    strategy = FixedFractionStrategy(0.3)
+
+    summary = estimate_ruin_probability(Simulator(config, strategy, engine='batch'), 4)
+
+    # A plain run of as many paths would see about three ruined paths
+    assert summary['relative_error'] < 0.05
+    assert summary['num_ruined_samples'] > 100
+
+
+def test_importance_sampling_needs_sampled_paths():
+    config = make_config(num_rounds=20, num_simulations=512)
+    assert_needs_sampled_paths(config, importance_sampling=True)
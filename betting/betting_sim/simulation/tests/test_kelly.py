@@ -0,0 +1,50 @@
+"""
+Exact multi-outcome and fractional Kelly.
+"""
+import numpy as np
+import pytest
+
+from simulation.engine import KellyCriterionStrategy, kelly_fraction
+
+
+def outcomes(*pairs):
+    return [{'probability': probability, 'multiplier': multiplier} for probability, multiplier in pairs]
+
+
+@pytest.mark.parametrize('probability, multiplier', [(0.55, 2.0), (0.4, 3.0), (0.3, 5.0)])
+def test_two_outcomes_match_the_closed_form(probability, multiplier):
+    odds = multiplier - 1.0
+    expected = probability - (1 - probability) / odds
+
+    assert kelly_fraction(outcomes((probability, multiplier), (1 - probability, 0.0))) == pytest.approx(
+        expected, abs=1e-9
+    )
+
+
+def test_partial_losses_match_the_closed_form():
+    # Win a, lose l of the stake: f = p / l - q / a
+    assert kelly_fraction(outcomes((0.5, 2.0), (0.5, 0.5))) == pytest.approx(0.5, abs=1e-9)
+
+
+def test_no_edge_bets_nothing():
+    assert kelly_fraction(outcomes((0.5, 2.0), (0.5, 0.0))) == 0.0
+    assert kelly_fraction(outcomes((0.6, 1.5), (0.4, 0.0))) == 0.0
+
+
+def test_multi_outcome_optimum():
+    # A push (multiplier 1) leaves the growth rate's maximizer unchanged
+    assert kelly_fraction(outcomes((0.3, 3.0), (0.4, 1.0), (0.3, 0.0))) == pytest.approx(0.25, abs=1e-9)
+
+    pairs = ((0.1, 6.0), (0.25, 2.0), (0.3, 1.2), (0.35, 0.0))
+    probabilities, multipliers = np.array(pairs).T
+    grid = np.linspace(0.0, 0.999, 100_000)
+    growth = np.log(1.0 + np.outer(grid, multipliers - 1.0)) @ probabilities
+    assert kelly_fraction(outcomes(*pairs)) == pytest.approx(grid[np.argmax(growth)], abs=1e-4)
+
+
+def test_fractional_kelly_scales_and_caps_the_fraction():
+    config = outcomes((0.55, 2.0), (0.45, 0.0))
+
+    assert KellyCriterionStrategy(config, kelly_multiplier=0.5).fraction == pytest.approx(0.05)
+    assert KellyCriterionStrategy(config, fraction_limit=0.04).fraction == pytest.approx(0.04)
+    assert KellyCriterionStrategy(config).get_bet_fraction(100.0, 0, []) == pytest.approx(0.1)
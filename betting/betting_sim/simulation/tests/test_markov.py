@@ -0,0 +1,90 @@
+"""
+The Markov-chain engine against the analytic engine and Monte Carlo runs.
+"""
+import numpy as np
+import pytest
+
+from simulation.engine import (
+    Simulator, FixedFractionStrategy, KellyCriterionStrategy, MartingaleStrategy, CustomStrategy, BankrollMarkovChain
+)
+
+from .conftest import make_config, kelly_outcomes, assert_needs_sampled_paths
+
+
+EVEN_MONEY = ((0.5, 2.0), (0.5, 0.0))
+PUSH_OUTCOMES = ((0.3, 3.0), (0.4, 1.0), (0.3, 0.0))
+
+
+def run_both(config, strategy):
+    analytic = Simulator(config, strategy, engine='analytic').run_multiple_simulations()
+    markov = Simulator(config, strategy, engine='markov').run_multiple_simulations()
+    return analytic, markov
+
+
+@pytest.mark.parametrize('initial_bankroll, outcomes, num_rounds, fraction', [
+    (100.0, ((0.55, 2.0), (0.45, 0.0)), 100, 0.4),
+    (1.0, PUSH_OUTCOMES, 60, 0.25),
+    # Starting a few losses from the ruin threshold, where ruined paths keep
+    # bankrolls just below it and many paths pass close to it
+    (0.05, EVEN_MONEY, 30, 0.5),
+    (0.011, ((0.55, 2.0), (0.45, 0.0)), 50, 0.2),
+])
+def test_markov_engine_matches_the_analytic_engine(initial_bankroll, outcomes, num_rounds, fraction):
+    config = make_config(num_rounds=num_rounds, outcomes=outcomes)
+    config.initial_bankroll = initial_bankroll
+
+    analytic, markov = run_both(config, FixedFractionStrategy(fraction))
+
+    assert markov['engine'] == 'markov'
+    assert markov['probability_of_ruin'] == pytest.approx(analytic['probability_of_ruin'], abs=1e-12)
+    assert markov['mean_final_bankroll'] == pytest.approx(analytic['mean_final_bankroll'], rel=1e-10)
+    assert markov['median_final_bankroll'] == pytest.approx(analytic['median_final_bankroll'], rel=1e-6)
+    assert markov['ruin_probability_by_round'][-1] == markov['probability_of_ruin']
+
+
+def test_markov_engine_matches_the_analytic_engine_for_kelly():
+    config = make_config(num_rounds=200)
+    analytic, markov = run_both(config, KellyCriterionStrategy(kelly_outcomes(), kelly_multiplier=2.0))
+
+    assert markov['probability_of_ruin'] == pytest.approx(analytic['probability_of_ruin'], abs=1e-12)
+    assert markov['mean_final_bankroll'] == pytest.approx(analytic['mean_final_bankroll'], rel=1e-10)
+
+
+def test_bankroll_rule_agrees_with_monte_carlo(tmp_path):
+    strategy_file = tmp_path / 'threshold.py'
+    strategy_file.write_text(
+        "import numpy as np\n"
+        "BANKROLL_ONLY = True\n"
+        "def bet_fraction(bankroll, round_idx, history):\n"
+        "    return 0.3 if bankroll < 100 else 0.1\n"
+        "def bet_fractions(bankrolls, round_idx, states):\n"
+        "    return np.where(bankrolls < 100, 0.3, 0.1)\n"
+    )
+    config = make_config(num_rounds=200, num_simulations=20000, seed=5, outcomes=((0.52, 2.0), (0.48, 0.0)))
+    config.initial_bankroll = 50.0
+    strategy = CustomStrategy(str(strategy_file))
+
+    markov = Simulator(config, strategy, engine='markov').run_multiple_simulations()
+    sampled = Simulator(config, strategy, engine='batch').run_multiple_simulations()
+
+    ruin = markov['probability_of_ruin']
+    assert abs(sampled['probability_of_ruin'] - ruin) < 4 * np.sqrt(ruin * (1 - ruin) / config.num_simulations)
+    mean_error = sampled['std_final_bankroll'] / np.sqrt(config.num_simulations)
+    assert abs(sampled['mean_final_bankroll'] - markov['mean_final_bankroll']) < 4 * mean_error
+
+
+def test_distributions_carry_probability_and_mean_bankroll():
+    config = make_config(num_rounds=20)
+    chain = BankrollMarkovChain(config, FixedFractionStrategy(0.2))
+
+    probabilities, bankrolls = chain.distributions()
+
+    assert probabilities.shape == bankrolls.shape == (21, chain.num_ruin_cells + chain.num_cells)
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0)
+    means = (probabilities * bankrolls).sum(axis=1)
+    np.testing.assert_allclose(means, 100.0 * 1.02 ** np.arange(21), rtol=1e-12)
+
+
+def test_path_dependent_strategies_are_rejected():
+    with pytest.raises(ValueError, match='bankroll only'):
+        Simulator(make_config(), MartingaleStrategy(0.02, 0.5), engine='markov').run_multiple_simulations()
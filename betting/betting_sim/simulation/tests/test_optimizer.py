@@ -0,0 +1,51 @@
+"""
+Bet-fraction search and its evaluation cache.
+"""
+import pytest
+
+from simulation.engine import FixedFractionStrategy, optimize_bet_fraction
+from simulation.engine.optimizer import evaluation_fingerprint, clear_evaluation_cache
+
+from .conftest import make_config
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_evaluation_cache()
+    yield
+    clear_evaluation_cache()
+
+
+def test_fingerprint_keys_on_the_evaluation():
+    config = make_config(seed=1)
+    key = evaluation_fingerprint(config, 1, FixedFractionStrategy(0.2), 'batch')
+
+    assert evaluation_fingerprint(make_config(seed=1), 1, FixedFractionStrategy(0.2), 'batch') == key
+    assert evaluation_fingerprint(config, 2, FixedFractionStrategy(0.2), 'batch') != key
+    assert evaluation_fingerprint(config, 1, FixedFractionStrategy(0.25), 'batch') != key
+    assert evaluation_fingerprint(make_config(seed=1, num_rounds=51), 1, FixedFractionStrategy(0.2), 'batch') != key
+
+
+def test_repeated_search_is_served_from_the_cache():
+    config = make_config(num_rounds=50, num_simulations=1000, seed=1)
+
+    first = optimize_bet_fraction(config, FixedFractionStrategy, max_ruin_probability=0.05)
+    second = optimize_bet_fraction(config, FixedFractionStrategy, max_ruin_probability=0.05)
+
+    assert first['num_simulator_calls'] > 0
+    assert second['num_simulator_calls'] == 0
+    assert second['num_cache_hits'] == len(second['evaluations'])
+    assert second['optimal_fraction'] == first['optimal_fraction']
+
+
+def test_optimum_respects_the_ruin_cap():
+    config = make_config(num_rounds=50, num_simulations=2000, seed=1)
+
+    result = optimize_bet_fraction(config, FixedFractionStrategy, objective='mean_final_bankroll',
+                                   max_ruin_probability=0.05)
+
+    assert result['feasible']
+    assert result['optimal']['probability_of_ruin'] <= 0.05
+    for evaluation in result['evaluations']:
+        if evaluation['probability_of_ruin'] <= 0.05:
+            assert evaluation['mean_final_bankroll'] <= result['optimal']['mean_final_bankroll'] * (1 + 1e-9)
@@ -0,0 +1,57 @@
+"""
+Sharded execution on thread and process pools.
+"""
+import numpy as np
+import pytest
+
+from simulation import utils
+from simulation.engine import Simulator, MartingaleStrategy
+from simulation.models import Simulation
+
+from .conftest import make_config
+
+
+def run(strategy, config, **kwargs):
+    results = Simulator(config, strategy, engine='batch', **kwargs).run_multiple_simulations()
+    results.pop('elapsed_time')
+    return results
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_sharded_runs_match_serial(executor):
+    config = make_config(num_rounds=40, num_simulations=3000, seed=7)
+    strategy = MartingaleStrategy(0.02, 0.5)
+
+    serial = run(strategy, config)
+    sharded = run(strategy, config, executor=executor, max_workers=3)
+
+    for key in ('mean_final_bankroll', 'median_final_bankroll', 'std_final_bankroll', 'mean_max_drawdown'):
+        assert sharded[key] == pytest.approx(serial[key], rel=1e-12), key
+    for key in ('probability_of_ruin', 'min_final_bankroll', 'max_final_bankroll', 'seed'):
+        assert sharded[key] == serial[key], key
+    np.testing.assert_allclose(sharded['mean_trajectory'], serial['mean_trajectory'], rtol=1e-12)
+    assert sharded['individual_results'] == serial['individual_results']
+
+
+def test_large_runs_use_the_process_pool(monkeypatch):
+    monkeypatch.setattr(utils.os, 'cpu_count', lambda: 4)
+    large = make_config(num_rounds=1999, num_simulations=utils.PROCESS_EXECUTOR_CELLS // 2000)
+
+    assert utils.choose_executor(large) == 'process'
+    assert utils.choose_executor(make_config()) == 'serial'
+
+    monkeypatch.setattr(utils.os, 'cpu_count', lambda: 1)
+    assert utils.choose_executor(large) == 'serial'
+
+
+@pytest.mark.django_db
+def test_web_runs_pick_their_executor(monkeypatch):
+    monkeypatch.setattr(utils, 'PROCESS_EXECUTOR_CELLS', 1000)
+    monkeypatch.setattr(utils.os, 'cpu_count', lambda: 4)
+    simulation = Simulation.objects.create(name='Large', num_rounds=100, num_simulations=500, engine='batch')
+    simulation.outcomes.create(name='Win', probability=0.55, multiplier=2.0)
+    simulation.outcomes.create(name='Loss', probability=0.45, multiplier=0.0)
+
+    simulator, _ = utils.create_simulator_from_model(simulation)
+
+    assert simulator.executor == 'process'
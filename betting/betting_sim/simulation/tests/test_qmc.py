@@ -0,0 +1,77 @@
+"""
+Randomized quasi-Monte Carlo streams and their replicate standard errors.
+"""
+import numpy as np
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy, MartingaleStrategy
+from simulation.engine.qmc import QMC_STATISTICS
+
+from .conftest import make_config, assert_needs_sampled_paths
+
+
+def qmc_config(**kwargs):
+    return make_config(qmc=True, **kwargs)
+
+
+def run(config, strategy=None, **kwargs):
+    strategy = strategy or FixedFractionStrategy(0.2)
+    return Simulator(config, strategy, engine='batch', **kwargs).run_multiple_simulations()
+
+
+def test_qmc_runs_report_replicate_errors():
+    results = run(qmc_config(num_rounds=30, num_simulations=4096, seed=2), FixedFractionStrategy(0.5))
+
+    summary = results['qmc']
+    assert summary['replicates'] == 8 and summary['num_paths'] == 4096
+    assert summary['mean_final_bankroll']['estimate'] == pytest.approx(results['mean_final_bankroll'], rel=1e-12)
+    for name in QMC_STATISTICS:
+        assert summary[name]['standard_error'] is not None, name
+    assert summary['mean_final_bankroll']['standard_error'] > 0
+    assert summary['probability_of_ruin']['standard_error'] > 0
+
+
+def test_replicate_standard_error_matches_the_spread_across_seeds():
+    config = qmc_config(num_rounds=20, num_simulations=1024)
+    estimates, errors = [], []
+    for seed in range(40):
+        config.seed = seed
+        summary = run(config)['qmc']['mean_final_bankroll']
+        estimates.append(summary['estimate'])
+        errors.append(summary['standard_error'])
+
+    # Exact mean of a fixed fraction on the 2x/0x outcomes of make_config
+    exact = 100.0 * (1 + 0.2 * 0.1) ** 20
+    spread = np.std(estimates, ddof=1)
+    assert abs(np.mean(estimates) - exact) < 4 * spread / np.sqrt(len(estimates))
+    # Each error comes from 8 replicates, so allow for their scatter
+    assert 0.6 < np.sqrt(np.mean(np.square(errors))) / spread < 1.6
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_qmc_results_do_not_depend_on_sharding(executor):
+    config = qmc_config(num_rounds=25, num_simulations=3000, seed=9)
+    strategy = MartingaleStrategy(0.02, 0.5)
+
+    serial = run(config, strategy)
+    sharded = run(config, strategy, executor=executor, max_workers=3)
+
+    assert sharded['individual_results'] == serial['individual_results']
+    assert sharded['probability_of_ruin'] == serial['probability_of_ruin']
+    assert sharded['mean_final_bankroll'] == pytest.approx(serial['mean_final_bankroll'], rel=1e-12)
+    for name in QMC_STATISTICS:
+        for key, value in serial['qmc'][name].items():
+            assert sharded['qmc'][name][key] == pytest.approx(value, rel=1e-9), (name, key)
+
+
+def test_qmc_path_ranges_match_the_whole_run():
+    config = qmc_config(num_rounds=25, num_simulations=1000, seed=4)
+    simulator = Simulator(config, FixedFractionStrategy(0.3), engine='batch')
+
+    whole = simulator.run_path_range(4, 0, 1000)['final_bankrolls']
+    parts = [simulator.run_path_range(4, start, stop)['final_bankrolls'] for start, stop in ((0, 512), (512, 1000))]
+    np.testing.assert_array_equal(np.concatenate(parts), whole)
+
+
+def test_exact_engines_reject_qmc():
+    assert_needs_sampled_paths(qmc_config())
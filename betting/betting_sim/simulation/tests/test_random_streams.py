@@ -0,0 +1,40 @@
+"""
+Reproducible per-block random streams.
+"""
+import numpy as np
+
+from simulation.engine import Simulator, FixedFractionStrategy
+from simulation.engine.random_streams import STREAM_BLOCK_PATHS, resolve_seed, block_generator
+
+from .conftest import make_config
+
+
+def test_path_ranges_do_not_depend_on_partitioning():
+    config = make_config(num_rounds=40, num_simulations=4 * STREAM_BLOCK_PATHS, seed=9)
+    simulator = Simulator(config, FixedFractionStrategy(0.3), engine='batch')
+
+    whole = simulator.run_path_range(9, 0, 4 * STREAM_BLOCK_PATHS)
+    parts = [
+        simulator.run_path_range(9, start, start + STREAM_BLOCK_PATHS)
+        for start in range(0, 4 * STREAM_BLOCK_PATHS, STREAM_BLOCK_PATHS)
+    ]
+
+    np.testing.assert_array_equal(
+        whole['final_bankrolls'], np.concatenate([part['final_bankrolls'] for part in parts])
+    )
+
+
+def test_seed_reproduces_a_run():
+    strategy = FixedFractionStrategy(0.3)
+    first = Simulator(make_config(seed=None), strategy, engine='batch').run_multiple_simulations()
+    second = Simulator(make_config(seed=first['seed']), strategy, engine='batch').run_multiple_simulations()
+    other = Simulator(make_config(seed=first['seed'] + 1), strategy, engine='batch').run_multiple_simulations()
+
+    assert second['mean_final_bankroll'] == first['mean_final_bankroll']
+    assert other['mean_final_bankroll'] != first['mean_final_bankroll']
+
+
+def test_blocks_draw_independent_streams():
+    assert resolve_seed(5) == 5
+    np.testing.assert_array_equal(block_generator(5, 3).random(8), block_generator(5, 3).random(8))
+    assert not np.array_equal(block_generator(5, 3).random(8), block_generator(5, 4).random(8))
@@ -0,0 +1,61 @@
+"""
+Value-at-Risk, CVaR and the mergeable risk statistics.
+"""
+import numpy as np
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy
+from simulation.engine.risk import RiskStatistics, risk_metrics, tail_risk
+
+from .conftest import make_config
+
+
+@pytest.mark.parametrize('num_paths', [1, 19, 100, 1001])
+@pytest.mark.parametrize('confidence', [0.9, 0.95, 0.99])
+def test_tail_risk_matches_the_sorted_tail(num_paths, confidence):
+    final_bankrolls = np.random.default_rng(num_paths).lognormal(4.0, 1.0, num_paths)
+
+    value_at_risk, conditional_value_at_risk = tail_risk(final_bankrolls, 100.0, confidence)
+
+    num_tail = max(1, int(np.ceil(round((1 - confidence) * num_paths, 9))))
+    tail = np.sort(final_bankrolls)[:num_tail]
+    assert value_at_risk == 100.0 - tail[-1]
+    assert conditional_value_at_risk == pytest.approx(100.0 - tail.mean(), rel=1e-12)
+
+
+def test_time_to_ruin_counts_the_round_each_path_went_bust():
+    statistics = RiskStatistics(100.0, 5)
+    statistics.add(np.array([0.0, 0.005, 120.0, 0.0]), np.array([2, 3, 5, 3]), np.zeros(4))
+
+    summary = statistics.time_to_ruin()
+    assert summary['counts'] == [0, 0, 1, 2, 0, 0]
+    assert summary['mean'] == pytest.approx(8 / 3)
+    assert summary['median'] == 3
+
+
+def test_merged_path_ranges_match_a_single_pass():
+    config = make_config(num_rounds=60, num_simulations=900, seed=4, outcomes=((0.5, 2.0), (0.5, 0.0)))
+    simulator = Simulator(config, FixedFractionStrategy(0.35), engine='batch')
+    partials = [simulator.run_path_range(4, start, stop) for start, stop in ((0, 256), (256, 768), (768, 900))]
+
+    merged = RiskStatistics(config.initial_bankroll, config.num_rounds)
+    for partial in partials:
+        shard = RiskStatistics(config.initial_bankroll, config.num_rounds)
+        shard.add_partial(partial)
+        merged.merge(shard)
+
+    def joined(key):
+        return np.concatenate([partial[key] for partial in partials])
+
+    final_bankrolls = joined('final_bankrolls')
+    single = risk_metrics(config.initial_bankroll, config.num_rounds, final_bankrolls,
+                          joined('rounds_played'), joined('log_return_squares'))
+    summary = merged.summarize(final_bankrolls)
+
+    assert summary['num_paths'] == single['num_paths'] == 900
+    assert sum(summary['time_to_ruin']['counts']) > 0
+    assert summary['time_to_ruin'] == single['time_to_ruin']
+    assert summary['value_at_risk'] == single['value_at_risk']
+    assert summary['conditional_value_at_risk'] == single['conditional_value_at_risk']
+    for key in ('mean_log_growth', 'std_log_growth', 'mean_log_return', 'std_log_return', 'sharpe_ratio'):
+        assert summary[key] == pytest.approx(single[key], rel=1e-12), key
@@ -0,0 +1,64 @@
+"""
+Alias-table and CDF outcome samplers.
+"""
+import numpy as np
+import pytest
+
+from simulation.engine import OutcomeConfig
+from simulation.engine.samplers import AliasSampler, CDFSampler, create_sampler
+
+
+PROBABILITIES = (0.33, 0.02, 0.17, 0.001, 0.2, 0.099, 0.05, 0.08, 0.03, 0.02)
+
+# Evenly spaced uniforms, fine enough to measure the mass of every outcome
+GRID_UNIFORMS = (np.arange(1_000_000) + 0.5) / 1_000_000
+
+
+def outcomes(probabilities=PROBABILITIES):
+    return [
+        OutcomeConfig(name=f"Outcome {i}", probability=probability, multiplier=float(i))
+        for i, probability in enumerate(probabilities)
+    ]
+
+
+@pytest.mark.parametrize('sampler_class', [AliasSampler, CDFSampler])
+def test_sampler_maps_the_unit_interval_to_the_probabilities(sampler_class):
+    sampler = sampler_class(outcomes())
+
+    indices = sampler.indices_from_uniforms(GRID_UNIFORMS)
+    shares = np.bincount(indices, minlength=len(PROBABILITIES)) / len(GRID_UNIFORMS)
+
+    np.testing.assert_allclose(shares, PROBABILITIES, atol=2e-6)
+
+
+@pytest.mark.parametrize('sampler_class', [AliasSampler, CDFSampler])
+def test_single_draws_match_block_draws(sampler_class):
+    sampler = sampler_class(outcomes())
+    uniforms = np.random.default_rng(0).random(2000)
+
+    blocks = sampler.indices_from_uniforms(uniforms)
+
+    assert [sampler.index_from_uniform(u) for u in uniforms.tolist()] == blocks.tolist()
+
+
+def test_alias_and_cdf_samplers_agree_in_distribution():
+    uniforms = np.random.default_rng(1).random(200_000)
+
+    alias = np.bincount(AliasSampler(outcomes()).indices_from_uniforms(uniforms), minlength=len(PROBABILITIES))
+    cdf = np.bincount(CDFSampler(outcomes()).indices_from_uniforms(uniforms), minlength=len(PROBABILITIES))
+
+    # Both counts are binomial; their difference stays within a few standard deviations
+    standard_deviations = np.sqrt(2 * len(uniforms) * np.array(PROBABILITIES) * (1 - np.array(PROBABILITIES)))
+    assert np.all(np.abs(alias - cdf) < 5 * standard_deviations)
+
+
+def test_unnormalized_probabilities_are_rescaled():
+    sampler = AliasSampler(outcomes((2.0, 6.0)))
+    np.testing.assert_allclose(sampler.probabilities, [0.25, 0.75])
+
+
+def test_create_sampler_picks_the_alias_table_for_many_outcomes():
+    assert isinstance(create_sampler(outcomes()), AliasSampler)
+    assert isinstance(create_sampler(outcomes()[:2]), CDFSampler)
+    with pytest.raises(ValueError, match='Unknown sampler'):
+        create_sampler(outcomes(), method='rejection')
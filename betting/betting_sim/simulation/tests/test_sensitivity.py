@@ -0,0 +1,36 @@
+"""
+Pathwise sensitivities against finite differences.
+"""
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy, MartingaleStrategy
+
+from .conftest import make_config
+
+
+STEP = 1e-5
+
+
+def run(config, fraction, **kwargs):
+    return Simulator(config, FixedFractionStrategy(fraction), engine='batch', **kwargs).run_multiple_simulations()
+
+
+def test_derivatives_match_finite_differences():
+    config = make_config(num_rounds=200, num_simulations=4000, seed=3)
+
+    sensitivities = run(config, 0.1, sensitivities=True)['sensitivities']
+    upper = run(config, 0.1 + STEP)
+    lower = run(config, 0.1 - STEP)
+
+    finite_difference = (upper['mean_final_bankroll'] - lower['mean_final_bankroll']) / (2 * STEP)
+    assert sensitivities['bet_fraction'] == 0.1
+    assert sensitivities['mean_final_bankroll']['derivative'] == pytest.approx(finite_difference, rel=1e-4)
+    assert sensitivities['mean_final_bankroll']['value'] == pytest.approx(
+        run(config, 0.1)['mean_final_bankroll'], rel=1e-12
+    )
+
+
+def test_non_stationary_strategy_is_rejected():
+    config = make_config(num_rounds=20, num_simulations=256)
+    with pytest.raises(ValueError, match='not stationary'):
+        Simulator(config, MartingaleStrategy(0.02, 0.5), sensitivities=True).run_multiple_simulations()
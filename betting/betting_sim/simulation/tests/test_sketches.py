@@ -0,0 +1,50 @@
+"""
+Merging and serializing trajectory sketches.
+"""
+import numpy as np
+
+from simulation.engine import TrajectorySketch
+
+
+def random_trajectories(seed: int, num_paths: int = 500, num_rounds: int = 20) -> np.ndarray:
+    generator = np.random.default_rng(seed)
+    steps = generator.choice([1.2, 0.8], size=(num_paths, num_rounds))
+    trajectories = 100.0 * np.cumprod(np.hstack([np.ones((num_paths, 1)), steps]), axis=1)
+    # A few ruined paths, padded with zeros like the engines' trajectories
+    trajectories[:10, 5:] = 0.0
+    return trajectories
+
+
+def test_merged_shards_equal_one_sketch():
+    trajectories = random_trajectories(0)
+    whole = TrajectorySketch.for_bankroll(20, 100.0)
+    whole.add(trajectories)
+
+    first = TrajectorySketch.for_bankroll(20, 100.0)
+    second = TrajectorySketch.for_bankroll(20, 100.0)
+    first.add(trajectories[:200])
+    second.add(trajectories[200:])
+    first.merge(second)
+
+    np.testing.assert_array_equal(first.counts, whole.counts)
+    np.testing.assert_array_equal(first.percentile(50), whole.percentile(50))
+
+
+def test_serialization_round_trip():
+    sketch = TrajectorySketch.for_bankroll(20, 100.0)
+    sketch.add(random_trajectories(1))
+
+    restored = TrajectorySketch.from_dict(sketch.to_dict())
+
+    np.testing.assert_array_equal(restored.counts, sketch.counts)
+    for percentile in (10, 50, 90):
+        np.testing.assert_array_equal(restored.percentile(percentile), sketch.percentile(percentile))
+
+
+def test_percentiles_are_close_to_exact():
+    trajectories = random_trajectories(2, num_paths=2000)
+    sketch = TrajectorySketch.for_bankroll(20, 100.0)
+    sketch.add(trajectories)
+
+    exact = np.percentile(trajectories[:, -1], 90)
+    assert abs(sketch.percentile(90)[-1] - exact) <= 0.06 * exact
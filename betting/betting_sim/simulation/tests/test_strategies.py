@@ -0,0 +1,43 @@
+"""
+The vectorized strategy API and custom strategies.
+"""
+import numpy as np
+
+from simulation.engine import Simulator, MartingaleStrategy, CustomStrategy
+
+from .conftest import make_config
+
+
+def test_martingale_fractions_match_the_per_path_rule():
+    strategy = MartingaleStrategy(0.02, 0.5)
+    states = np.arange(8)
+
+    fractions = strategy.get_bet_fractions(np.full(8, 100.0), 0, states)
+
+    expected = [strategy.get_state_bet_fraction(100.0, 0, int(state), []) for state in states]
+    np.testing.assert_array_equal(fractions, expected)
+    np.testing.assert_array_equal(
+        strategy.on_round_results(states, np.zeros(8), np.array([2.0, 0.0] * 4), np.full(8, 100.0)),
+        [strategy.on_round_result(int(state), 0, multiplier, 100.0)
+         for state, multiplier in zip(states, [2.0, 0.0] * 4)],
+    )
+
+
+def test_failing_custom_batch_callbacks_fall_back(tmp_path):
+    strategy_file = tmp_path / 'strategy.py'
+    strategy_file.write_text(
+        "def bet_fraction(bankroll, round_idx, history):\n"
+        "    return 0.1\n"
+        "def bet_fractions(bankrolls, round_idx, states):\n"
+        "    if round_idx == 3:\n"
+        "        raise RuntimeError('boom')\n"
+        "    return 0.1\n"
+        "def on_round_results(states, outcome_idx, multipliers, bankrolls):\n"
+        "    raise KeyError('state')\n"
+    )
+    config = make_config(num_rounds=10, num_simulations=256)
+
+    results = Simulator(config, CustomStrategy(str(strategy_file)), engine='batch').run_multiple_simulations()
+
+    assert results['num_simulations'] == 256
+    assert results['probability_of_ruin'] == 0.0
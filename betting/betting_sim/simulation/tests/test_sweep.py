@@ -0,0 +1,52 @@
+"""
+Common-random-numbers parameter sweeps.
+"""
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy, MartingaleStrategy
+from simulation.engine.sweep import run_parameter_sweep
+
+from .conftest import make_config
+
+
+COMPARED_STATISTICS = (
+    'mean_final_bankroll', 'median_final_bankroll', 'std_final_bankroll', 'probability_of_ruin',
+    'mean_max_drawdown', 'mean_time_under_water', 'mean_longest_losing_streak',
+)
+
+
+def assert_matches_standalone_run(point, config, strategy):
+    single = Simulator(config, strategy, engine='batch').run_multiple_simulations()
+    for name in COMPARED_STATISTICS:
+        assert point[name] == pytest.approx(single[name], rel=1e-12, abs=1e-12), name
+
+
+@pytest.mark.parametrize('executor', ['serial', 'thread'])
+def test_bet_fraction_points_match_standalone_runs(executor):
+    config = make_config(num_rounds=40, num_simulations=1500, seed=3)
+    fractions = [0.1, 0.3, 0.5]
+
+    sweep = run_parameter_sweep(config, FixedFractionStrategy, 'bet_fraction', fractions,
+                                executor=executor, max_workers=2)
+
+    assert sweep['seed'] == 3
+    for point, fraction in zip(sweep['sweep_results'], fractions):
+        assert point['param_value'] == fraction
+        assert_matches_standalone_run(point, config, FixedFractionStrategy(fraction))
+
+
+def test_initial_bankroll_points_match_standalone_runs():
+    config = make_config(num_rounds=40, num_simulations=1000, seed=4)
+    bankrolls = [50.0, 200.0]
+
+    sweep = run_parameter_sweep(config, lambda bankroll: MartingaleStrategy(0.02, 0.5), 'initial_bankroll', bankrolls)
+
+    for point, bankroll in zip(sweep['sweep_results'], bankrolls):
+        point_config = make_config(num_rounds=40, num_simulations=1000, seed=4)
+        point_config.initial_bankroll = bankroll
+        assert_matches_standalone_run(point, point_config, MartingaleStrategy(0.02, 0.5))
+
+
+def test_unknown_parameter_is_rejected():
+    with pytest.raises(ValueError):
+        run_parameter_sweep(make_config(), FixedFractionStrategy, 'num_rounds', [10])
@@ -0,0 +1,47 @@
+"""
+Antithetic draws and control variates.
+"""
+import pytest
+
+from simulation.engine import Simulator, FixedFractionStrategy
+
+from .conftest import make_config, assert_needs_sampled_paths
+
+
+def exact_mean(strategy, num_rounds=50):
+    config = make_config(num_rounds=num_rounds)
+    return Simulator(config, strategy, engine='analytic').run_multiple_simulations()['mean_final_bankroll']
+
+
+def test_control_variates_are_unbiased_and_reduce_variance():
+    config = make_config(num_rounds=50, num_simulations=8192, seed=2)
+    strategy = FixedFractionStrategy(0.3)
+
+    results = Simulator(config, strategy, engine='batch', control_variates=True).run_multiple_simulations()
+
+    summary = results['variance_reduction']['mean_final_bankroll']
+    assert summary['estimate'] == results['mean_final_bankroll']
+    assert summary['variance_reduction_factor'] > 1.0
+    assert abs(summary['estimate'] - exact_mean(strategy)) < 4 * summary['standard_error']
+
+
+def test_antithetic_pairs_are_unbiased():
+    config = make_config(num_rounds=50, num_simulations=8192, seed=2, antithetic=True)
+    strategy = FixedFractionStrategy(0.3)
+
+    results = Simulator(config, strategy, engine='batch').run_multiple_simulations()
+
+    summary = results['variance_reduction']
+    assert summary['antithetic']
+    assert summary['num_units'] == config.num_simulations // 2
+    error = summary['mean_final_bankroll']['standard_error']
+    assert abs(results['mean_final_bankroll'] - exact_mean(strategy)) < 4 * error
+
+
+@pytest.mark.parametrize('config_options, options', [
+    ({'antithetic': True}, {}),
+    ({}, {'control_variates': True}),
+])
+def test_variance_reduction_needs_sampled_paths(config_options, options):
+    config = make_config(num_rounds=20, num_simulations=512, **config_options)
+    assert_needs_sampled_paths(config, **options)
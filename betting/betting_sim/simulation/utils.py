@@ -10,16 +10,31 @@ import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 import json
+import copy
+import os
 from typing import List, Dict, Any, Optional, Tuple, Union
 import pandas as pd
 
 from .engine import (
     Simulator, SimulationConfig, OutcomeConfig, BettingStrategy,
-    FixedFractionStrategy, KellyCriterionStrategy, MartingaleStrategy, CustomStrategy
+    FixedFractionStrategy, KellyCriterionStrategy, MartingaleStrategy, CustomStrategy,
+    PrecisionTarget, compare_strategies, optimize_bet_fraction
 )
+from .engine import sweep, grid, qmc, sensitivity
+from .engine.aggregation import CHUNK_CELLS
+from .engine.sketches import TrajectorySketch
 from .models import Simulation, Outcome, SimulationResult
 
 
+# Parameter sweeps run their points on a thread pool; the batch engine spends
+# most of its time in NumPy, which releases the GIL
+SWEEP_EXECUTOR = 'thread'
+
+# Runs of at least this many path-rounds shard their paths over a process pool;
+# below it, starting the pool costs more than the extra cores save
+PROCESS_EXECUTOR_CELLS = 20_000_000
+
+
 def create_simulator_from_model(simulation: Simulation) -> Tuple[Simulator, BettingStrategy]:
     """
     Create a Simulator instance from a Simulation model.
@@ -30,45 +45,199 @@ def create_simulator_from_model(simulation: Simulation) -> Tuple[Simulator, Bett
     Returns:
         tuple: (simulator, strategy) instances
     """
-    # Create outcome configs
-    outcome_configs = []
-    for outcome in simulation.outcomes.all():
-        outcome_configs.append(OutcomeConfig(
-            name=outcome.name,
-            probability=outcome.probability,
-            multiplier=outcome.multiplier
-        ))
-    
     # Create simulation config
-    config = SimulationConfig(
+    config = create_simulation_config(simulation)
+    
+    # Create strategy
+    strategy = create_strategy(simulation, simulation.strategy)
+    
+    # Adaptive precision, with num_simulations as the budget
+    precision = None
+    if simulation.target_ruin_half_width or simulation.target_mean_half_width:
+        precision = PrecisionTarget(
+            ruin_half_width=simulation.target_ruin_half_width,
+            mean_half_width=simulation.target_mean_half_width,
+        )
+    
+    # Create simulator (only constant-fraction strategies have pathwise sensitivities)
+    simulator = Simulator(config, strategy, engine=simulation.engine, executor=choose_executor(config),
+                          aggregation=choose_aggregation(config), precision=precision,
+                          importance_sampling=simulation.ruin_importance_sampling,
+                          sensitivities=simulation.pathwise_sensitivities and strategy.is_stationary())
+    
+    return simulator, strategy
+
+
+def choose_executor(config: SimulationConfig) -> str:
+    """
+    Pick the executor of a run from its size.
+    
+    Args:
+        config: Simulation configuration
+        
+    Returns:
+        str: 'process' for runs of at least PROCESS_EXECUTOR_CELLS path-rounds
+             on a machine with several CPUs, 'serial' otherwise
+    """
+    cells = config.num_simulations * (config.num_rounds + 1)
+    if cells >= PROCESS_EXECUTOR_CELLS and (os.cpu_count() or 1) > 1:
+        return 'process'
+    return 'serial'
+
+
+def choose_aggregation(config: SimulationConfig) -> str:
+    """
+    Pick the aggregation of a run from its size.
+    
+    Args:
+        config: Simulation configuration
+        
+    Returns:
+        str: 'streaming' for runs whose trajectories outgrow one streaming
+             chunk of CHUNK_CELLS bankrolls, 'full' otherwise
+    """
+    if config.num_simulations * (config.num_rounds + 1) > CHUNK_CELLS:
+        return 'streaming'
+    return 'full'
+
+
+def create_simulation_config(simulation: Simulation) -> SimulationConfig:
+    """
+    Create the SimulationConfig of a Simulation model.
+    
+    Args:
+        simulation: The Simulation model instance
+        
+    Returns:
+        SimulationConfig: Configuration with the simulation's outcomes
+    """
+    outcome_configs = [
+        OutcomeConfig(name=outcome.name, probability=outcome.probability, multiplier=outcome.multiplier)
+        for outcome in simulation.outcomes.all()
+    ]
+    return SimulationConfig(
         initial_bankroll=simulation.initial_bankroll,
         num_rounds=simulation.num_rounds,
         num_simulations=simulation.num_simulations,
-        outcomes=outcome_configs
+        outcomes=outcome_configs,
+        seed=simulation.seed,
+        qmc=simulation.qmc_sampling
     )
+
+
+def create_strategy(simulation: Simulation, strategy_key: str) -> BettingStrategy:
+    """
+    Create one of the strategies of Simulation.STRATEGY_CHOICES for a simulation.
     
-    # Create strategy
-    strategy = None
-    if simulation.strategy == 'fixed_fraction':
-        strategy = FixedFractionStrategy(fraction=simulation.bet_fraction)
-    elif simulation.strategy == 'kelly_criterion':
+    Args:
+        simulation: The Simulation model instance
+        strategy_key: Key of the strategy in Simulation.STRATEGY_CHOICES
+        
+    Returns:
+        BettingStrategy: Strategy using the simulation's bet fraction
+    """
+    if strategy_key == 'fixed_fraction':
+        return FixedFractionStrategy(fraction=simulation.bet_fraction)
+    elif strategy_key == 'kelly_criterion':
         outcomes_list = [
             {'probability': o.probability, 'multiplier': o.multiplier}
             for o in simulation.outcomes.all()
         ]
-        strategy = KellyCriterionStrategy(outcomes_list, fraction_limit=simulation.bet_fraction)
-    elif simulation.strategy == 'martingale':
-        strategy = MartingaleStrategy(base_fraction=simulation.bet_fraction / 10, max_fraction=simulation.bet_fraction)
-    elif simulation.strategy == 'custom' and simulation.custom_strategy:
-        strategy = CustomStrategy(simulation.custom_strategy.file.path)
-    else:
-        # Fallback to fixed fraction if something is wrong
-        strategy = FixedFractionStrategy(fraction=simulation.bet_fraction)
+        return KellyCriterionStrategy(outcomes_list, fraction_limit=simulation.bet_fraction,
+                                      kelly_multiplier=simulation.kelly_multiplier)
+    elif strategy_key == 'martingale':
+        return MartingaleStrategy(base_fraction=simulation.bet_fraction / 10, max_fraction=simulation.bet_fraction)
+    elif strategy_key == 'custom' and simulation.custom_strategy:
+        return CustomStrategy(simulation.custom_strategy.file.path)
+    
+    # Fallback to fixed fraction if something is wrong
+    return FixedFractionStrategy(fraction=simulation.bet_fraction)
+
+
+def run_strategy_comparison(simulation: Simulation) -> Dict[str, Any]:
+    """
+    Run a simulation's compared strategies on common random numbers.
     
-    # Create simulator
-    simulator = Simulator(config, strategy)
+    The detailed results of the first strategy are returned as the run's
+    results, so the usual plots and statistics show it, with the comparison
+    of every strategy under 'comparison'.
     
-    return simulator, strategy
+    Args:
+        simulation: The Simulation model instance with is_strategy_comparison set
+        
+    Returns:
+        dict: Results of the first strategy with a 'comparison' entry
+    """
+    config = create_simulation_config(simulation)
+    strategy_choices = dict(Simulation.STRATEGY_CHOICES)
+    keys = simulation.get_comparison_strategies()
+    strategies = [create_strategy(simulation, key) for key in keys]
+    names = [strategy_choices.get(key, key) for key in keys]
+    
+    comparison = compare_strategies(config, strategies, names=names)
+    
+    results = dict(comparison['results'][names[0]])
+    results['elapsed_time'] = comparison['elapsed_time']
+    results['comparison'] = {
+        'strategies': names,
+        'confidence': comparison['confidence'],
+        'summaries': [
+            {
+                'strategy': name,
+                'mean_final_bankroll': comparison['results'][name]['mean_final_bankroll'],
+                'median_final_bankroll': comparison['results'][name]['median_final_bankroll'],
+                'std_final_bankroll': comparison['results'][name]['std_final_bankroll'],
+                'probability_of_ruin': comparison['results'][name]['probability_of_ruin'],
+                'mean_max_drawdown': comparison['results'][name]['mean_max_drawdown'],
+                'mean_trajectory': comparison['results'][name]['mean_trajectory'],
+            }
+            for name in names
+        ],
+        'paired_differences': comparison['paired_differences'],
+    }
+    return results
+
+
+def run_bet_fraction_optimization(simulation: Simulation) -> Dict[str, Any]:
+    """
+    Search the simulation's strategy for the best bet fraction under its ruin cap.
+    
+    The search evaluates bet fractions on common random numbers; the
+    simulation is then run at the optimal fraction with the same seed, so the
+    usual plots and statistics show the optimum, with the search under
+    'optimization'.
+    
+    Args:
+        simulation: The Simulation model instance with is_optimization set
+        
+    Returns:
+        dict: Results at the optimal bet fraction with an 'optimization' entry
+    """
+    config = create_simulation_config(simulation)
+    
+    def create_fraction_strategy(bet_fraction: float) -> BettingStrategy:
+        point = copy.copy(simulation)
+        point.bet_fraction = bet_fraction
+        return create_strategy(point, simulation.strategy)
+    
+    optimization = optimize_bet_fraction(
+        config, create_fraction_strategy, objective=simulation.optimization_objective,
+        max_ruin_probability=simulation.max_ruin_probability
+    )
+    
+    # Same seed and engine as the evaluations, so the run reproduces the optimum's statistics
+    config.seed = optimization['seed']
+    strategy = create_fraction_strategy(optimization['optimal_fraction'])
+    simulator = Simulator(config, strategy, engine='batch' if strategy.supports_batch() else 'scalar')
+    results = simulator.run_multiple_simulations()
+    results['optimization'] = {
+        key: optimization[key] for key in (
+            'objective', 'max_ruin_probability', 'optimal_fraction', 'feasible',
+            'evaluations', 'num_simulator_calls', 'num_cache_hits'
+        )
+    }
+    results['elapsed_time'] += optimization['elapsed_time']
+    return results
 
 
 def generate_plots(result: SimulationResult) -> Dict[str, str]:
@@ -84,10 +253,22 @@ def generate_plots(result: SimulationResult) -> Dict[str, str]:
     detailed_results = result.get_detailed_results()
     plots = {}
     
+    if 'sweep_results' in detailed_results:
+        plots['parameter_sweep'] = plot_parameter_sweep_plotly(detailed_results)
+        return plots
+    
+    if 'grid_metrics' in detailed_results:
+        plots['grid_sweep'] = plot_grid_sweep_plotly(detailed_results)
+        return plots
+    
     # Generate Plotly plots
     plots['bankroll_trajectory'] = plot_bankroll_trajectory_plotly(detailed_results)
     plots['bankroll_histogram'] = plot_bankroll_histogram_plotly(detailed_results)
     plots['outcome_distribution'] = plot_outcome_distribution_plotly(detailed_results)
+    if 'comparison' in detailed_results:
+        plots['strategy_comparison'] = plot_strategy_comparison_plotly(detailed_results['comparison'])
+    if 'optimization' in detailed_results:
+        plots['optimization'] = plot_optimization_plotly(detailed_results['optimization'])
     
     return plots
 
@@ -130,6 +311,17 @@ def plot_bankroll_trajectory_plotly(results: Dict[str, Any]) -> str:
         line=dict(color='green', width=1, dash='dash')
     ))
     
+    # Add median from the trajectory sketch (not available for older results)
+    bands = get_percentile_bands(results, [50])
+    if bands:
+        fig.add_trace(go.Scatter(
+            x=list(range(len(bands[50]))),
+            y=bands[50],
+            mode='lines',
+            name='Median',
+            line=dict(color='purple', width=1, dash='dot')
+        ))
+    
     # Add sample trajectories (first 5)
     for i, result in enumerate(results['individual_results'][:5]):
         fig.add_trace(go.Scatter(
@@ -153,6 +345,29 @@ def plot_bankroll_trajectory_plotly(results: Dict[str, Any]) -> str:
     return fig.to_html(include_plotlyjs='cdn', full_html=False)
 
 
+def get_percentile_bands(results: Dict[str, Any], percentiles: List[float] = (5, 25, 50, 75, 95)) -> Dict[float, List[float]]:
+    """
+    Compute per-round percentile bands from the trajectory sketch in the results.
+    
+    Markov-chain runs store their bands directly and have no sketch.
+    
+    Args:
+        results: Simulation results dictionary
+        percentiles: Percentiles to compute (0-100)
+        
+    Returns:
+        dict: Percentile to per-round values, empty if the results have neither
+    """
+    if 'percentile_bands' in results:
+        bands = results['percentile_bands']
+        return {p: bands[str(p)] for p in percentiles if str(p) in bands}
+    if 'trajectory_sketch' not in results:
+        return {}
+    
+    sketch = TrajectorySketch.from_dict(results['trajectory_sketch'])
+    return {p: sketch.percentile(p).tolist() for p in percentiles}
+
+
 def plot_bankroll_histogram_plotly(results: Dict[str, Any]) -> str:
     """
     Generate a Plotly histogram of final bankrolls.
@@ -245,10 +460,218 @@ def plot_outcome_distribution_plotly(results: Dict[str, Any]) -> str:
     return fig.to_html(include_plotlyjs='cdn', full_html=False)
 
 
+def plot_strategy_comparison_plotly(comparison: Dict[str, Any]) -> str:
+    """
+    Generate a Plotly plot of the mean trajectory of every compared strategy.
+    
+    Args:
+        comparison: The 'comparison' entry of a strategy comparison's results
+        
+    Returns:
+        str: HTML representation of the plot
+    """
+    fig = go.Figure()
+    
+    for summary in comparison['summaries']:
+        fig.add_trace(go.Scatter(
+            x=list(range(len(summary['mean_trajectory']))),
+            y=summary['mean_trajectory'],
+            mode='lines',
+            name=summary['strategy']
+        ))
+    
+    fig.update_layout(
+        title='Mean Bankroll by Strategy (Common Random Numbers)',
+        xaxis_title='Round',
+        yaxis_title='Bankroll',
+        legend_title='Strategies',
+        template='plotly_white',
+        hovermode='x unified'
+    )
+    
+    return fig.to_html(include_plotlyjs='cdn', full_html=False)
+
+
+def plot_optimization_plotly(optimization: Dict[str, Any]) -> str:
+    """
+    Generate a Plotly plot of the bet fractions evaluated by an optimization.
+    
+    Args:
+        optimization: The 'optimization' entry of the results
+        
+    Returns:
+        str: HTML representation of the plot
+    """
+    points = optimization['evaluations']
+    fractions = [point['bet_fraction'] for point in points]
+    objective_name = dict(Simulation.OPTIMIZATION_OBJECTIVE_CHOICES).get(
+        optimization['objective'], optimization['objective']
+    )
+    
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Scatter(
+        x=fractions, y=[point[optimization['objective']] for point in points],
+        mode='lines+markers', name=objective_name
+    ))
+    fig.add_trace(go.Scatter(
+        x=fractions, y=[point['probability_of_ruin'] for point in points],
+        mode='lines+markers', name='Probability of Ruin', line=dict(dash='dash')
+    ), secondary_y=True)
+    if optimization['max_ruin_probability'] is not None:
+        fig.add_hline(y=optimization['max_ruin_probability'], line_dash='dot', line_color='red',
+                      secondary_y=True)
+    fig.add_vline(x=optimization['optimal_fraction'], line_dash='dot', line_color='green',
+                  annotation_text='Optimum')
+    
+    fig.update_layout(
+        title='Bet Fraction Optimization',
+        xaxis_title='Bet Fraction',
+        template='plotly_white',
+        hovermode='x unified'
+    )
+    fig.update_yaxes(title_text=objective_name, secondary_y=False)
+    fig.update_yaxes(title_text='Probability of Ruin', secondary_y=True)
+    
+    return fig.to_html(include_plotlyjs='cdn', full_html=False)
+
+
+def plot_parameter_sweep_plotly(results: Dict[str, Any]) -> str:
+    """
+    Generate a Plotly plot of the sweep statistics against the swept parameter.
+    
+    Args:
+        results: Parameter sweep results dictionary
+        
+    Returns:
+        str: HTML representation of the plot
+    """
+    points = results['sweep_results']
+    param_values = [point['param_value'] for point in points]
+    
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Scatter(
+        x=param_values, y=[point['mean_final_bankroll'] for point in points],
+        mode='lines+markers', name='Mean Final Bankroll'
+    ))
+    fig.add_trace(go.Scatter(
+        x=param_values, y=[point['median_final_bankroll'] for point in points],
+        mode='lines+markers', name='Median Final Bankroll'
+    ))
+    fig.add_trace(go.Scatter(
+        x=param_values, y=[point['probability_of_ruin'] for point in points],
+        mode='lines+markers', name='Probability of Ruin', line=dict(dash='dash')
+    ), secondary_y=True)
+    
+    fig.update_layout(
+        title=f"Parameter Sweep: {results['parameter'].replace('_', ' ').title()}",
+        xaxis_title=results['parameter'].replace('_', ' ').title(),
+        template='plotly_white',
+        hovermode='x unified'
+    )
+    fig.update_yaxes(title_text='Bankroll', secondary_y=False)
+    fig.update_yaxes(title_text='Probability of Ruin', secondary_y=True)
+    
+    return fig.to_html(include_plotlyjs='cdn', full_html=False)
+
+
+def grid_axis_label(axis: Dict[str, Any]) -> str:
+    """
+    Label of a grid sweep axis, naming the outcome of outcome parameters.
+    """
+    label = dict(Simulation.SWEEP_PARAMETER_CHOICES).get(axis['parameter'], axis['parameter'])
+    if axis.get('outcome_name'):
+        label += f" ({axis['outcome_name']})"
+    return label
+
+
+def plot_grid_sweep_plotly(results: Dict[str, Any]) -> str:
+    """
+    Generate a Plotly plot of a grid sweep.
+    
+    One axis gives lines against the parameter; two axes give heatmaps of
+    the mean final bankroll and the probability of ruin; a third axis adds a
+    slider over its values.
+    
+    Args:
+        results: Grid sweep results dictionary
+        
+    Returns:
+        str: HTML representation of the plot
+    """
+    axes = results['axes']
+    mean = grid.decode_grid_array(results['grid_metrics']['mean_final_bankroll'])
+    ruin = grid.decode_grid_array(results['grid_metrics']['probability_of_ruin'])
+    
+    if len(axes) == 1:
+        median = grid.decode_grid_array(results['grid_metrics']['median_final_bankroll'])
+        values = axes[0]['values']
+        fig = make_subplots(specs=[[{"secondary_y": True}]])
+        fig.add_trace(go.Scatter(x=values, y=mean.tolist(), mode='lines+markers', name='Mean Final Bankroll'))
+        fig.add_trace(go.Scatter(x=values, y=median.tolist(), mode='lines+markers', name='Median Final Bankroll'))
+        fig.add_trace(go.Scatter(
+            x=values, y=ruin.tolist(), mode='lines+markers', name='Probability of Ruin', line=dict(dash='dash')
+        ), secondary_y=True)
+        fig.update_layout(
+            title=f"Parameter Sweep: {grid_axis_label(axes[0])}",
+            xaxis_title=grid_axis_label(axes[0]),
+            template='plotly_white',
+            hovermode='x unified'
+        )
+        fig.update_yaxes(title_text='Bankroll', secondary_y=False)
+        fig.update_yaxes(title_text='Probability of Ruin', secondary_y=True)
+        return fig.to_html(include_plotlyjs='cdn', full_html=False)
+    
+    # Heatmaps have the first axis on y and the second on x
+    if len(axes) == 2:
+        mean = mean[..., np.newaxis]
+        ruin = ruin[..., np.newaxis]
+    x_values = axes[1]['values']
+    y_values = axes[0]['values']
+    
+    fig = make_subplots(rows=1, cols=2, subplot_titles=('Mean Final Bankroll', 'Probability of Ruin'),
+                        horizontal_spacing=0.15)
+    fig.add_trace(go.Heatmap(
+        x=x_values, y=y_values, z=mean[..., 0].tolist(), colorscale='Viridis',
+        colorbar=dict(x=0.43, title='Bankroll')
+    ), row=1, col=1)
+    fig.add_trace(go.Heatmap(
+        x=x_values, y=y_values, z=ruin[..., 0].tolist(), colorscale='Reds', zmin=0, zmax=1,
+        colorbar=dict(title='Ruin')
+    ), row=1, col=2)
+    
+    if len(axes) == 3:
+        fig.update_layout(sliders=[dict(
+            currentvalue=dict(prefix=f"{grid_axis_label(axes[2])}: "),
+            steps=[
+                dict(method='restyle', label=f"{value:g}",
+                     args=[{'z': [mean[..., k].tolist(), ruin[..., k].tolist()]}, [0, 1]])
+                for k, value in enumerate(axes[2]['values'])
+            ]
+        )])
+    
+    for col in (1, 2):
+        fig.update_xaxes(title_text=grid_axis_label(axes[1]), row=1, col=col)
+        fig.update_yaxes(title_text=grid_axis_label(axes[0]), row=1, col=col)
+    fig.update_layout(
+        title=f"Grid Sweep ({' × '.join(str(size) for size in results['shape'])} points)",
+        template='plotly_white'
+    )
+    
+    return fig.to_html(include_plotlyjs='cdn', full_html=False)
+
+
 def run_parameter_sweep(simulation: Simulation) -> Dict[str, Any]:
     """
     Run a parameter sweep simulation.
     
+    Every sweep point runs the simulation's full number of paths, and all
+    points play the same outcome paths, so neighbouring points differ only by
+    the effect of the parameter. Points run in parallel worker threads.
+    
+    A single bet fraction or initial bankroll axis gives one result per
+    point; sweeps over other parameters or over a second or third axis run
+    as a grid, with heatmap-ready arrays of every statistic.
+    
     Args:
         simulation: The Simulation model instance
         
@@ -258,54 +681,70 @@ def run_parameter_sweep(simulation: Simulation) -> Dict[str, Any]:
     if not simulation.is_parameter_sweep:
         raise ValueError("Simulation is not configured for parameter sweep")
     
+    axes = simulation.get_sweep_axes()
+    if len(axes) > 1 or axes[0]['parameter'] not in sweep.SWEEP_PARAMETERS:
+        return run_grid_sweep(simulation)
+    
     parameter = simulation.sweep_parameter
-    start_value = simulation.sweep_start
-    end_value = simulation.sweep_end
-    num_steps = simulation.sweep_steps
     
     # Generate parameter values
-    param_values = np.linspace(start_value, end_value, num_steps)
-    
-    # Store results for each parameter value
-    sweep_results = []
-    
-    for param_value in param_values:
-        # Create a copy of the simulation with the modified parameter
-        temp_simulation = Simulation(
-            name=simulation.name,
-            description=simulation.description,
-            initial_bankroll=simulation.initial_bankroll,
-            num_rounds=simulation.num_rounds,
-            bet_fraction=simulation.bet_fraction,
-            num_simulations=simulation.num_simulations // num_steps,  # Divide simulations
-            strategy=simulation.strategy,
-            custom_strategy=simulation.custom_strategy
-        )
-        
-        # Set the parameter being swept
+    param_values = np.linspace(simulation.sweep_start, simulation.sweep_end, simulation.sweep_steps)
+    
+    def create_point_strategy(param_value: float) -> BettingStrategy:
+        # An unsaved copy still reads the simulation's outcomes
+        point = copy.copy(simulation)
         if parameter == 'bet_fraction':
-            temp_simulation.bet_fraction = param_value
-        elif parameter == 'initial_bankroll':
-            temp_simulation.initial_bankroll = param_value
-        
-        # Create simulator and run
-        simulator, _ = create_simulator_from_model(temp_simulation)
-        results = simulator.run_multiple_simulations()
-        
-        # Store results with parameter value
-        sweep_results.append({
-            'param_value': param_value,
-            'mean_final_bankroll': results['mean_final_bankroll'],
-            'median_final_bankroll': results['median_final_bankroll'],
-            'std_final_bankroll': results['std_final_bankroll'],
-            'probability_of_ruin': results['probability_of_ruin'],
-            'mean_max_drawdown': results['mean_max_drawdown']
-        })
+            point.bet_fraction = param_value
+        return create_strategy(point, simulation.strategy)
     
-    return {
-        'parameter': parameter,
-        'sweep_results': sweep_results
-    }
+    return sweep.run_parameter_sweep(
+        create_simulation_config(simulation), create_point_strategy, parameter, param_values,
+        executor=SWEEP_EXECUTOR
+    )
+
+
+def run_grid_sweep(simulation: Simulation) -> Dict[str, Any]:
+    """
+    Run a simulation's sweep axes as a grid over every combination of values.
+    
+    Args:
+        simulation: The Simulation model instance
+        
+    Returns:
+        dict: Grid sweep results, with the outcome name of outcome axes
+    """
+    config = create_simulation_config(simulation)
+    outcome_index = simulation.sweep_outcome - 1 if simulation.sweep_outcome else None
+    axes = [
+        grid.GridAxis(
+            axis['parameter'], np.linspace(axis['start'], axis['end'], axis['steps']),
+            outcome_index if axis['parameter'] in grid.OUTCOME_PARAMETERS else None
+        )
+        for axis in simulation.get_sweep_axes()
+    ]
+    
+    def create_point_strategy(point_config: SimulationConfig, params: Dict[str, float]) -> BettingStrategy:
+        point = copy.copy(simulation)
+        point.bet_fraction = params.get('bet_fraction', simulation.bet_fraction)
+        if simulation.strategy == 'kelly_criterion':
+            # Kelly follows the point's outcomes
+            outcomes_list = [
+                {'probability': o.probability, 'multiplier': o.multiplier} for o in point_config.outcomes
+            ]
+            return KellyCriterionStrategy(outcomes_list, fraction_limit=point.bet_fraction,
+                                          kelly_multiplier=simulation.kelly_multiplier)
+        if simulation.strategy == 'martingale':
+            return MartingaleStrategy(
+                base_fraction=params.get('martingale_base_fraction', point.bet_fraction / 10),
+                max_fraction=params.get('martingale_max_fraction', point.bet_fraction)
+            )
+        return create_strategy(point, simulation.strategy)
+    
+    results = grid.run_grid_sweep(config, create_point_strategy, axes, executor=SWEEP_EXECUTOR)
+    for axis in results['axes']:
+        if axis['outcome_index'] is not None:
+            axis['outcome_name'] = config.outcomes[axis['outcome_index']].name
+    return results
 
 
 def export_results_to_csv(result: SimulationResult) -> str:
@@ -325,7 +764,7 @@ def export_results_to_csv(result: SimulationResult) -> str:
         'Metric': [
             'Initial Bankroll', 'Mean Final Bankroll', 'Median Final Bankroll',
             'Min Final Bankroll', 'Max Final Bankroll', 'Standard Deviation',
-            'Probability of Ruin', 'Mean Max Drawdown', 'Number of Simulations'
+            'Probability of Ruin', 'Mean Max Drawdown', 'Number of Simulations', 'Seed'
         ],
         'Value': [
             detailed_results.get('initial_bankroll', 'N/A'),
@@ -336,13 +775,168 @@ def export_results_to_csv(result: SimulationResult) -> str:
             result.std_final_bankroll,
             result.probability_of_ruin,
             result.max_drawdown,
-            detailed_results.get('num_simulations', 'N/A')
+            detailed_results.get('num_simulations', 'N/A'),
+            result.seed if result.seed is not None else 'N/A'
         ]
     }
     
+    # Path metrics beyond the drawdown (results stored before they existed lack them)
+    if 'mean_time_under_water' in detailed_results:
+        summary_data['Metric'].extend([
+            'Mean Time Under Water (Rounds)', 'Mean Longest Losing Streak', 'Longest Losing Streak'
+        ])
+        summary_data['Value'].extend([
+            detailed_results['mean_time_under_water'], detailed_results['mean_longest_losing_streak'],
+            detailed_results['max_longest_losing_streak']
+        ])
+    
+    # Achieved confidence intervals of adaptive-precision runs
+    precision = detailed_results.get('precision')
+    if precision:
+        summary_data['Metric'].extend([
+            'Confidence Level', 'Ruin Probability CI Low', 'Ruin Probability CI High',
+            'Mean Final Bankroll CI Low', 'Mean Final Bankroll CI High', 'Simulations Used'
+        ])
+        summary_data['Value'].extend([
+            precision['confidence'], *precision['ruin_ci'], *precision['mean_ci'],
+            precision['simulations_used']
+        ])
+    
+    # Importance-sampling estimate of the ruin probability
+    importance_sampling = detailed_results.get('importance_sampling')
+    if importance_sampling:
+        summary_data['Metric'].extend([
+            'Ruin Probability Standard Error', 'Plain Ruin Frequency', 'Importance Sampling Paths'
+        ])
+        summary_data['Value'].extend([
+            importance_sampling['standard_error'], importance_sampling['plain_estimate'],
+            importance_sampling['num_simulations']
+        ])
+    
     summary_df = pd.DataFrame(summary_data)
     summary_csv = summary_df.to_csv(index=False)
     
+    # Per-strategy summaries and paired differences of strategy comparisons
+    comparison = detailed_results.get('comparison')
+    if comparison:
+        strategies_df = pd.DataFrame([
+            {key: value for key, value in summary.items() if key != 'mean_trajectory'}
+            for summary in comparison['summaries']
+        ])
+        differences_df = pd.DataFrame([
+            {**{key: value for key, value in difference.items() if key != 'ci'},
+             'ci_low': difference['ci'][0], 'ci_high': difference['ci'][1]}
+            for difference in comparison['paired_differences']
+        ])
+        summary_csv += "\n\n# Strategy Comparison\n" + strategies_df.to_csv(index=False)
+        summary_csv += "\n\n# Paired Differences\n" + differences_df.to_csv(index=False)
+    
+    # Bet fractions evaluated by an optimization
+    optimization = detailed_results.get('optimization')
+    if optimization:
+        summary_csv += "\n\n# Bet Fraction Optimization\n" + pd.DataFrame([
+            {'Optimal Bet Fraction': optimization['optimal_fraction'], 'Objective': optimization['objective'],
+             'Max Ruin Probability': optimization['max_ruin_probability'], 'Feasible': optimization['feasible'],
+             'Simulator Calls': optimization['num_simulator_calls']}
+        ]).to_csv(index=False)
+        summary_csv += "\n\n# Evaluated Bet Fractions\n" + pd.DataFrame(optimization['evaluations']).to_csv(index=False)
+    
+    # VaR, CVaR, log growth and the time to ruin
+    risk = detailed_results.get('risk_metrics')
+    if risk:
+        risk_rows = [
+            {'Metric': f'Value-at-Risk ({level}%)', 'Value': value}
+            for level, value in risk['value_at_risk'].items()
+        ] + [
+            {'Metric': f'CVaR ({level}%)', 'Value': value}
+            for level, value in risk['conditional_value_at_risk'].items()
+        ] + [
+            {'Metric': 'Mean Log-Growth per Round', 'Value': risk['mean_log_growth']},
+            {'Metric': 'Median Log-Growth per Round', 'Value': risk['median_log_growth']},
+            {'Metric': 'Std Log-Growth per Round', 'Value': risk['std_log_growth']},
+            {'Metric': 'Mean Log Return per Round', 'Value': risk['mean_log_return']},
+            {'Metric': 'Std Log Return per Round', 'Value': risk['std_log_return']},
+            {'Metric': 'Sharpe-like Ratio', 'Value': risk['sharpe_ratio']},
+            {'Metric': 'Mean Time to Ruin', 'Value': risk['time_to_ruin']['mean']},
+            {'Metric': 'Median Time to Ruin', 'Value': risk['time_to_ruin']['median']},
+        ]
+        summary_csv += "\n\n# Risk Metrics\n" + pd.DataFrame(risk_rows).to_csv(index=False)
+        
+        ruin_counts = np.array(risk['time_to_ruin']['counts'])
+        summary_csv += "\n\n# Time to Ruin\n" + pd.DataFrame({
+            'Round': np.arange(len(ruin_counts)),
+            'Paths Ruined': ruin_counts,
+            'Cumulative Probability of Ruin': np.cumsum(ruin_counts) / max(risk['num_paths'], 1),
+        }).to_csv(index=False)
+    
+    # Bootstrap confidence intervals
+    if detailed_results.get('bootstrap', {}).get('intervals'):
+        bootstrap = detailed_results['bootstrap']
+        summary_csv += "\n\n# Bootstrap Confidence Intervals\n" + pd.DataFrame([
+            {
+                'Statistic': name,
+                'Estimate': interval['estimate'],
+                'Lower': interval['lower'],
+                'Upper': interval['upper'],
+                'Confidence': bootstrap['confidence'],
+            }
+            for name, interval in bootstrap['intervals'].items()
+        ]).to_csv(index=False)
+    
+    # Randomized quasi-Monte Carlo error estimates
+    qmc_estimates = detailed_results.get('qmc')
+    if qmc_estimates:
+        summary_csv += "\n\n# Quasi-Monte Carlo Error Estimates\n" + pd.DataFrame([
+            {
+                'Statistic': name,
+                'Estimate': qmc_estimates[name]['estimate'],
+                'QMC Standard Error': qmc_estimates[name]['standard_error'],
+                'Monte Carlo Standard Error': qmc_estimates[name]['monte_carlo_standard_error'],
+                'Variance Reduction Factor': qmc_estimates[name]['variance_reduction_factor'],
+                'Replicates': qmc_estimates['replicates'],
+            }
+            for name in qmc.QMC_STATISTICS if name in qmc_estimates
+        ]).to_csv(index=False)
+    
+    # Pathwise derivatives with respect to the bet fraction
+    sensitivities = detailed_results.get('sensitivities')
+    if sensitivities:
+        summary_csv += "\n\n# Bet-Fraction Sensitivities\n" + pd.DataFrame([
+            {
+                'Statistic': name,
+                'Bet Fraction': sensitivities['bet_fraction'],
+                'Value': sensitivities[name]['value'],
+                'Derivative': sensitivities[name]['derivative'],
+                'Standard Error': sensitivities[name]['standard_error'],
+                'Paths': sensitivities['num_paths'],
+            }
+            for name in sensitivity.SENSITIVITY_STATISTICS if name in sensitivities
+        ]).to_csv(index=False)
+    
+    # Per-round distribution of Markov-chain runs
+    if 'ruin_probability_by_round' in detailed_results:
+        bands = detailed_results['percentile_bands']
+        distribution_df = pd.DataFrame({
+            'Round': np.arange(len(detailed_results['mean_trajectory'])),
+            'Mean Bankroll': detailed_results['mean_trajectory'],
+            **{f'{p}th Percentile': values for p, values in bands.items()},
+            'Probability of Ruin': detailed_results['ruin_probability_by_round'],
+        })
+        summary_csv += "\n\n# Bankroll Distribution by Round\n" + distribution_df.to_csv(index=False)
+    
+    # Grid sweeps, one row per point
+    if 'grid_metrics' in detailed_results:
+        axes = detailed_results['axes']
+        metrics = {
+            name: grid.decode_grid_array(data).ravel() for name, data in detailed_results['grid_metrics'].items()
+        }
+        axis_values = np.meshgrid(*[axis['values'] for axis in axes], indexing='ij')
+        grid_df = pd.DataFrame({
+            **{grid_axis_label(axis): values.ravel() for axis, values in zip(axes, axis_values)},
+            **metrics
+        })
+        summary_csv += "\n\n# Grid Sweep\n" + grid_df.to_csv(index=False)
+    
     # If we have individual simulation data, create a section for that
     if 'individual_results' in detailed_results:
         individual_data = []
@@ -352,6 +946,8 @@ def export_results_to_csv(result: SimulationResult) -> str:
                 'Final Bankroll': sim['final_bankroll'],
                 'Max Bankroll': sim['max_bankroll'],
                 'Max Drawdown': sim['max_drawdown'],
+                'Time Under Water': sim.get('time_under_water', 'N/A'),
+                'Longest Losing Streak': sim.get('longest_losing_streak', 'N/A'),
                 'Went Bankrupt': sim['bankrupt']
             })
         
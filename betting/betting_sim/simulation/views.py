@@ -18,7 +18,7 @@ from .models import Simulation, Outcome, SimulationResult
 from .forms import SimulationForm, OutcomeFormSet
 from .utils import (
     create_simulator_from_model, generate_plots, 
-    run_parameter_sweep, export_results_to_csv
+    run_parameter_sweep, run_strategy_comparison, run_bet_fraction_optimization, export_results_to_csv
 )
 
 
@@ -202,7 +202,8 @@ class RunSimulationView(View):
                     min_final_bankroll=0.0,  # Placeholder
                     max_final_bankroll=0.0,  # Placeholder
                     probability_of_ruin=0.0,  # Placeholder
-                    max_drawdown=0.0  # Placeholder
+                    max_drawdown=0.0,  # Placeholder
+                    seed=sweep_results['seed']
                 )
                 
                 # Serialize sweep results to JSON
@@ -210,11 +211,18 @@ class RunSimulationView(View):
                 result.save()
                 
             else:
-                # Create simulator from the model
-                simulator, _ = create_simulator_from_model(simulation)
-                
-                # Run the simulation
-                results = simulator.run_multiple_simulations()
+                if simulation.is_strategy_comparison:
+                    # Run every compared strategy on the same outcome paths
+                    results = run_strategy_comparison(simulation)
+                elif simulation.is_optimization:
+                    # Search the best bet fraction, then run the simulation there
+                    results = run_bet_fraction_optimization(simulation)
+                else:
+                    # Create simulator from the model
+                    simulator, _ = create_simulator_from_model(simulation)
+                    
+                    # Run the simulation
+                    results = simulator.run_multiple_simulations()
                 
                 # Save the results
                 result = SimulationResult(
@@ -225,7 +233,8 @@ class RunSimulationView(View):
                     min_final_bankroll=results['min_final_bankroll'],
                     max_final_bankroll=results['max_final_bankroll'],
                     probability_of_ruin=results['probability_of_ruin'],
-                    max_drawdown=results['mean_max_drawdown']
+                    max_drawdown=results['mean_max_drawdown'],
+                    seed=results['seed']
                 )
                 
                 # Serialize detailed results to JSON